@@ -11,13 +11,10 @@ from docutils.statemachine import ViewList
 from sphinx.util.compat import Directive
 from sphinx.util.nodes import nested_parse_with_titles
 
-from knack.help_files import helps
-
-from knack.help import GroupHelpFile
 from azure.cli.core import MainCommandsLoader, AzCli
 from azure.cli.core.commands import AzCliCommandInvoker
 from azure.cli.core.parser import AzCliCommandParser
-from azure.cli.core._help import AzCliHelp, CliCommandHelpFile, ArgumentGroupRegistry
+from azure.cli.core._help import AzCliHelp, CliCommandHelpFile, CliGroupHelpFile, ArgumentGroupRegistry
 
 USER_HOME = expanduser('~')
 
@@ -42,7 +39,7 @@ def get_help_files(cli_ctx):
     help_files = []
     for cmd, parser in zip(sub_parser_keys, sub_parser_values):
         try:
-            help_file = GroupHelpFile(cmd, parser) if _is_group(parser) else CliCommandHelpFile(cmd, parser)
+            help_file = CliGroupHelpFile(cli_ctx, cmd, parser) if _is_group(parser) else CliCommandHelpFile(cmd, parser)
             help_file.load(parser)
             help_files.append(help_file)
         except Exception as ex:
@@ -0,0 +1,286 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Startup and command latency benchmarks.
+
+Commands are run offline: scenarios which call Azure replay the VCR recordings of the command module tests, with
+the same patches the test SDK applies in playback mode. For each scenario the benchmark measures
+
+  cold    wall clock time of a new Python process running the command once, without the playback setup
+  warm    time of the command invoked again in a process which already ran it
+  rss     peak resident set size of the process (KB)
+  imports number of modules imported by the CLI and its first invocation
+
+Usage:
+
+  python scripts/performance/benchmark.py [--scenario NAME ...] [--output results.json]
+                                          [--baseline baseline.json] [--threshold 0.15]
+
+With --baseline, the results are compared with a previous output file and the script exits with 1 when the median
+cold or warm time or the peak RSS of a scenario regressed by more than the threshold (a fraction, 0.15 = 15%).
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+
+def _recording(module, name):
+    return os.path.join('command_modules', 'azure-cli-{}'.format(module), 'azure', 'cli', 'command_modules', module,
+                        'tests', 'latest', 'recordings', '{}.yaml'.format(name))
+
+
+# name => (command, recording relative to src or None for commands which don't call Azure)
+SCENARIOS = collections.OrderedDict([
+    ('az', ('', None)),
+    ('version', ('--version', None)),
+    ('vm-create-help', ('vm create -h', None)),
+    ('network-vnet-create-help', ('network vnet create -h', None)),
+    ('storage-blob-upload-help', ('storage blob upload -h', None)),
+    ('account-list', ('account list', None)),
+    ('group-show', ('group show -n cli_test_rg_scenario000001', _recording('resource', 'test_resource_group'))),
+    ('storage-account-list', ('storage account list', _recording('storage', 'test_list_storage_accounts'))),
+    ('network-vnet-show', ('network vnet show -g cli_vnet_test000001 -n vnet1',
+                           _recording('network', 'test_network_vnet'))),
+    ('network-vnet-list', ('network vnet list -g cli_vnet_test000001', _recording('network', 'test_network_vnet'))),
+    ('vm-list', ('vm list -g cli_test_vm_list_ip000001',
+                 _recording('vm', 'test_vm_show_list_sizes_list_ip_addresses'))),
+    ('vm-show-details', ('vm show -g cli_test_vm_list_ip000001 -n vm-with-public-ip -d',
+                         _recording('vm', 'test_vm_show_list_sizes_list_ip_addresses'))),
+])
+
+COMPARED_METRICS = [('cold', 'median'), ('warm', 'median'), ('rss', None)]
+
+
+def _summarize(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    middle = len(ordered) // 2
+    median = ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2.0
+    mean = sum(ordered) / float(len(ordered))
+    stdev = (sum((x - mean) ** 2 for x in ordered) / len(ordered)) ** 0.5
+    return {'min': round(ordered[0], 4), 'median': round(median, 4), 'mean': round(mean, 4),
+            'stdev': round(stdev, 4), 'runs': len(ordered)}
+
+
+def _peak_rss():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _run_worker(args):
+    """ Runs a scenario inside this process and writes the measurements to args.result_file.
+
+    The CLI is imported before the test SDK, so the modules of the core and knack are counted for every scenario.
+    The time and the modules of the playback setup (the test SDK, vcr and their dependencies) are left out.
+    """
+    import shlex
+
+    start = timeit.default_timer()
+    modules = set(sys.modules)
+    from azure.cli.core import get_default_cli
+
+    test = None
+    setup = 0
+    harness_modules = set()
+    if args.recording:
+        setup_start = timeit.default_timer()
+        loaded = set(sys.modules)
+        from azure.cli.testsdk import ScenarioTest
+
+        class BenchmarkScenario(ScenarioTest):
+
+            def __init__(self, recording_file):
+                super(BenchmarkScenario, self).__init__('run_benchmark')
+                self.recording_file = recording_file
+                self.in_recording = False
+
+            def run_benchmark(self):
+                pass
+
+        test = BenchmarkScenario(args.recording)
+        test.setUp()
+        harness_modules = set(sys.modules) - loaded
+        setup = timeit.default_timer() - setup_start
+
+    command_args = shlex.split(args.command)
+    times = []
+    exit_code = None
+    imports = None
+    try:
+        with open(os.devnull, 'w') as devnull:
+            for _ in range(args.warm_runs + 1):
+                if test:
+                    test.cassette.play_counts = collections.Counter()
+                if times:
+                    start = timeit.default_timer()
+                cli = get_default_cli()
+                try:
+                    exit_code = cli.invoke(command_args, out_file=devnull)
+                except SystemExit as ex:
+                    exit_code = ex.code
+                # the first run includes the import of the CLI, but not the playback setup
+                times.append(timeit.default_timer() - start - (0 if times else setup))
+                if imports is None:
+                    imports = len(set(sys.modules) - modules - harness_modules)
+    finally:
+        if test:
+            test.doCleanups()
+
+    with open(args.result_file, 'w') as f:
+        json.dump({'first': times[0], 'warm': times[1:], 'setup': setup, 'imports': imports, 'rss': _peak_rss(),
+                   'exit_code': exit_code}, f)
+
+
+def _run_scenario(command, recording, options, config_dir):
+    fd, result_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    env = dict(os.environ, AZURE_CONFIG_DIR=config_dir, AZURE_CORE_COLLECT_TELEMETRY='no')
+    env.pop('AZURE_CORE_USE_DAEMON', None)
+    worker_cmd = [sys.executable, os.path.abspath(__file__), '--worker', '--command=' + command,
+                  '--result-file', result_file]
+    if recording:
+        worker_cmd += ['--recording', os.path.join(SRC_DIR, recording)]
+
+    def _run(warm_runs):
+        start = timeit.default_timer()
+        with open(os.devnull, 'w') as devnull:
+            return_code = subprocess.call(worker_cmd + ['--warm-runs', str(warm_runs)], env=env, stdout=devnull,
+                                          stderr=None if options.verbose else devnull)
+        elapsed = timeit.default_timer() - start
+        if return_code:
+            raise RuntimeError("The benchmark of 'az {}' failed. Use --verbose to see its output.".format(command))
+        with open(result_file) as f:
+            return elapsed, json.load(f)
+
+    try:
+        # the first run populates the configuration directory (e.g. the command index) and the bytecode caches
+        _run(0)
+        cold, rss, imports, exit_code = [], [], None, None
+        for _ in range(options.cold_runs):
+            elapsed, result = _run(0)
+            # the playback setup of the scenarios which call Azure is not part of the cold time
+            cold.append(elapsed - result['setup'])
+            rss.append(result['rss'])
+            imports, exit_code = result['imports'], result['exit_code']
+        _, result = _run(options.warm_runs)
+        warm = result['warm']
+    finally:
+        os.remove(result_file)
+
+    rss = [r for r in rss if r is not None]
+    return {
+        'command': 'az ' + command if command else 'az',
+        'offline': bool(recording),
+        'exit_code': exit_code,
+        'cold': _summarize(cold),
+        'warm': _summarize(warm),
+        'rss': max(rss) if rss else None,
+        'imports': imports
+    }
+
+
+def _metric(result, metric, stat):
+    value = result.get(metric)
+    if value is not None and stat:
+        value = value.get(stat)
+    return value
+
+
+def compare(results, baseline, threshold):
+    """ Returns the list of (scenario, metric, baseline value, new value) which regressed beyond the threshold. """
+    regressions = []
+    for name, result in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        for metric, stat in COMPARED_METRICS:
+            old, new = _metric(base, metric, stat), _metric(result, metric, stat)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup and command latency of the CLI.')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), dest='scenarios',
+                        help='Scenario to run. Can be repeated. Default: all scenarios.')
+    parser.add_argument('--cold-runs', type=int, default=5, help='Number of new processes per scenario.')
+    parser.add_argument('--warm-runs', type=int, default=10, help='Number of warm invocations per scenario.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='Results of a previous run to compare with.')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Allowed regression against the baseline, as a fraction.')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the commands.')
+    # internal, used to run a scenario in a new process
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--command', help=argparse.SUPPRESS)
+    parser.add_argument('--recording', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_worker(args)
+        return 0
+
+    if args.cold_runs < 1 or args.warm_runs < 1:
+        parser.error('--cold-runs and --warm-runs must be positive.')
+    if args.threshold < 0:
+        parser.error('--threshold must not be negative.')
+
+    from azure.cli.core import __version__ as core_version
+    results = collections.OrderedDict([
+        ('version', core_version),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('scenarios', collections.OrderedDict())
+    ])
+    print('{:28} {:>10} {:>10} {:>10} {:>8}'.format('scenario', 'cold (s)', 'warm (s)', 'rss (KB)', 'imports'))
+    for name in args.scenarios or SCENARIOS:
+        command, recording = SCENARIOS[name]
+        config_dir = tempfile.mkdtemp()
+        try:
+            result = _run_scenario(command, recording, args, config_dir)
+        finally:
+            shutil.rmtree(config_dir, ignore_errors=True)
+        results['scenarios'][name] = result
+        print('{:28} {:>10} {:>10} {:>10} {:>8}{}'.format(
+            name, result['cold']['median'], result['warm']['median'], result['rss'], result['imports'],
+            '' if result['exit_code'] == 0 else '  (exit code {})'.format(result['exit_code'])))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print('REGRESSION {} {}: {} -> {} (+{:.0%})'.format(name, metric, old, new, new / float(old) - 1))
+        if regressions:
+            return 1
+        print('No regression beyond {:.0%} against {}.'.format(args.threshold, args.baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -35,7 +35,9 @@ class AzCli(CLI):
         from azure.cli.core.commands.arm import add_id_parameters
         from azure.cli.core.cloud import get_active_cloud
         from azure.cli.core.extensions import register_extensions
-        from azure.cli.core._session import ACCOUNT, CONFIG, SESSION
+        from azure.cli.core._session import ACCOUNT, CONFIG, SESSION, INDEX
+        from azure.cli.core.profiler import profile_phase
+        from azure.cli.core._token_refresh import register_token_refresh
 
         import knack.events as events
         from knack.util import ensure_dir
@@ -48,14 +50,19 @@ class AzCli(CLI):
 
         azure_folder = self.config.config_dir
         ensure_dir(azure_folder)
-        ACCOUNT.load(os.path.join(azure_folder, 'azureProfile.json'))
-        CONFIG.load(os.path.join(azure_folder, 'az.json'))
-        SESSION.load(os.path.join(azure_folder, 'az.sess'), max_age=3600)
-        self.cloud = get_active_cloud(self)
+        with profile_phase('load_session_files'):
+            ACCOUNT.load(os.path.join(azure_folder, 'azureProfile.json'))
+            CONFIG.load(os.path.join(azure_folder, 'az.json'))
+            SESSION.load(os.path.join(azure_folder, 'az.sess'), max_age=3600)
+            INDEX.load(os.path.join(azure_folder, 'commandIndex.json'))
+        with profile_phase('load_cloud'):
+            self.cloud = get_active_cloud(self)
         logger.debug('Current cloud config:\n%s', str(self.cloud.name))
 
-        register_extensions(self)
+        with profile_phase('register_extensions'):
+            register_extensions(self)
         self.register_event(events.EVENT_INVOKER_POST_CMD_TBL_CREATE, add_id_parameters)
+        register_token_refresh(self)
 
         self.progress_controller = None
 
@@ -90,6 +97,8 @@ class MainCommandsLoader(CLICommandsLoader):
     def __init__(self, cli_ctx=None):
         super(MainCommandsLoader, self).__init__(cli_ctx)
         self.cmd_to_loader_map = {}
+        # command name => name of the command module which provides it, used to find the help of a command
+        self.cmd_to_mod_map = {}
         self.loaders = []
 
     def _update_command_definitions(self):
@@ -107,28 +116,42 @@ class MainCommandsLoader(CLICommandsLoader):
             _load_module_command_loader, _load_extension_command_loader, BLACKLISTED_MODS, ExtensionCommandSource)
         from azure.cli.core.extension import (
             get_extensions, get_extension_path, get_extension_modname)
+        from azure.cli.core.profiler import profile_phase
 
-        cmd_to_mod_map = {}
+        cmd_to_mod_map = self.cmd_to_mod_map
+        cmd_to_mod_map.clear()
+        cmd_to_ext_map = {}
 
-        def _update_command_table_from_modules(args):
-            '''Loads command table(s)
-            When `module_name` is specified, only commands from that module will be loaded.
-            If the module is not found, all commands are loaded.
+        def _get_installed_command_modules():
+            '''Returns a dict of installed command module names to the modification time of their package,
+            which is used to detect module installs, removals and upgrades.
             '''
-            installed_command_modules = []
+            installed_command_modules = {}
             try:
                 mods_ns_pkg = import_module('azure.cli.command_modules')
-                installed_command_modules = [modname for _, modname, _ in
-                                             pkgutil.iter_modules(mods_ns_pkg.__path__)
-                                             if modname not in BLACKLISTED_MODS]
+                for finder, modname, _ in pkgutil.iter_modules(mods_ns_pkg.__path__):
+                    if modname in BLACKLISTED_MODS:
+                        continue
+                    try:
+                        mod_path = os.path.join(finder.path, modname)
+                        installed_command_modules[modname] = int(os.path.getmtime(mod_path))
+                    except (AttributeError, TypeError, OSError):
+                        installed_command_modules[modname] = None
             except ImportError:
                 pass
-            logger.debug('Installed command modules %s', installed_command_modules)
+            return installed_command_modules
+
+        def _update_command_table_from_modules(args, command_modules):
+            '''Loads command table(s)
+            Only the commands from the given `command_modules` will be loaded.
+            '''
+            logger.debug('Loading command modules %s', command_modules)
             cumulative_elapsed_time = 0
-            for mod in [m for m in installed_command_modules if m not in BLACKLISTED_MODS]:
+            for mod in [m for m in command_modules if m not in BLACKLISTED_MODS]:
                 try:
                     start_time = timeit.default_timer()
-                    module_command_table = _load_module_command_loader(self, args, mod)
+                    with profile_phase(mod, 'command_module'):
+                        module_command_table = _load_module_command_loader(self, args, mod)
                     self.command_table.update(module_command_table)
                     cmd_to_mod_map.update({cmd: mod for cmd in list(module_command_table.keys())})
                     elapsed_time = timeit.default_timer() - start_time
@@ -146,7 +169,7 @@ class MainCommandsLoader(CLICommandsLoader):
                          "(note: there's always an overhead with the first module loaded)",
                          cumulative_elapsed_time)
 
-        def _update_command_table_from_extensions(ext_suppressions):
+        def _update_command_table_from_extensions(ext_suppressions, extension_names=None):
 
             def _handle_extension_suppressions(extensions):
                 filtered_extensions = []
@@ -160,6 +183,8 @@ class MainCommandsLoader(CLICommandsLoader):
                 return filtered_extensions
 
             extensions = get_extensions()
+            if extension_names is not None:
+                extensions = [e for e in extensions if e.name in extension_names]
             if extensions:
                 logger.debug("Found %s extensions: %s", len(extensions), [e.name for e in extensions])
                 allowed_extensions = _handle_extension_suppressions(extensions)
@@ -173,7 +198,8 @@ class MainCommandsLoader(CLICommandsLoader):
                         # from an extension requires this map to be up-to-date.
                         # self._mod_to_ext_map[ext_mod] = ext_name
                         start_time = timeit.default_timer()
-                        extension_command_table = _load_extension_command_loader(self, args, ext_mod)
+                        with profile_phase(ext_name, 'extension'):
+                            extension_command_table = _load_extension_command_loader(self, args, ext_mod)
 
                         for cmd_name, cmd in extension_command_table.items():
                             cmd.command_source = ExtensionCommandSource(
@@ -182,6 +208,7 @@ class MainCommandsLoader(CLICommandsLoader):
                                 preview=ext.preview)
 
                         self.command_table.update(extension_command_table)
+                        cmd_to_ext_map.update({cmd: ext_name for cmd in extension_command_table})
                         elapsed_time = timeit.default_timer() - start_time
                         logger.debug("Loaded extension '%s' in %.3f seconds.", ext_name, elapsed_time)
                     except Exception:  # pylint: disable=broad-except
@@ -214,18 +241,50 @@ class MainCommandsLoader(CLICommandsLoader):
                     res.append(sup)
             return res
 
-        _update_command_table_from_modules(args)
-        try:
-            ext_suppressions = _get_extension_suppressions(self.loaders)
-            # We always load extensions even if the appropriate module has been loaded
-            # as an extension could override the commands already loaded.
-            _update_command_table_from_extensions(ext_suppressions)
-        except Exception:  # pylint: disable=broad-except
-            logger.warning("Unable to load extensions. Use --debug for more information.")
-            logger.debug(traceback.format_exc())
+        def _load_from_modules_and_extensions(command_modules, extension_names=None):
+            _update_command_table_from_modules(args, command_modules)
+            try:
+                ext_suppressions = _get_extension_suppressions(self.loaders)
+                # We always load extensions even if the appropriate module has been loaded
+                # as an extension could override the commands already loaded.
+                _update_command_table_from_extensions(ext_suppressions, extension_names)
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Unable to load extensions. Use --debug for more information.")
+                logger.debug(traceback.format_exc())
+
+        installed_command_modules = _get_installed_command_modules()
+        command_index = None
+        if self.cli_ctx.config.getboolean('core', 'use_command_index', fallback=True):
+            command_index = CommandIndex(self.cli_ctx, installed_command_modules)
+            if self._load_from_command_index(args, command_index, _load_from_modules_and_extensions, cmd_to_ext_map):
+                return self.command_table
+
+        _load_from_modules_and_extensions(list(installed_command_modules))
+        if command_index:
+            command_index.update(cmd_to_mod_map, cmd_to_ext_map)
 
         return self.command_table
 
+    def _load_from_command_index(self, args, command_index, load_from_modules_and_extensions, cmd_to_ext_map):
+        """ Load the command modules and extensions which provide the command according to the index. Returns whether
+        they were loaded, otherwise everything loaded is discarded for all of them to be loaded. """
+        index_result = command_index.get(args)
+        if not index_result:
+            return False
+        index_modules, index_extensions = index_result
+        logger.debug("Loading command modules %s and extensions %s from the command index.",
+                     index_modules, index_extensions)
+        load_from_modules_and_extensions(index_modules, index_extensions)
+        if any(cmd.split()[0] == args[0] for cmd in self.command_table):
+            return True
+        logger.debug("Command index is stale for '%s'. Loading all command modules.", args[0])
+        self.command_table.clear()
+        self.cmd_to_loader_map.clear()
+        del self.loaders[:]
+        self.cmd_to_mod_map.clear()
+        cmd_to_ext_map.clear()
+        return False
+
     def load_arguments(self, command):
         from azure.cli.core.commands.parameters import resource_group_name_type, get_location_type, deployment_name_type
         from knack.arguments import ignore_type
@@ -248,6 +307,69 @@ class MainCommandsLoader(CLICommandsLoader):
                 loader._update_command_definitions()  # pylint: disable=protected-access
 
 
+class CommandIndex(object):
+    """ Persisted mapping of top-level command names to the command modules and extensions which provide them.
+
+    The index is only valid for the CLI version, cloud profile, installed command modules and installed extensions
+    it was built with. When any of these change the index is discarded and rebuilt from a full command table load.
+    """
+
+    _COMMAND_INDEX = 'commandIndex'
+    _COMMAND_INDEX_KEY = 'key'
+
+    def __init__(self, cli_ctx, installed_command_modules):
+        self.cli_ctx = cli_ctx
+        self.key = self._build_key(installed_command_modules)
+
+    def _build_key(self, installed_command_modules):
+        from azure.cli.core.extension import get_extensions
+        try:
+            extensions = {e.name: getattr(e, 'version', None) for e in get_extensions()}
+        except Exception:  # pylint: disable=broad-except
+            extensions = {}
+        return {
+            'version': __version__,
+            'cloudProfile': self.cli_ctx.cloud.profile,
+            'modules': installed_command_modules,
+            'extensions': extensions
+        }
+
+    def get(self, args):
+        """ Returns a tuple of the command modules and extension names to load for the given args, or None if the
+        full command table must be loaded.
+        """
+        from azure.cli.core._session import INDEX
+        # The root command and global options such as `az --version` require the full command table.
+        if not args or args[0].startswith('-'):
+            return None
+        if INDEX.get(self._COMMAND_INDEX_KEY) != self.key:
+            logger.debug("Command index is missing or out of date.")
+            return None
+        entry = INDEX.get(self._COMMAND_INDEX, {}).get(args[0])
+        if not entry:
+            return None
+        return entry['modules'], entry['extensions']
+
+    def update(self, cmd_to_mod_map, cmd_to_ext_map):
+        """ Rebuild the index from a fully loaded command table and persist it if it changed """
+        from azure.cli.core._session import INDEX
+        index = {}
+        for cmd_to_source_map, source_kind in [(cmd_to_mod_map, 'modules'), (cmd_to_ext_map, 'extensions')]:
+            for cmd_name, source in cmd_to_source_map.items():
+                entry = index.setdefault(cmd_name.split()[0], {'modules': [], 'extensions': []})
+                if source not in entry[source_kind]:
+                    entry[source_kind].append(source)
+        if INDEX.get(self._COMMAND_INDEX_KEY) == self.key and INDEX.get(self._COMMAND_INDEX) == index:
+            return
+        INDEX.data[self._COMMAND_INDEX_KEY] = self.key
+        INDEX.data[self._COMMAND_INDEX] = index
+        try:
+            INDEX.save_with_retry()
+            logger.debug("Updated the command index with %s top-level commands.", len(index))
+        except (OSError, IOError):
+            logger.debug("Unable to save the command index.", exc_info=True)
+
+
 class ModExtensionSuppress(object):  # pylint: disable=too-few-public-methods
 
     def __init__(self, mod_name, suppress_extension_name, suppress_up_to_version, reason=None, recommend_remove=False):
@@ -388,6 +510,20 @@ class AzCommandsLoader(CLICommandsLoader):  # pylint: disable=too-many-instance-
     def argument_context(self, scope, **kwargs):
         return self._argument_context_cls(self, scope, **kwargs)
 
+    def load_scoped_arguments(self, command, scoped_loaders):
+        """ Run only the argument loaders whose command scope applies to the command being loaded. This allows
+        large modules to skip building the argument contexts for the command groups that were not invoked.
+
+        :param command: Name of the command arguments are being loaded for
+        :type command: str
+        :param scoped_loaders: Pairs of a command scope and a callable, taking no arguments, which registers argument
+                               contexts. Every argument context a loader registers must be within its scope.
+        :type scoped_loaders: list of (str, callable)
+        """
+        for scope, loader in scoped_loaders:
+            if self.skip_applicability or command == scope or command.startswith(scope + ' '):
+                loader()
+
     def _cli_command(self, name, operation=None, handler=None, argument_loader=None, description_loader=None, **kwargs):
 
         if operation and not isinstance(operation, six.string_types):
@@ -481,6 +617,7 @@ def get_default_cli():
     from azure.cli.core.parser import AzCliCommandParser
     from azure.cli.core._config import GLOBAL_CONFIG_DIR, ENV_VAR_PREFIX
     from azure.cli.core._help import AzCliHelp
+    from azure.cli.core._output import AzOutputProducer
 
     return AzCli(cli_name='az',
                  config_dir=GLOBAL_CONFIG_DIR,
@@ -489,4 +626,5 @@ def get_default_cli():
                  invocation_cls=AzCliCommandInvoker,
                  parser_cls=AzCliCommandParser,
                  logging_cls=AzCliLogging,
+                 output_cls=AzOutputProducer,
                  help_cls=AzCliHelp)
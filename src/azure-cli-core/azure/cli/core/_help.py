@@ -7,6 +7,7 @@ from __future__ import print_function
 
 from knack.help import (HelpExample,
                         HelpFile as KnackHelpFile,
+                        GroupHelpFile as KnackGroupHelpFile,
                         CLIHelp,
                         HelpParameter,
                         ArgumentGroupRegistry as KnackArgumentGroupRegistry)
@@ -64,21 +65,27 @@ class AzCliHelp(CLIHelp):
         cls._print_extensions_msg(help_file)
         cls._print_detailed_help(cli_name, help_file)
 
-    @classmethod
-    def show_help(cls, cli_name, nouns, parser, is_group):
-        from knack.help import GroupHelpFile
+    def show_welcome(self, parser):
+        self.show_privacy_statement()
+        self.show_welcome_message()
+        help_file = CliGroupHelpFile(self.cli_ctx, '', parser)
+        self.print_description_list(help_file.children)
+
+    def show_help(self, cli_name, nouns, parser, is_group):
         delimiters = ' '.join(nouns)
-        help_file = CliCommandHelpFile(delimiters, parser) if not is_group else GroupHelpFile(delimiters, parser)
+        help_file = CliCommandHelpFile(delimiters, parser) if not is_group \
+            else CliGroupHelpFile(self.cli_ctx, delimiters, parser)
         help_file.load(parser)
         if not nouns:
             help_file.command = ''
-        cls.print_detailed_help(cli_name, help_file)
+        self.print_detailed_help(cli_name, help_file)
 
 
 class CliHelpFile(KnackHelpFile):
 
     def __init__(self, cli_ctx, delimiters):
-        super(CliHelpFile, self).__init__(delimiters)
+        # not super(), the next class of a CliGroupHelpFile is the knack GroupHelpFile
+        KnackHelpFile.__init__(self, delimiters)
         self.cli_ctx = cli_ctx
 
     def _should_include_example(self, ex):
@@ -93,6 +100,13 @@ class CliHelpFile(KnackHelpFile):
                                          min_api=min_profile, max_api=max_profile)
         return True
 
+    # The help of the command modules is read from their index
+    def _load_from_file(self):
+        from azure.cli.core._help_index import get_help_data
+        file_data = get_help_data(self.cli_ctx, self.delimiters)
+        if file_data:
+            self._load_from_data(file_data)
+
     # Needs to override base implementation
     def _load_from_data(self, data):
         if not data:
@@ -117,6 +131,23 @@ class CliHelpFile(KnackHelpFile):
                     self.examples.append(HelpExample(d))
 
 
+# A knack GroupHelpFile, for the help to list it as a subgroup, whose children are loaded like CliHelpFile
+class CliGroupHelpFile(CliHelpFile, KnackGroupHelpFile):
+
+    def __init__(self, cli_ctx, delimiters, parser):  # pylint: disable=super-init-not-called
+        CliHelpFile.__init__(self, cli_ctx, delimiters)
+        self.type = 'group'
+
+        self.children = []
+        if getattr(parser, 'choices', None):
+            for options in parser.choices.values():
+                delimiters = ' '.join(options.prog.split()[1:])
+                child = (CliGroupHelpFile(cli_ctx, delimiters, options) if options.is_group()
+                         else CliHelpFile(cli_ctx, delimiters))
+                child.load(options)
+                self.children.append(child)
+
+
 class CliCommandHelpFile(CliHelpFile):
 
     def __init__(self, delimiters, parser):
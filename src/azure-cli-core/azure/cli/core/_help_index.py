@@ -0,0 +1,131 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Index of the help of the command modules.
+
+The `_help` module of a command module registers the help of its commands and groups as YAML strings. It's not
+imported when a command runs: when help is shown, the help of the requested node is read from an index of the
+command modules which provide it, a JSON file per module in the configuration directory with the parsed YAML keyed by
+command path. The index of a module is compiled the first time its help is shown, and again when its `_help` module
+or the CLI version changed.
+
+The help registered directly in `knack.help_files.helps` (e.g. by extensions) is still used, and takes precedence.
+"""
+
+import json
+import os
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+HELP_INDEX_DIR = 'helpIndex'
+COMMAND_MODULE_PREFIX = 'azure.cli.command_modules.'
+
+# command module name => {command path => help data}, the indexes loaded by this process
+_MODULE_HELP = {}
+
+
+def get_help_data(cli_ctx, delimiters, commands_loader=None):
+    """ The help of a command or group, as loaded from its YAML, or None when it has none. """
+    from knack.help_files import helps
+    if delimiters in helps:
+        return _parse(helps[delimiters])
+
+    modules = _command_modules(cli_ctx, commands_loader)
+    # the modules which provide commands under the node first, any other loaded module may still describe it
+    prefix = delimiters + ' ' if delimiters else ''
+    providers = sorted({mod for cmd, mod in modules.items() if cmd == delimiters or cmd.startswith(prefix)})
+    for mod in providers + sorted(set(modules.values()) - set(providers)):
+        data = _load_module_help(cli_ctx, mod).get(delimiters)
+        if data is not None:
+            return data
+    return None
+
+
+def get_all_help_data(cli_ctx, commands_loader=None):
+    """ The help of all the commands and groups of the loaded command modules, keyed by command path. """
+    from knack.help_files import helps
+    result = {}
+    for mod in sorted(set(_command_modules(cli_ctx, commands_loader).values())):
+        result.update(_load_module_help(cli_ctx, mod))
+    result.update({delimiters: _parse(text) for delimiters, text in helps.items()})
+    return result
+
+
+def _command_modules(cli_ctx, commands_loader=None):
+    """ The command name => command module map of the loaded command table. """
+    if commands_loader is None:
+        commands_loader = getattr(getattr(cli_ctx, 'invocation', None), 'commands_loader', None)
+    return getattr(commands_loader, 'cmd_to_mod_map', None) or {}
+
+
+def _parse(text):
+    import yaml
+    try:
+        return yaml.safe_load(text) if text else None
+    except Exception:  # pylint: disable=broad-except
+        # like knack, a help which is not valid YAML is shown as is
+        return text
+
+
+def _load_module_help(cli_ctx, mod):
+    if mod in _MODULE_HELP:
+        return _MODULE_HELP[mod]
+
+    from importlib import import_module
+    from azure.cli.core import __version__
+
+    package = import_module(COMMAND_MODULE_PREFIX + mod)
+    try:
+        stat = os.stat(os.path.join(os.path.dirname(package.__file__), '_help.py'))
+    except (OSError, TypeError):
+        # the module has no help, or registers it when it's imported
+        _MODULE_HELP[mod] = {}
+        return _MODULE_HELP[mod]
+
+    source = [__version__, int(stat.st_mtime), stat.st_size]
+    index_path = os.path.join(cli_ctx.config.config_dir, HELP_INDEX_DIR, '{}.json'.format(mod))
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (IOError, OSError, ValueError):
+        index = {}
+
+    if index.get('source') != source:
+        logger.debug("Compiling the help index of command module '%s'.", mod)
+        index = {'source': source, 'helps': _compile_help_module(package.__name__ + '._help')}
+        try:
+            if not os.path.isdir(os.path.dirname(index_path)):
+                os.makedirs(os.path.dirname(index_path))
+            with open(index_path, 'w') as f:
+                # YAML may load dates, e.g. the min_profile of an example, which are kept as strings
+                json.dump(index, f, default=str)
+        except (IOError, OSError):
+            logger.debug("Unable to save the help index of command module '%s'.", mod, exc_info=True)
+        # what is read from the index is JSON, the compiled help too
+        index = json.loads(json.dumps(index, default=str))
+
+    _MODULE_HELP[mod] = index['helps']
+    return _MODULE_HELP[mod]
+
+
+def _compile_help_module(module_name):
+    """ Import a `_help` module with an empty registry, and parse the YAML it registered. """
+    from importlib import import_module
+    import sys
+    import knack.help_files
+
+    registry = knack.help_files.helps
+    module_helps = knack.help_files.helps = {}
+    try:
+        if module_name in sys.modules:
+            from six.moves import reload_module
+            reload_module(sys.modules[module_name])
+        else:
+            import_module(module_name)
+    finally:
+        knack.help_files.helps = registry
+    return {delimiters: _parse(text) for delimiters, text in module_helps.items()}
@@ -6,12 +6,29 @@
 from __future__ import print_function, unicode_literals
 
 import errno
+import json
 import sys
 import platform
 from six import StringIO
-import colorama
 
+from knack.events import EVENT_PARSER_GLOBAL_CREATE
 from knack.output import format_json, format_json_color, format_table, format_tsv
+from knack.output import OutputProducer as KnackOutputProducer
+from knack.util import CommandResultItem
+
+
+def format_jsonl(obj):
+    """ One compact JSON document per line for each element of a list result, so that the output can be processed
+    line by line, as it's written. """
+    result = obj.result
+    result_list = result if isinstance(result, list) else [result]
+    return ''.join(json.dumps(item, sort_keys=True, default=_json_default) + '\n' for item in result_list)
+
+
+def _json_default(o):
+    if isinstance(o, bytes):
+        return o.decode()
+    raise TypeError('{} is not JSON serializable'.format(type(o).__name__))
 
 
 def format_text(obj):
@@ -35,6 +52,7 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
         'table': format_table,
         'text': format_text,
         'tsv': format_tsv,
+        'jsonl': format_jsonl,
     }
 
     def __init__(self, formatter, file=sys.stdout):  # pylint: disable=redefined-builtin
@@ -43,6 +61,7 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
 
     def out(self, obj):
         if platform.system() == 'Windows':
+            import colorama
             self.file = colorama.AnsiToWin32(self.file).stream
         output = self.formatter(obj)
         try:
@@ -61,6 +80,59 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
         return OutputProducer.format_dict.get(format_type)
 
 
+class AzOutputProducer(KnackOutputProducer):
+    """
+    The output of the commands: adds the formats of the CLI to the ones of knack, and writes a streamed result, a
+    generator of pages, one page at a time as it is produced.
+    """
+
+    _FORMAT_DICT = dict(KnackOutputProducer._FORMAT_DICT, jsonl=format_jsonl)  # pylint: disable=protected-access
+
+    def __init__(self, cli_ctx=None):
+        super(AzOutputProducer, self).__init__(cli_ctx=cli_ctx)
+        # --output is added with the formats of the CLI
+        self.cli_ctx.unregister_event(EVENT_PARSER_GLOBAL_CREATE, KnackOutputProducer.on_global_arguments)
+        self.cli_ctx.register_event(EVENT_PARSER_GLOBAL_CREATE, AzOutputProducer.on_global_arguments)
+
+    @staticmethod
+    def on_global_arguments(cli_ctx, **kwargs):
+        arg_group = kwargs.get('arg_group')
+        arg_group.add_argument('--output', '-o', dest=KnackOutputProducer.ARG_DEST,
+                               choices=list(AzOutputProducer._FORMAT_DICT),
+                               default=cli_ctx.config.get('core', 'output', fallback='json'),
+                               help='Output format',
+                               type=str.lower)
+
+    def get_formatter(self, format_type):  # pylint: disable=no-self-use
+        return AzOutputProducer._FORMAT_DICT[format_type]
+
+    def out(self, obj, formatter=None, out_file=None):
+        import types
+        if not isinstance(obj.result, types.GeneratorType):
+            super(AzOutputProducer, self).out(obj, formatter=formatter, out_file=out_file)
+            return
+
+        if platform.system() == 'Windows':
+            import colorama
+            out_file = colorama.AnsiToWin32(out_file).stream
+        pages = obj.result
+        for page in pages:
+            output = formatter(CommandResultItem(page, table_transformer=obj.table_transformer,
+                                                 is_query_active=obj.is_query_active))
+            try:
+                try:
+                    print(output, file=out_file, end='')
+                except UnicodeEncodeError:
+                    print(output.encode('ascii', 'ignore').decode('utf-8', 'ignore'), file=out_file, end='')
+                out_file.flush()
+            except IOError as ex:
+                if ex.errno == errno.EPIPE:
+                    # the reader is gone, e.g. a pipe to head, the rest of the result is not fetched
+                    pages.close()
+                    return
+                raise
+
+
 class TextOutput(object):
 
     def __init__(self):
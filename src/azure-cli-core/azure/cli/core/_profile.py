@@ -7,17 +7,16 @@ from __future__ import print_function
 
 import collections
 import errno
-import json
 import os
 import os.path
-from copy import deepcopy
+from copy import copy, deepcopy
 from enum import Enum
 
 from knack.log import get_logger
 from knack.util import CLIError
 
 from azure.cli.core._environment import get_config_dir
-from azure.cli.core._session import ACCOUNT
+from azure.cli.core._session import ACCOUNT, SubscriptionIndex
 from azure.cli.core.util import get_file_json, in_cloud_console
 from azure.cli.core.cloud import get_active_cloud, set_cloud_subscription
 
@@ -58,6 +57,9 @@ TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE = ['familyName',
                                           'tenantId']
 
 _CLIENT_ID = '04b07795-8ddb-461a-bbee-02f9e1bf7b46'
+
+# the number of tenants or accounts whose subscriptions are looked up at the same time
+DEFAULT_LOGIN_MAX_WORKERS = 8
 _COMMON_TENANT = 'common'
 
 _TENANT_LEVEL_ACCOUNT_NAME = 'N/A(tenant level account)'
@@ -90,6 +92,21 @@ def _load_tokens_from_file(file_path):
     return []
 
 
+def _map_concurrently(cli_ctx, func, items):
+    '''Returns the results of func for each item, in the order of the items. The items are processed on up to
+    `core.login_max_workers` threads, and the exception of an item is raised once all of them were processed.
+    '''
+    items = list(items)
+    max_workers = cli_ctx.config.getint('core', 'login_max_workers', fallback=DEFAULT_LOGIN_MAX_WORKERS)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(func, item) for item in items]
+    return [future.result() for future in futures]
+
+
 def _delete_file(file_path):
     try:
         os.remove(file_path)
@@ -121,7 +138,7 @@ class Profile(object):
         from azure.cli.core import get_default_cli
 
         self.cli_ctx = cli_ctx or get_default_cli()
-        self._storage = storage or ACCOUNT
+        self._storage = storage if storage is not None else ACCOUNT
         self.auth_ctx_factory = auth_ctx_factory or _AUTH_CTX_FACTORY
 
         if use_global_creds_cache:
@@ -316,7 +333,8 @@ class Profile(object):
             return (account[_SUBSCRIPTION_ID] == subscription_id and
                     (secondary_key_val is None or account[secondary_key_name] == secondary_key_val))
 
-        existing_ones = self.load_cached_subscriptions(all_clouds=True)
+        # the stored subscriptions are replaced when they change, not copied
+        existing_ones = self._storage.get(_SUBSCRIPTIONS) or []
         active_one = next((x for x in existing_ones if x.get(_IS_DEFAULT_SUBSCRIPTION)), None)
         active_subscription_id = active_one[_SUBSCRIPTION_ID] if active_one else None
         active_secondary_key_val = active_one[secondary_key_name] if (active_one and secondary_key_name) else None
@@ -329,16 +347,19 @@ class Profile(object):
         else:
             dic = collections.OrderedDict()
 
+        new_ones = set(id(x) for x in new_subscriptions)
         dic.update((_get_key_name(x, secondary_key_name), x) for x in new_subscriptions)
-        subscriptions = list(dic.values())
-        if subscriptions:
+        if dic:
             if active_one:
                 new_active_one = next(
                     (x for x in new_subscriptions if _match_account(x, active_subscription_id, secondary_key_name,
                                                                     active_secondary_key_val)), None)
 
-                for s in subscriptions:
-                    s[_IS_DEFAULT_SUBSCRIPTION] = False
+                for key, s in list(dic.items()):
+                    if id(s) in new_ones:
+                        s[_IS_DEFAULT_SUBSCRIPTION] = False
+                    elif s.get(_IS_DEFAULT_SUBSCRIPTION):
+                        dic[key] = dict(s, **{_IS_DEFAULT_SUBSCRIPTION: False})
 
                 if not new_active_one:
                     new_active_one = Profile._pick_working_subscription(new_subscriptions)
@@ -349,7 +370,7 @@ class Profile(object):
             default_sub_id = new_active_one[_SUBSCRIPTION_ID]
 
             set_cloud_subscription(self.cli_ctx, active_cloud.name, default_sub_id)
-        self._storage[_SUBSCRIPTIONS] = subscriptions
+        self._storage[_SUBSCRIPTIONS] = list(dic.values())
 
     @staticmethod
     def _pick_working_subscription(subscriptions):
@@ -358,30 +379,25 @@ class Profile(object):
         return s or subscriptions[0]
 
     def set_active_subscription(self, subscription):  # take id or name
-        subscriptions = self.load_cached_subscriptions(all_clouds=True)
         active_cloud = self.cli_ctx.cloud
         subscription = subscription.lower()
-        result = [x for x in subscriptions
-                  if subscription in [x[_SUBSCRIPTION_ID].lower(),
-                                      x[_SUBSCRIPTION_NAME].lower()] and
-                  x[_ENVIRONMENT_NAME] == active_cloud.name]
+        result = self._get_subscription_index().find(active_cloud.name, subscription)
 
         if len(result) != 1:
             raise CLIError("The subscription of '{}' {} in cloud '{}'.".format(
                 subscription, "doesn't exist" if not result else 'has more than one match', active_cloud.name))
 
-        for s in subscriptions:
-            s[_IS_DEFAULT_SUBSCRIPTION] = False
-        result[0][_IS_DEFAULT_SUBSCRIPTION] = True
+        # only the subscriptions whose default flag changes are replaced
+        subscriptions = [dict(s, **{_IS_DEFAULT_SUBSCRIPTION: s is result[0]})
+                         if bool(s.get(_IS_DEFAULT_SUBSCRIPTION)) != (s is result[0]) else s
+                         for s in self._storage.get(_SUBSCRIPTIONS) or []]
 
         set_cloud_subscription(self.cli_ctx, active_cloud.name, result[0][_SUBSCRIPTION_ID])
         self._storage[_SUBSCRIPTIONS] = subscriptions
 
     def logout(self, user_or_sp):
-        subscriptions = self.load_cached_subscriptions(all_clouds=True)
-        result = [x for x in subscriptions
-                  if user_or_sp.lower() == x[_USER_ENTITY][_USER_NAME].lower()]
-        subscriptions = [x for x in subscriptions if x not in result]
+        subscriptions = [x for x in self._storage.get(_SUBSCRIPTIONS) or []
+                         if user_or_sp.lower() != x[_USER_ENTITY][_USER_NAME].lower()]
 
         self._storage[_SUBSCRIPTIONS] = subscriptions
         self._creds_cache.remove_cached_creds(user_or_sp)
@@ -398,6 +414,11 @@ class Profile(object):
         # use deepcopy as we don't want to persist these changes to file.
         return deepcopy(cached_subscriptions)
 
+    def _get_subscription_index(self):
+        # ACCOUNT keeps the index of its subscriptions, other storages (e.g. a dict) are indexed for each lookup
+        index = getattr(self._storage, 'subscription_index', None)
+        return index or SubscriptionIndex(self._storage.get(_SUBSCRIPTIONS) or [])
+
     def get_current_account_user(self):
         try:
             active_account = self.get_subscription()
@@ -407,17 +428,15 @@ class Profile(object):
         return active_account[_USER_ENTITY][_USER_NAME]
 
     def get_subscription(self, subscription=None):  # take id or name
-        subscriptions = self.load_cached_subscriptions()
-        if not subscriptions:
+        index = self._get_subscription_index()
+        cloud_name = self.cli_ctx.cloud.name
+        if not index.in_cloud(cloud_name):
             raise CLIError("Please run 'az login' to setup account.")
 
-        result = [x for x in subscriptions if (
-            not subscription and x.get(_IS_DEFAULT_SUBSCRIPTION) or
-            subscription and subscription.lower() in [x[_SUBSCRIPTION_ID].lower(), x[
-                _SUBSCRIPTION_NAME].lower()])]
+        result = index.find(cloud_name, subscription)
         if len(result) != 1:
             raise CLIError("Please run 'az account set' to select active account.")
-        return result[0]
+        return deepcopy(result[0])
 
     def get_subscription_id(self):
         return self.get_subscription()[_SUBSCRIPTION_ID]
@@ -504,6 +523,39 @@ class Profile(object):
                 str(account[_SUBSCRIPTION_ID]),
                 str(account[_TENANT_ID]))
 
+    def refresh_tokens(self, resources, lead_time, subscription=None):
+        '''Refresh the cached tokens of the user of a subscription for the resources which expire in less than
+        lead_time seconds. Returns the refreshed resources.
+        '''
+        return self.start_token_refresh(resources, lead_time, subscription)()
+
+    def start_token_refresh(self, resources, lead_time, subscription=None):
+        '''Mark the tokens of the user of a subscription for the resources as being refreshed, so that a command
+        requesting one of them waits for its refresh. Returns a function which refreshes the tokens expiring in less
+        than lead_time seconds and returns the refreshed resources. The tokens of service principals, managed
+        identities and Cloud Shell are not cached, nothing is refreshed for them.
+        '''
+        account = self.get_subscription(subscription)
+        if (account[_USER_ENTITY][_USER_TYPE] != _USER or account[_USER_ENTITY].get(_CLOUD_SHELL_ID) or
+                Profile._try_parse_msi_account_name(account)[0]):
+            return lambda: []
+        username, tenant = account[_USER_ENTITY][_USER_NAME], account[_TENANT_ID]
+        pending = self._creds_cache.start_token_refreshes(username, tenant, resources)
+
+        def _refresh():
+            refreshed = []
+            try:
+                while pending:
+                    if self._creds_cache.refresh_token_for_user(username, tenant, pending[0], lead_time):
+                        refreshed.append(pending[0])
+                    self._creds_cache.end_token_refresh(username, tenant, pending.pop(0))
+            finally:
+                # don't keep the commands waiting for the tokens left when a refresh failed
+                for resource in pending:
+                    self._creds_cache.end_token_refresh(username, tenant, resource)
+            return refreshed
+        return _refresh
+
     def refresh_accounts(self, subscription_finder=None):
         subscriptions = self.load_cached_subscriptions()
         to_refresh = subscriptions
@@ -514,26 +566,37 @@ class Profile(object):
                                                                         self.auth_ctx_factory,
                                                                         self._creds_cache.adal_token_cache)
         refreshed_list = set()
-        result = []
+        accounts = []
         for s in to_refresh:
             user_name = s[_USER_ENTITY][_USER_NAME]
-            if user_name in refreshed_list:
-                continue
-            refreshed_list.add(user_name)
-            is_service_principal = (s[_USER_ENTITY][_USER_TYPE] == _SERVICE_PRINCIPAL)
-            tenant = s[_TENANT_ID]
-            subscriptions = []
+            if user_name not in refreshed_list:
+                refreshed_list.add(user_name)
+                accounts.append(s)
+
+        def _find_subscriptions(s):
+            # the accounts are refreshed concurrently, each with its own finder state
+            finder = copy(subscription_finder)
+            finder.tenants = []
+            user_name = s[_USER_ENTITY][_USER_NAME]
             try:
-                if is_service_principal:
+                if s[_USER_ENTITY][_USER_TYPE] == _SERVICE_PRINCIPAL:
                     sp_auth = ServicePrincipalAuth(self._creds_cache.retrieve_secret_of_service_principal(user_name))
-                    subscriptions = subscription_finder.find_from_service_principal_id(user_name, sp_auth, tenant,
-                                                                                       self._ad_resource_uri)
+                    subscriptions = finder.find_from_service_principal_id(user_name, sp_auth, s[_TENANT_ID],
+                                                                          self._ad_resource_uri)
                 else:
-                    subscriptions = subscription_finder.find_from_user_account(user_name, None, None,
-                                                                               self._ad_resource_uri)
+                    subscriptions = finder.find_from_user_account(user_name, None, None, self._ad_resource_uri)
             except Exception as ex:  # pylint: disable=broad-except
+                return finder, None, ex
+            return finder, subscriptions, None
+
+        result = []
+        for s, (finder, subscriptions, error) in zip(accounts, _map_concurrently(self.cli_ctx, _find_subscriptions,
+                                                                                 accounts)):
+            user_name = s[_USER_ENTITY][_USER_NAME]
+            is_service_principal = (s[_USER_ENTITY][_USER_TYPE] == _SERVICE_PRINCIPAL)
+            if error is not None:
                 logger.warning("Refreshing for '%s' failed with an error '%s'. The existing accounts were not "
-                               "modified. You can run 'az login' later to explictly refresh them", user_name, ex)
+                               "modified. You can run 'az login' later to explictly refresh them", user_name, error)
                 result += deepcopy([r for r in to_refresh if r[_USER_ENTITY][_USER_NAME] == user_name])
                 continue
 
@@ -544,7 +607,7 @@ class Profile(object):
                 if not subscriptions:
                     continue
 
-            consolidated = self._normalize_properties(subscription_finder.user_id,
+            consolidated = self._normalize_properties(finder.user_id,
                                                       subscriptions,
                                                       is_service_principal)
             result += consolidated
@@ -705,16 +768,16 @@ class SubscriptionFinder(object):
         return self._auth_context_factory(self.cli_ctx, tenant, token_cache)
 
     def _find_using_common_tenant(self, access_token, resource):
-        import adal
         from msrest.authentication import BasicTokenAuthentication
 
         all_subscriptions = []
         token_credential = BasicTokenAuthentication({'access_token': access_token})
         client = self._arm_client_factory(token_credential)
-        tenants = client.tenants.list()
-        for t in tenants:
-            tenant_id = t.tenant_id
-            temp_context = self._create_auth_context(tenant_id)
+        tenants = list(client.tenants.list())
+
+        def _find_in_tenant(t):
+            import adal
+            temp_context = self._create_auth_context(t.tenant_id)
             try:
                 temp_credentials = temp_context.acquire_token(resource, self.user_id, _CLIENT_ID)
             except adal.AdalError as ex:
@@ -722,15 +785,23 @@ class SubscriptionFinder(object):
                 # tenant specific, like the account was disabled. For such errors, we will continue
                 # with other tenants.
                 logger.warning("Failed to authenticate '%s' due to error '%s'", t, ex)
-                continue
-            subscriptions = self._find_using_specific_tenant(
-                tenant_id,
-                temp_credentials[_ACCESS_TOKEN])
-            all_subscriptions.extend(subscriptions)
+                return None
+            return self._list_subscriptions(t.tenant_id, temp_credentials[_ACCESS_TOKEN])
+
+        # the tenants are independent, their tokens are acquired and their subscriptions listed concurrently
+        for t, subscriptions in zip(tenants, _map_concurrently(self.cli_ctx, _find_in_tenant, tenants)):
+            if subscriptions is not None:
+                self.tenants.append(t.tenant_id)
+                all_subscriptions.extend(subscriptions)
 
         return all_subscriptions
 
     def _find_using_specific_tenant(self, tenant, access_token):
+        all_subscriptions = self._list_subscriptions(tenant, access_token)
+        self.tenants.append(tenant)
+        return all_subscriptions
+
+    def _list_subscriptions(self, tenant, access_token):
         from msrest.authentication import BasicTokenAuthentication
 
         token_credential = BasicTokenAuthentication({'access_token': access_token})
@@ -740,7 +811,6 @@ class SubscriptionFinder(object):
         for s in subscriptions:
             setattr(s, 'tenant_id', tenant)
             all_subscriptions.append(s)
-        self.tenants.append(tenant)
         return all_subscriptions
 
 
@@ -750,41 +820,40 @@ class CredsCache(object):
     '''
 
     def __init__(self, cli_ctx, auth_ctx_factory=None, async_persist=True):
+        from azure.cli.core._token_cache import TokenFile, TokenRefreshes
         # AZURE_ACCESS_TOKEN_FILE is used by Cloud Console and not meant to be user configured
-        self._token_file = (os.environ.get('AZURE_ACCESS_TOKEN_FILE', None) or
-                            os.path.join(get_config_dir(), 'accessTokens.json'))
+        self._token_file = TokenFile(os.environ.get('AZURE_ACCESS_TOKEN_FILE', None) or
+                                     os.path.join(get_config_dir(), 'accessTokens.json'))
         self._service_principal_creds = []
+        # service principal id => its secrets, by tenant
+        self._service_principal_index = {}
         self._auth_ctx_factory = auth_ctx_factory
-        self._adal_token_cache_attr = None
-        self._should_flush_to_disk = False
+        self._token_refreshes = TokenRefreshes()
         self._async_persist = async_persist
         self._ctx = cli_ctx
         if async_persist:
             import atexit
-            atexit.register(self.flush_to_disk)
+            atexit.register(self._flush_at_exit)
 
     def persist_cached_creds(self):
-        self._should_flush_to_disk = True
+        self._token_file.changed = True
         if not self._async_persist:
             self.flush_to_disk()
         self.adal_token_cache.has_state_changed = False
 
-    def flush_to_disk(self):
-        if self._should_flush_to_disk:
-            with os.fdopen(os.open(self._token_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600),
-                           'w+') as cred_file:
-                items = self.adal_token_cache.read_items()
-                all_creds = [entry for _, entry in items]
-
-                # trim away useless fields (needed for cred sharing with xplat)
-                for i in all_creds:
-                    for key in TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE:
-                        i.pop(key, None)
+    def _flush_at_exit(self):
+        # a command can end while its tokens are refreshed in the background, the refreshes are given a moment to
+        # complete so that the tokens they got are saved
+        self._token_refreshes.wait_all()
+        self.flush_to_disk()
 
-                all_creds.extend(self._service_principal_creds)
-                cred_file.write(json.dumps(all_creds))
+    def flush_to_disk(self):
+        if self._token_file.changed:
+            self._service_principal_creds = self._token_file.save(self._service_principal_creds)
+            self._index_service_principal_creds()
 
     def retrieve_token_for_user(self, username, tenant, resource):
+        self._token_refreshes.wait((username, tenant, resource))
         context = self._auth_ctx_factory(self._ctx, tenant, cache=self.adal_token_cache)
         token_entry = context.acquire_token(resource, username, _CLIENT_ID)
         if not token_entry:
@@ -795,9 +864,28 @@ class CredsCache(object):
             self.persist_cached_creds()
         return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN], token_entry)
 
+    def start_token_refreshes(self, username, tenant, resources):
+        '''Mark the tokens of a user for the resources as being refreshed until end_token_refresh is called for
+        them. Returns the resources which were not being refreshed already.'''
+        keys = self._token_refreshes.start((username, tenant, r) for r in resources)
+        return [resource for _, _, resource in keys]
+
+    def end_token_refresh(self, username, tenant, resource):
+        self._token_refreshes.end((username, tenant, resource))
+
+    def refresh_token_for_user(self, username, tenant, resource, lead_time):
+        '''Refresh the cached token of a user for a resource ahead of ADAL, see IndexedTokenCache.refresh_token.'''
+        cache = self.adal_token_cache
+        context = self._auth_ctx_factory(self._ctx, tenant, cache=cache)
+        if not cache.refresh_token(context, username, _CLIENT_ID, resource, lead_time):
+            return False
+        if cache.has_state_changed:
+            self.persist_cached_creds()
+        return True
+
     def retrieve_token_for_service_principal(self, sp_id, resource):
         self.load_adal_token_cache()
-        matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID]]
+        matched = self._service_principal_index.get(sp_id)
         if not matched:
             raise CLIError("Please run 'az account set' to select active account.")
         cred = matched[0]
@@ -809,7 +897,7 @@ class CredsCache(object):
 
     def retrieve_secret_of_service_principal(self, sp_id):
         self.load_adal_token_cache()
-        matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID]]
+        matched = self._service_principal_index.get(sp_id)
         if not matched:
             raise CLIError("No matched service principal found")
         cred = matched[0]
@@ -820,19 +908,15 @@ class CredsCache(object):
         return self.load_adal_token_cache()
 
     def load_adal_token_cache(self):
-        if self._adal_token_cache_attr is None:
-            import adal
-            all_entries = _load_tokens_from_file(self._token_file)
-            self._load_service_principal_creds(all_entries)
-            real_token = [x for x in all_entries if x not in self._service_principal_creds]
-            self._adal_token_cache_attr = adal.TokenCache(json.dumps(real_token))
-        return self._adal_token_cache_attr
+        if self._token_file.cache is None:
+            self._service_principal_creds = self._token_file.load()
+            self._index_service_principal_creds()
+        return self._token_file.cache
 
     def save_service_principal_cred(self, sp_entry):
         self.load_adal_token_cache()
-        matched = [x for x in self._service_principal_creds
-                   if sp_entry[_SERVICE_PRINCIPAL_ID] == x[_SERVICE_PRINCIPAL_ID] and
-                   sp_entry[_SERVICE_PRINCIPAL_TENANT] == x[_SERVICE_PRINCIPAL_TENANT]]
+        matched = [x for x in self._service_principal_index.get(sp_entry[_SERVICE_PRINCIPAL_ID], [])
+                   if sp_entry[_SERVICE_PRINCIPAL_TENANT] == x[_SERVICE_PRINCIPAL_TENANT]]
         state_changed = False
         if matched:
             # pylint: disable=line-too-long
@@ -846,13 +930,13 @@ class CredsCache(object):
             state_changed = True
 
         if state_changed:
+            self._index_service_principal_creds()
             self.persist_cached_creds()
 
-    def _load_service_principal_creds(self, creds):
-        for c in creds:
-            if c.get(_SERVICE_PRINCIPAL_ID):
-                self._service_principal_creds.append(c)
-        return self._service_principal_creds
+    def _index_service_principal_creds(self):
+        self._service_principal_index = {}
+        for cred in self._service_principal_creds:
+            self._service_principal_index.setdefault(cred[_SERVICE_PRINCIPAL_ID], []).append(cred)
 
     def remove_cached_creds(self, user_or_sp):
         state_changed = False
@@ -863,19 +947,19 @@ class CredsCache(object):
             self.adal_token_cache.remove(tokens)
 
         # clear service principal creds
-        matched = [x for x in self._service_principal_creds
-                   if x[_SERVICE_PRINCIPAL_ID] == user_or_sp]
+        matched = self._service_principal_index.get(user_or_sp)
         if matched:
             state_changed = True
             self._service_principal_creds = [x for x in self._service_principal_creds
                                              if x not in matched]
+            self._index_service_principal_creds()
 
         if state_changed:
             self.persist_cached_creds()
 
     def remove_all_cached_creds(self):
         # we can clear file contents, but deleting it is simpler
-        _delete_file(self._token_file)
+        _delete_file(self._token_file.path)
 
 
 class ServicePrincipalAuth(object):
@@ -10,10 +10,29 @@ try:
     import collections.abc as collections
 except ImportError:
     import collections
+from collections import OrderedDict
 
 
 from codecs import open as codecs_open
 
+_SUBSCRIPTIONS = 'subscriptions'
+_SUBSCRIPTION_ID = 'id'
+_SUBSCRIPTION_NAME = 'name'
+_IS_DEFAULT_SUBSCRIPTION = 'isDefault'
+_ENVIRONMENT_NAME = 'environmentName'
+_USER_ENTITY = 'user'
+
+
+def _save_with_retry(session, retries):
+    for _ in range(retries - 1):
+        try:
+            session.save()
+            break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        session.save()
+
 
 class Session(collections.MutableMapping):
     '''A simple dict-like class that is backed by a JSON file.
@@ -47,14 +66,7 @@ class Session(collections.MutableMapping):
                 json.dump(self.data, f)
 
     def save_with_retry(self, retries=5):
-        for _ in range(retries - 1):
-            try:
-                self.save()
-                break
-            except OSError:
-                time.sleep(0.1)
-        else:
-            self.save()
+        _save_with_retry(self, retries)
 
     def get(self, key, default=None):
         return self.data.get(key, default)
@@ -77,11 +89,168 @@ class Session(collections.MutableMapping):
         return len(self.data)
 
 
+class SubscriptionIndex(object):
+    '''The subscriptions of `azureProfile.json` indexed by cloud, id, name and whether they are the default ones.'''
+
+    def __init__(self, subscriptions):
+        self._index = {}
+        for subscription in subscriptions:
+            keys = {('cloud', subscription.get(_ENVIRONMENT_NAME)),
+                    ('ref', subscription[_SUBSCRIPTION_ID].lower()),
+                    ('ref', subscription[_SUBSCRIPTION_NAME].lower())}
+            if subscription.get(_IS_DEFAULT_SUBSCRIPTION):
+                keys.add(('default', subscription.get(_ENVIRONMENT_NAME)))
+            for key in keys:
+                self._index.setdefault(key, []).append(subscription)
+
+    def in_cloud(self, cloud_name):
+        return self._index.get(('cloud', cloud_name), [])
+
+    def find(self, cloud_name, subscription=None):
+        '''The subscriptions of a cloud whose id or name is `subscription`, or the default ones.'''
+        if not subscription:
+            return self._index.get(('default', cloud_name), [])
+        return [s for s in self._index.get(('ref', subscription.lower()), []) if s.get(_ENVIRONMENT_NAME) == cloud_name]
+
+
+def get_subscription_key(subscription):
+    user = subscription.get(_USER_ENTITY) or {}
+    return (subscription.get(_SUBSCRIPTION_ID), subscription.get(_ENVIRONMENT_NAME), user.get('name'),
+            user.get('type'))
+
+
+class AccountSession(collections.MutableMapping):
+    '''The Session of `azureProfile.json`, which is read when it's first used.
+
+    Its subscriptions are indexed, see `subscription_index`. When it's saved, only the subscriptions and keys which
+    changed since it was read are merged into the file under a lock, so that concurrent commands keep the changes of
+    each other, and nothing is written when nothing changed. The subscriptions are replaced rather than modified in
+    place, for their changes to be found.
+    '''
+
+    def __init__(self, encoding=None):
+        super(AccountSession, self).__init__()
+        self.filename = None
+        self._encoding = encoding if encoding else 'utf-8-sig'
+        self._data = None
+        self._index = None
+        self._stamp = None
+        self._saved = {}
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._read()
+            self._index = None
+            self._set_saved()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._index = None
+
+    @property
+    def subscription_index(self):
+        if self._index is None:
+            self._index = SubscriptionIndex(self.data.get(_SUBSCRIPTIONS) or [])
+        return self._index
+
+    def load(self, filename):
+        self.filename = filename
+        self._data = None
+        self._index = None
+
+    def save_with_retry(self, retries=5):
+        _save_with_retry(self, retries)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data.setdefault(key, {})
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self._index = None
+        self.save_with_retry()
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self._index = None
+        self.save_with_retry()
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _read(self):
+        from azure.cli.core.util import get_file_stamp
+        self._stamp = get_file_stamp(self.filename) if self.filename else None
+        try:
+            with codecs_open(self.filename, 'r', encoding=self._encoding) as f:
+                return json.load(f)
+        except (OSError, IOError, TypeError):
+            return {}
+
+    def _set_saved(self):
+        self._saved = {key: value for key, value in self._data.items() if key != _SUBSCRIPTIONS}
+        self._saved[_SUBSCRIPTIONS] = {get_subscription_key(s): s for s in self._data.get(_SUBSCRIPTIONS) or []}
+
+    def save(self):
+        from azure.cli.core.util import file_lock, get_file_stamp, write_file_atomically
+        if not self.filename or self._data is None:
+            return
+
+        subscriptions = OrderedDict((get_subscription_key(s), s) for s in self._data.get(_SUBSCRIPTIONS) or [])
+        saved_subscriptions = self._saved.get(_SUBSCRIPTIONS, {})
+        changed = [s for key, s in subscriptions.items()
+                   if key not in saved_subscriptions or saved_subscriptions[key] is not s and
+                   saved_subscriptions[key] != s]
+        removed = [key for key in saved_subscriptions if key not in subscriptions]
+        changed_keys = [key for key in self._data
+                        if key != _SUBSCRIPTIONS and (key not in self._saved or self._saved[key] != self._data[key])]
+        removed_keys = [key for key in self._saved if key != _SUBSCRIPTIONS and key not in self._data]
+        if not (changed or removed or changed_keys or removed_keys):
+            return
+
+        with file_lock(self.filename):
+            if get_file_stamp(self.filename) != self._stamp:
+                self._merge_changes(self._read(), changed, removed, changed_keys, removed_keys)
+            write_file_atomically(self.filename, json.dumps(self._data), encoding=self._encoding)
+            self._stamp = get_file_stamp(self.filename)
+        self._set_saved()
+
+    def _merge_changes(self, data, changed, removed, changed_keys, removed_keys):
+        '''Apply the changes of this process to the data written by another one.'''
+        subscriptions = OrderedDict((get_subscription_key(s), s) for s in data.get(_SUBSCRIPTIONS) or [])
+        for key in removed:
+            subscriptions.pop(key, None)
+        changed_clouds = {s.get(_ENVIRONMENT_NAME) for s in changed if s.get(_IS_DEFAULT_SUBSCRIPTION)}
+        for key, s in list(subscriptions.items()):
+            # a cloud has one default subscription, the last one set
+            if s.get(_IS_DEFAULT_SUBSCRIPTION) and s.get(_ENVIRONMENT_NAME) in changed_clouds:
+                subscriptions[key] = dict(s, **{_IS_DEFAULT_SUBSCRIPTION: False})
+        for s in changed:
+            subscriptions[get_subscription_key(s)] = s
+        data[_SUBSCRIPTIONS] = list(subscriptions.values())
+        for key in changed_keys:
+            data[key] = self._data[key]
+        for key in removed_keys:
+            data.pop(key, None)
+        self.data = data
+
+
 # ACCOUNT contains subscriptions information
-ACCOUNT = Session()
+ACCOUNT = AccountSession()
 
 # CONFIG provides external configuration options
 CONFIG = Session()
 
 # SESSION provides read-write session variables
 SESSION = Session()
+
+# INDEX contains the command index mapping top-level commands to the modules that provide them
+INDEX = Session()
@@ -0,0 +1,256 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Storage of the AAD tokens and service principal secrets of `accessTokens.json`.
+
+The tokens are indexed by user, which is how ADAL looks them up, and the cache records which of them were added or
+removed. When the file is saved, these changes are merged into its current content under a lock, so that concurrent
+az processes don't overwrite the tokens of each other, and the file is replaced atomically.
+"""
+
+import collections
+import json
+import threading
+import time
+from copy import deepcopy
+
+import adal
+from adal.constants import TokenResponseFields
+from adal.token_cache import TokenCacheKey
+
+from azure.cli.core.util import file_lock, get_file_stamp, write_file_atomically
+
+# the seconds a command waits for a token which is being refreshed in the background
+TOKEN_REFRESH_WAIT_TIMEOUT = 60
+# the seconds the credentials wait for the refreshes in the background before they are saved at exit
+TOKEN_REFRESH_EXIT_TIMEOUT = 5
+
+
+def get_token_key(entry):
+    """ The key of a token in the cache: its authority, resource, client and user. """
+    return TokenCacheKey(entry.get(TokenResponseFields._AUTHORITY),  # pylint: disable=protected-access
+                         entry.get(TokenResponseFields.RESOURCE),
+                         entry.get(TokenResponseFields._CLIENT_ID),  # pylint: disable=protected-access
+                         entry.get(TokenResponseFields.USER_ID))
+
+
+def _user_key(user_id):
+    return user_id.lower() if user_id else user_id
+
+
+class IndexedTokenCache(adal.TokenCache):
+    """ An ADAL token cache with an index of the tokens by user, which records the tokens added and removed. """
+
+    def __init__(self, state=None):
+        self._user_index = {}
+        self.added = {}
+        self.removed = set()
+        super(IndexedTokenCache, self).__init__(state)
+
+    def deserialize(self, state):
+        with self._lock:
+            super(IndexedTokenCache, self).deserialize(state)
+            self._user_index.clear()
+            for key in self._cache:
+                self._user_index.setdefault(_user_key(key.user_id), set()).add(key)
+
+    def add(self, entries):
+        with self._lock:
+            for entry in entries:
+                key = get_token_key(entry)
+                self._user_index.setdefault(_user_key(key.user_id), set()).add(key)
+                self.added[key] = entry
+                self.removed.discard(key)
+            super(IndexedTokenCache, self).add(entries)
+
+    def remove(self, entries):
+        with self._lock:
+            for entry in entries:
+                key = get_token_key(entry)
+                if key in self._cache:
+                    self._user_index.get(_user_key(key.user_id), set()).discard(key)
+                    self.added.pop(key, None)
+                    self.removed.add(key)
+            super(IndexedTokenCache, self).remove(entries)
+
+    def replace(self, entries, new_entries):
+        """ Replace tokens by others at once, so that the cache is never read or saved without them. """
+        with self._lock:
+            self.remove(entries)
+            self.add(new_entries)
+
+    def refresh_token(self, context, user_id, client_id, resource, lead_time):
+        """ Refresh the token of a user for a resource when it expires in less than lead_time seconds, which is
+        earlier than ADAL does. Returns whether it was refreshed, a resource without a token is left to ADAL. """
+        from datetime import datetime, timedelta
+        from dateutil import parser
+
+        entry = next((e for e in self.find({TokenResponseFields.USER_ID: user_id,
+                                            TokenResponseFields._CLIENT_ID: client_id})  # pylint: disable=protected-access
+                      if e.get(TokenResponseFields.RESOURCE) == resource and
+                      e.get(TokenResponseFields._AUTHORITY) == context.authority.url), None)  # pylint: disable=protected-access
+        if entry is None or not entry.get(TokenResponseFields.REFRESH_TOKEN):
+            return False
+        expires_on = parser.parse(entry[TokenResponseFields.EXPIRES_ON])
+        if expires_on - datetime.now(expires_on.tzinfo) > timedelta(seconds=lead_time):
+            return False
+        token_response = context.acquire_token_with_refresh_token(entry[TokenResponseFields.REFRESH_TOKEN],
+                                                                  client_id, resource)
+        self._replace_refreshed_token(entry, token_response)
+        return True
+
+    def _replace_refreshed_token(self, entry, token_response):
+        # like ADAL does when it refreshes an expired token
+        new_entry = deepcopy(entry)
+        new_entry.update(token_response)
+        new_entry[TokenResponseFields.RESOURCE] = entry[TokenResponseFields.RESOURCE]
+        replaced, new_entries = [entry], [new_entry]
+
+        # the other resources of the user get their tokens with the new refresh token
+        refresh_token = new_entry.get(TokenResponseFields.REFRESH_TOKEN)
+        if (new_entry.get(TokenResponseFields.IS_MRRT) and refresh_token and
+                refresh_token != entry.get(TokenResponseFields.REFRESH_TOKEN)):
+            client_id = entry.get(TokenResponseFields._CLIENT_ID)  # pylint: disable=protected-access
+            for other in self.find({TokenResponseFields.IS_MRRT: True,
+                                    TokenResponseFields.USER_ID: entry[TokenResponseFields.USER_ID],
+                                    TokenResponseFields._CLIENT_ID: client_id}):  # pylint: disable=protected-access
+                if (get_token_key(other) != get_token_key(entry) and
+                        other.get(TokenResponseFields.REFRESH_TOKEN) != refresh_token):
+                    replaced.append(other)
+                    new_entries.append(dict(other, **{TokenResponseFields.REFRESH_TOKEN: refresh_token}))
+        # the cache is saved at exit while this runs in the background, it must not miss any of these tokens then
+        self.replace(replaced, new_entries)
+
+    def read_entries(self):
+        """ A copy of the cached tokens, which other threads can change while it's used. """
+        with self._lock:
+            return list(self._cache.values())
+
+    def clear_changes(self):
+        with self._lock:
+            self.added.clear()
+            self.removed.clear()
+
+    def _query_cache(self, is_mrrt, user_id, client_id):
+        if user_id is None:
+            return super(IndexedTokenCache, self)._query_cache(is_mrrt, user_id, client_id)
+        matches = []
+        for key in self._user_index.get(_user_key(user_id), ()):
+            entry = self._cache[key]
+            entry_client_id = entry.get(TokenResponseFields._CLIENT_ID) or ''  # pylint: disable=protected-access
+            if ((is_mrrt is None or is_mrrt == entry.get(TokenResponseFields.IS_MRRT)) and
+                    (client_id is None or client_id.lower() == entry_client_id.lower())):
+                matches.append(entry)
+        return matches
+
+
+def _service_principal_key(entry):
+    from azure.cli.core._profile import _SERVICE_PRINCIPAL_ID, _SERVICE_PRINCIPAL_TENANT
+    return entry.get(_SERVICE_PRINCIPAL_ID), entry.get(_SERVICE_PRINCIPAL_TENANT)
+
+
+def _index_service_principal_creds(creds):
+    return collections.OrderedDict((_service_principal_key(cred), cred) for cred in creds)
+
+
+class TokenFile(object):
+    """ `accessTokens.json`, read into an IndexedTokenCache and a list of service principal secrets. """
+
+    def __init__(self, path):
+        self.path = path
+        self.cache = None
+        # whether the tokens or the secrets changed since the file was written
+        self.changed = False
+        self._stamp = None
+        # (service principal id, tenant) => the secret as it was read or last written
+        self._saved_service_principal_creds = {}
+
+    def load(self):
+        """ Read the tokens into `cache`. Returns the service principal secrets. """
+        from azure.cli.core._profile import _load_tokens_from_file, _SERVICE_PRINCIPAL_ID
+        self._stamp = get_file_stamp(self.path)
+        all_entries = _load_tokens_from_file(self.path)
+        sp_creds = [x for x in all_entries if x.get(_SERVICE_PRINCIPAL_ID)]
+        self.cache = IndexedTokenCache(json.dumps([x for x in all_entries if not x.get(_SERVICE_PRINCIPAL_ID)]))
+        self._saved_service_principal_creds = _index_service_principal_creds(sp_creds)
+        return sp_creds
+
+    def save(self, sp_creds):
+        """ Write the tokens of the cache and the service principal secrets. Returns the secrets written, which
+        include those other az processes saved since the file was read. """
+        from azure.cli.core._profile import _load_tokens_from_file, TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE
+        with file_lock(self.path):
+            if get_file_stamp(self.path) == self._stamp:
+                tokens = self.cache.read_entries()
+            else:
+                # another az process wrote the file since it was loaded, only the changes of this one are applied
+                tokens, sp_creds = self._merge_changes(_load_tokens_from_file(self.path), sp_creds)
+                self.cache.deserialize(json.dumps(tokens))
+
+            # trim away useless fields (needed for cred sharing with xplat)
+            all_creds = [{k: v for k, v in entry.items() if k not in TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE}
+                         for entry in tokens]
+            all_creds.extend(sp_creds)
+            write_file_atomically(self.path, json.dumps(all_creds))
+            self._stamp = get_file_stamp(self.path)
+
+        self.cache.clear_changes()
+        self._saved_service_principal_creds = _index_service_principal_creds(sp_creds)
+        self.changed = False
+        return sp_creds
+
+    def _merge_changes(self, all_entries, sp_creds):
+        from azure.cli.core._profile import _SERVICE_PRINCIPAL_ID
+        tokens = collections.OrderedDict()
+        saved_sp_creds = collections.OrderedDict()
+        for entry in all_entries:
+            if entry.get(_SERVICE_PRINCIPAL_ID):
+                saved_sp_creds[_service_principal_key(entry)] = entry
+            else:
+                tokens[get_token_key(entry)] = entry
+
+        for key in self.cache.removed:
+            tokens.pop(key, None)
+        tokens.update(self.cache.added)
+        sp_creds = _index_service_principal_creds(sp_creds)
+        for key in list(sp_creds) + [k for k in self._saved_service_principal_creds if k not in sp_creds]:
+            if sp_creds.get(key) != self._saved_service_principal_creds.get(key):
+                saved_sp_creds.pop(key, None)
+                if key in sp_creds:
+                    saved_sp_creds[key] = sp_creds[key]
+        return list(tokens.values()), list(saved_sp_creds.values())
+
+
+class TokenRefreshes(object):
+    """ The tokens being refreshed in the background, by user, tenant and resource. """
+
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def start(self, keys):
+        """ Mark the tokens as being refreshed. Returns the keys of those which were not being refreshed already. """
+        with self._lock:
+            keys = [key for key in keys if key not in self._events]
+            for key in keys:
+                self._events[key] = threading.Event()
+        return keys
+
+    def end(self, key):
+        with self._lock:
+            self._events.pop(key).set()
+
+    def wait(self, key, timeout=TOKEN_REFRESH_WAIT_TIMEOUT):
+        with self._lock:
+            event = self._events.get(key)
+        if event:
+            event.wait(timeout)
+
+    def wait_all(self, timeout=TOKEN_REFRESH_EXIT_TIMEOUT):
+        with self._lock:
+            events = list(self._events.values())
+        deadline = time.time() + timeout
+        for event in events:
+            event.wait(max(deadline - time.time(), 0))
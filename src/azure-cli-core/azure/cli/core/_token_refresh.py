@@ -0,0 +1,97 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Proactive refresh of the access tokens of the logged in user.
+
+ADAL refreshes an access token when a command requests it and it expires within 5 minutes, so the command waits for
+the round trip to AAD. When `core.token_refresh_lead_minutes` is set, the tokens of the current subscription for ARM,
+AAD Graph and Key Vault which expire within that many minutes are refreshed in a background thread while the command
+is parsed and loaded, and by the az daemon while it is idle. A command which requests a token being refreshed waits
+for the refresh to complete. The tokens of resources the user never requested are not acquired ahead of time.
+"""
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+# commands which change the accounts, or which are not worth refreshing tokens for
+_SKIPPED_COMMANDS = ('login', 'logout')
+_HELP_ARGS = ('-h', '--help')
+
+
+def get_refresh_lead_time(cli_ctx):
+    """ The seconds before their expiry at which the tokens are refreshed, or 0 if they are not refreshed early. """
+    try:
+        return max(cli_ctx.config.getint('core', 'token_refresh_lead_minutes', fallback=0), 0) * 60
+    except ValueError:
+        logger.debug('Invalid core.token_refresh_lead_minutes, the tokens are not refreshed early.')
+        return 0
+
+
+def get_refresh_resources(cli_ctx):
+    """ The resources of the active cloud whose tokens are refreshed. """
+    endpoints = cli_ctx.cloud.endpoints
+    resources = [endpoints.active_directory_resource_id, endpoints.active_directory_graph_resource_id]
+    try:
+        resources.append('https://' + cli_ctx.cloud.suffixes.keyvault_dns.lstrip('.'))
+    except Exception:  # pylint: disable=broad-except
+        # the cloud has no Key Vault
+        pass
+    return [r for r in resources if r]
+
+
+def refresh_tokens(cli_ctx, profile=None):
+    """ Refresh the tokens of the current subscription which expire within the lead time. """
+    return _start_refresh(cli_ctx, profile)()
+
+
+def _start_refresh(cli_ctx, profile):
+    """ Mark the tokens as being refreshed and return the function refreshing them. Errors are logged only, the
+    command requesting a token reports them. """
+    from azure.cli.core._profile import Profile
+    lead_time = get_refresh_lead_time(cli_ctx)
+    if not lead_time:
+        return lambda: []
+    try:
+        profile = profile or Profile(cli_ctx=cli_ctx)
+        refresh = profile.start_token_refresh(get_refresh_resources(cli_ctx), lead_time)
+    except Exception as ex:  # pylint: disable=broad-except
+        logger.debug('Unable to refresh the access tokens: %s', ex)
+        return lambda: []
+
+    def _refresh():
+        try:
+            refreshed = refresh()
+            if refreshed:
+                logger.debug('Refreshed the access tokens of %s.', ', '.join(refreshed))
+            return refreshed
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug('Unable to refresh the access tokens: %s', ex)
+            return []
+    return _refresh
+
+
+def register_token_refresh(cli_ctx):
+    """ Start refreshing the tokens in the background when a command is invoked, if it's enabled. """
+    import knack.events as events
+
+    if not get_refresh_lead_time(cli_ctx):
+        return
+
+    def _start_background_refresh(_, **kwargs):
+        import threading
+        from azure.cli.core._profile import Profile
+
+        args = kwargs.get('args') or []
+        if not args or args[0] in _SKIPPED_COMMANDS or any(a in _HELP_ARGS for a in args):
+            return
+        # the command and the refresh share the credentials cache, which is created here. The tokens are marked as
+        # being refreshed before the thread starts, so that a command requesting one early waits for its refresh.
+        profile = Profile(cli_ctx=cli_ctx)
+        refresh = threading.Thread(target=_start_refresh(cli_ctx, profile))
+        refresh.daemon = True
+        refresh.start()
+
+    cli_ctx.register_event(events.EVENT_INVOKER_PRE_CMD_TBL_CREATE, _start_background_refresh)
@@ -5,12 +5,15 @@
 
 from __future__ import print_function
 
+import collections
 import datetime
+import itertools
 import json
 import logging as logs
 import os
 import sys
 import time
+import types
 from importlib import import_module
 import six
 
@@ -23,7 +26,7 @@ from knack.util import CLIError
 # pylint: disable=unused-import
 from azure.cli.core.commands.constants import (
     BLACKLISTED_MODS, DEFAULT_QUERY_TIME_RANGE, CLI_COMMON_KWARGS, CLI_COMMAND_KWARGS, CLI_PARAM_KWARGS,
-    CLI_POSITIONAL_PARAM_KWARGS, CONFIRM_PARAM_NAME)
+    CLI_POSITIONAL_PARAM_KWARGS, CONFIRM_PARAM_NAME, STREAMED_OUTPUT_FORMATS, STREAM_PAGE_SIZE)
 from azure.cli.core.commands.parameters import (
     AzArgumentContext, patch_arg_make_required, patch_arg_make_optional)
 from azure.cli.core.extension import get_extension
@@ -197,12 +200,14 @@ class AzCliCommandInvoker(CommandInvoker):
                                   EVENT_INVOKER_FILTER_RESULT)
         from knack.util import CommandResultItem, todict
         from azure.cli.core.commands.events import EVENT_INVOKER_PRE_CMD_TBL_TRUNCATE
+        from azure.cli.core.profiler import profile_phase
 
         # TODO: Can't simply be invoked as an event because args are transformed
         args = _pre_command_table_create(self.cli_ctx, args)
 
         self.cli_ctx.raise_event(EVENT_INVOKER_PRE_CMD_TBL_CREATE, args=args)
-        self.commands_loader.load_command_table(args)
+        with profile_phase('load_command_table'):
+            self.commands_loader.load_command_table(args)
         self.cli_ctx.raise_event(EVENT_INVOKER_PRE_CMD_TBL_TRUNCATE,
                                  load_cmd_tbl_func=self.commands_loader.load_command_table, args=args)
         command = self._rudimentary_get_command(args)
@@ -244,10 +249,12 @@ class AzCliCommandInvoker(CommandInvoker):
 
         self.commands_loader.command_table = self.commands_loader.command_table  # update with the truncated table
         self.commands_loader.command_name = command
-        self.commands_loader.load_arguments(command)
+        with profile_phase('load_arguments'):
+            self.commands_loader.load_arguments(command)
         self.cli_ctx.raise_event(EVENT_INVOKER_POST_CMD_TBL_CREATE, cmd_tbl=self.commands_loader.command_table)
         self.parser.cli_ctx = self.cli_ctx
-        self.parser.load_command_table(self.commands_loader.command_table)
+        with profile_phase('parser_load_command_table'):
+            self.parser.load_command_table(self.commands_loader.command_table)
 
         self.cli_ctx.raise_event(EVENT_INVOKER_CMD_TBL_LOADED, cmd_tbl=self.commands_loader.command_table,
                                  parser=self.parser)
@@ -268,7 +275,12 @@ class AzCliCommandInvoker(CommandInvoker):
         self.parser.enable_autocomplete()
 
         self.cli_ctx.raise_event(EVENT_INVOKER_PRE_PARSE_ARGS, args=args)
-        parsed_args = self.parser.parse_args(args)
+        with profile_phase('parse_args'):
+            parsed_args = self.parser.parse_args(args)
+        # a streamed result is filtered page by page rather than by the handler of the query on the whole result
+        query = getattr(parsed_args, '_jmespath_query', None)
+        event_handlers = self.cli_ctx._event_handlers  # pylint: disable=protected-access
+        filter_handlers = list(event_handlers[EVENT_INVOKER_FILTER_RESULT])
         self.cli_ctx.raise_event(EVENT_INVOKER_POST_PARSE_ARGS, command=parsed_args.command, args=parsed_args)
 
         # TODO: This fundamentally alters the way Knack.invocation works here. Cannot be customized
@@ -281,7 +293,8 @@ class AzCliCommandInvoker(CommandInvoker):
 
             self.cli_ctx.data['command'] = expanded_arg.command
 
-            self._validation(expanded_arg)
+            with profile_phase('validation'):
+                self._validation(expanded_arg)
 
             params = self._filter_params(expanded_arg)
 
@@ -303,25 +316,32 @@ class AzCliCommandInvoker(CommandInvoker):
                 self.data['command_extension_name'] = command_source.extension_name
 
             try:
-                result = cmd(params)
-                if cmd.supports_no_wait and getattr(expanded_arg, 'no_wait', False):
-                    result = None
-                elif cmd.no_wait_param and getattr(expanded_arg, cmd.no_wait_param, False):
-                    result = None
-
-                transform_op = cmd.command_kwargs.get('transform', None)
-                if transform_op:
-                    result = transform_op(result)
-
-                if _is_poller(result):
-                    result = LongRunningOperation(self.cli_ctx, 'Starting {}'.format(cmd.name))(result)
-                elif _is_paged(result):
-                    result = list(result)
-
-                result = todict(result)
-                event_data = {'result': result}
-                self.cli_ctx.raise_event(EVENT_INVOKER_TRANSFORM_RESULT, event_data=event_data)
-                result = event_data['result']
+                with profile_phase('handler'):
+                    result = cmd(params)
+                    if cmd.supports_no_wait and getattr(expanded_arg, 'no_wait', False):
+                        result = None
+                    elif cmd.no_wait_param and getattr(expanded_arg, cmd.no_wait_param, False):
+                        result = None
+
+                    transform_op = cmd.command_kwargs.get('transform', None)
+                    if self.data['output'] in STREAMED_OUTPUT_FORMATS and _is_stream(result):
+                        # the pages of the result are fetched, transformed and written one at a time
+                        results.append(self._stream_result(cmd, result, transform_op))
+                        continue
+                    if transform_op:
+                        result = transform_op(result)
+
+                    # pollers, pages and generators are lazy, the service calls happen here
+                    if _is_poller(result):
+                        result = LongRunningOperation(self.cli_ctx, 'Starting {}'.format(cmd.name))(result)
+                    elif _is_paged(result) or isinstance(result, types.GeneratorType):
+                        result = list(result)
+
+                with profile_phase('todict'):
+                    result = todict(result)
+                    event_data = {'result': result}
+                    self.cli_ctx.raise_event(EVENT_INVOKER_TRANSFORM_RESULT, event_data=event_data)
+                    result = event_data['result']
                 results.append(result)
 
             except Exception as ex:  # pylint: disable=broad-except
@@ -331,6 +351,19 @@ class AzCliCommandInvoker(CommandInvoker):
                 else:
                     six.reraise(*sys.exc_info())
 
+        if len(results) == 1 and isinstance(results[0], types.GeneratorType):
+            # the filter event isn't raised for a streamed result, so the handler registered for the query of this
+            # invocation, which only unregisters itself when it runs, is removed here
+            for handler in list(event_handlers[EVENT_INVOKER_FILTER_RESULT]):
+                if handler not in filter_handlers:
+                    self.cli_ctx.unregister_event(EVENT_INVOKER_FILTER_RESULT, handler)
+            return CommandResultItem(
+                _filter_pages(results[0], query),
+                table_transformer=self.commands_loader.command_table[parsed_args.command].table_transformer,
+                is_query_active=self.data['query_active'])
+        results = [list(itertools.chain.from_iterable(r)) if isinstance(r, types.GeneratorType) else r
+                   for r in results]
+
         if results and len(results) == 1:
             results = results[0]
 
@@ -342,6 +375,31 @@ class AzCliCommandInvoker(CommandInvoker):
             table_transformer=self.commands_loader.command_table[parsed_args.command].table_transformer,
             is_query_active=self.data['query_active'])
 
+    def _stream_result(self, cmd, result, transform_op=None):
+        """ Generate the pages of a result produced lazily, e.g. a paged listing, each of them transformed like a
+        whole result. A command whose items must be written before the next one is produced registers a
+        `stream_page_size` of 1. """
+        from knack.events import EVENT_INVOKER_TRANSFORM_RESULT
+        from knack.util import todict
+
+        items = iter(result)
+        page_size = cmd.command_kwargs.get('stream_page_size') or STREAM_PAGE_SIZE
+        try:
+            while True:
+                page = list(itertools.islice(items, page_size))
+                if not page:
+                    return
+                if transform_op:
+                    page = transform_op(page)
+                event_data = {'result': todict(page)}
+                self.cli_ctx.raise_event(EVENT_INVOKER_TRANSFORM_RESULT, event_data=event_data)
+                yield event_data['result']
+        except Exception as ex:  # pylint: disable=broad-except
+            if cmd.exception_handler:
+                cmd.exception_handler(ex)
+                return
+            raise
+
     def _build_kwargs(self, func, ns):  # pylint: disable=no-self-use
         from azure.cli.core.util import get_arg_list
         arg_list = get_arg_list(func)
@@ -619,7 +677,6 @@ def _load_azure_exception_class():
 
 def _is_paged(obj):
     # Since loading msrest is expensive, we avoid it until we have to
-    import collections
     if isinstance(obj, collections.Iterable) \
             and not isinstance(obj, list) \
             and not isinstance(obj, dict):
@@ -628,6 +685,20 @@ def _is_paged(obj):
     return False
 
 
+def _is_stream(obj):
+    """ Whether a result is produced lazily, by a generator or a paged listing, so that it can be streamed. """
+    return isinstance(obj, types.GeneratorType) or obj.__class__.__name__ == 'ListGenerator' or _is_paged(obj)
+
+
+def _filter_pages(pages, query=None):
+    for page in pages:
+        if query:
+            from jmespath import Options
+            page = query.search(page, Options(collections.OrderedDict))
+        if page or page == 0 or page is False:
+            yield page
+
+
 def _is_poller(obj):
     # Since loading msrest is expensive, we avoid it until we have to
     if obj.__class__.__name__ in ['AzureOperationPoller', 'LROPoller']:
@@ -4,6 +4,8 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import threading
+import weakref
 
 from knack.log import get_logger
 from knack.util import CLIError
@@ -18,6 +20,10 @@ logger = get_logger(__name__)
 UA_AGENT = "AZURECLI/{}".format(core_version)
 ENV_ADDITIONAL_USER_AGENT = 'AZURE_HTTP_USER_AGENT'
 
+# management clients and the HTTP adapters they share, per CLI context
+_mgmt_client_caches = weakref.WeakKeyDictionary()
+_mgmt_client_cache_lock = threading.Lock()
+
 
 def resolve_client_arg_name(operation, kwargs):
     if not isinstance(operation, str):
@@ -85,6 +91,10 @@ def configure_common_settings(cli_ctx, client):
     except KeyError:
         pass
 
+    _configure_command_headers(cli_ctx, client)
+
+
+def _configure_command_headers(cli_ctx, client):
     for header, value in cli_ctx.data['headers'].items():
         # We are working with the autorest team to expose the add_header functionality of the generated client to avoid
         # having to access private members
@@ -109,6 +119,18 @@ def _get_mgmt_service_client(cli_ctx,
     logger.debug('Getting management service client client_type=%s', client_type.__name__)
     resource = resource or cli_ctx.cloud.endpoints.active_directory_resource_id
     profile = Profile(cli_ctx=cli_ctx)
+
+    cache, cache_key = _get_mgmt_client_cache(cli_ctx, profile, client_type, subscription_bound, subscription_id,
+                                              api_version, base_url_bound, resource, sdk_profile, kwargs)
+    if cache_key:
+        with _mgmt_client_cache_lock:
+            cached = cache.clients.get(cache_key)
+        if cached:
+            client, subscription_id = cached
+            # the client may have been created by a previous command run by this process
+            _configure_command_headers(cli_ctx, client)
+            return client, subscription_id
+
     cred, subscription_id, _ = profile.get_login_credentials(subscription_id=subscription_id, resource=resource)
 
     client_kwargs = {}
@@ -128,9 +150,82 @@ def _get_mgmt_service_client(cli_ctx,
 
     configure_common_settings(cli_ctx, client)
 
+    if cache_key:
+        client.config.session_configuration_callback = cache.get_session_configuration_callback(
+            client.config.session_configuration_callback)
+        with _mgmt_client_cache_lock:
+            cache.clients[cache_key] = (client, subscription_id)
+
     return client, subscription_id
 
 
+def _create_keep_alive_adapter(max_retries):
+    """ Create a requests HTTP adapter whose connection pool survives the sessions it is mounted on.
+
+    msrest creates a session with new adapters for every request and closes it afterwards, so every request opens a
+    new connection. Mounting this adapter instead keeps the connections to the service alive between requests.
+    """
+    from requests.adapters import HTTPAdapter
+
+    class KeepAliveHTTPAdapter(HTTPAdapter):
+
+        def close(self):
+            # closing the session must not close the shared connection pool
+            pass
+
+    return KeepAliveHTTPAdapter(max_retries=max_retries)
+
+
+# a holder of the clients and of the adapters they share, which only exposes the session callback
+class _MgmtClientCache(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.clients = {}
+        self._adapters = {}
+
+    def get_session_configuration_callback(self, base_callback):
+
+        def _mount_keep_alive_adapter(session, global_config, local_config, **kwargs):
+            if 'retries' not in local_config:
+                retry = global_config.retry_policy()
+                adapter_key = (retry.total, retry.connect, retry.read, retry.status, retry.backoff_factor)
+                with _mgmt_client_cache_lock:
+                    adapter = self._adapters.get(adapter_key)
+                    if not adapter:
+                        adapter = self._adapters[adapter_key] = _create_keep_alive_adapter(retry)
+                for protocol in ['http://', 'https://']:
+                    session.mount(protocol, adapter)
+            return base_callback(session, global_config, local_config, **kwargs)
+
+        return _mount_keep_alive_adapter
+
+
+def _get_mgmt_client_cache(cli_ctx, profile, client_type, subscription_bound, subscription_id, api_version,
+                           base_url_bound, resource, sdk_profile, kwargs):
+    """ Returns the client cache of the CLI context and the key of the requested client, which is None when the
+    client can't be cached.
+    """
+    if not cli_ctx.config.getboolean('core', 'cache_mgmt_clients', fallback=True):
+        return None, None
+    try:
+        # the account determines the credentials and, for bound clients, the subscription
+        account = profile.get_subscription(subscription_id)
+        user = account.get('user', {})
+        cache_key = (client_type, subscription_bound, account.get('id'), account.get('tenantId'),
+                     user.get('name'), user.get('type'), api_version, repr(sdk_profile),
+                     cli_ctx.cloud.endpoints.resource_manager if base_url_bound else None, resource,
+                     cli_ctx.data.get('command_extension_name'), tuple(sorted(kwargs.items())))
+        hash(cache_key)
+    except Exception:  # pylint: disable=broad-except
+        # e.g. unhashable client arguments, or no account; get_login_credentials reports account errors
+        return None, None
+    with _mgmt_client_cache_lock:
+        cache = _mgmt_client_caches.get(cli_ctx)
+        if cache is None:
+            cache = _mgmt_client_caches[cli_ctx] = _MgmtClientCache()
+    return cache, cache_key
+
+
 def get_data_service_client(cli_ctx, service_type, account_name, account_key, connection_string=None,
                             sas_token=None, socket_timeout=None, endpoint_suffix=None):
     logger.debug('Getting data service client service_type=%s', service_type.__name__)
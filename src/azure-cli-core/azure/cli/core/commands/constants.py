@@ -11,7 +11,7 @@ CLI_COMMON_KWARGS = ['min_api', 'max_api', 'resource_type', 'operation_group',
 
 CLI_COMMAND_KWARGS = ['transform', 'table_transformer', 'confirmation', 'exception_handler',
                       'client_factory', 'operations_tmpl', 'no_wait_param', 'supports_no_wait', 'validator',
-                      'client_arg_name', 'doc_string_source', 'deprecate_info'] + CLI_COMMON_KWARGS
+                      'client_arg_name', 'doc_string_source', 'deprecate_info', 'stream_page_size'] + CLI_COMMON_KWARGS
 CLI_PARAM_KWARGS = \
     ['id_part', 'completer', 'validator', 'options_list', 'configured_default', 'arg_group', 'arg_type'] \
     + CLI_COMMON_KWARGS + ARGPARSE_SUPPORTED_KWARGS
@@ -27,3 +27,7 @@ CONFIRM_PARAM_NAME = 'yes'
 DEFAULT_QUERY_TIME_RANGE = 3600000
 
 BLACKLISTED_MODS = ['context', 'shell', 'documentdb', 'component']
+
+# output formats which write a lazily produced result as it's fetched, and the number of items of its pages
+STREAMED_OUTPUT_FORMATS = ['jsonl']
+STREAM_PAGE_SIZE = 100
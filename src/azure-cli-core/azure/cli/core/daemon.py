@@ -0,0 +1,471 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+A resident `az` server which keeps the CLI and its command modules imported, and the thin client that forwards
+invocations to it.
+
+The server listens on a Unix domain socket in the configuration directory. The client sends its arguments, environment
+and working directory together with its stdin, stdout and stderr file descriptors, so the output of a command is
+written straight to the caller's terminal or pipes. The server forks a child from its warm state for every request,
+which gives each invocation its own environment, working directory and global state, and the child replies with the
+exit code of the command.
+
+Start the server with `python -m azure.cli.core.daemon start` and set `core.use_daemon` (or the
+AZURE_CORE_USE_DAEMON environment variable) to `true` to route `az` invocations through it.
+
+When `core.token_refresh_lead_minutes` is set, the server also refreshes the access tokens which are about to expire
+while it's idle, between requests, so that the forked commands find them valid.
+
+Only the standard library may be imported at module level as the client runs before the CLI is loaded.
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import socket
+import struct
+import sys
+import time
+
+DAEMON_SOCKET_NAME = 'daemon.sock'
+DEFAULT_IDLE_TIMEOUT = 3600
+# the seconds between two checks of the access tokens while the server is idle
+TOKEN_REFRESH_INTERVAL = 60
+
+_HEADER_FORMAT = '!I'
+_STDIO_FDS = (0, 1, 2)
+_TRUE_VALUES = ('1', 'yes', 'true', 'on')
+
+
+def _get_config_dir():
+    # the same as azure.cli.core._environment.get_config_dir, which can't be imported without loading the CLI
+    return os.getenv('AZURE_CONFIG_DIR', None) or os.path.expanduser(os.path.join('~', '.azure'))
+
+
+def get_daemon_socket_path():
+    return os.path.join(_get_config_dir(), DAEMON_SOCKET_NAME)
+
+
+def is_daemon_supported():
+    return hasattr(socket, 'AF_UNIX') and hasattr(socket.socket, 'sendmsg') and hasattr(os, 'fork')
+
+
+def _is_daemon_enabled():
+    value = os.environ.get('AZURE_CORE_USE_DAEMON', None)
+    if value is None:
+        try:
+            import configparser
+        except ImportError:
+            import ConfigParser as configparser  # pylint: disable=import-error
+        config = configparser.RawConfigParser()
+        try:
+            config.read(os.path.join(_get_config_dir(), 'config'))
+            value = config.get('core', 'use_daemon')
+        except (configparser.Error, UnicodeDecodeError):
+            return False
+    return value.lower() in _TRUE_VALUES
+
+
+def _send_message(sock, message, fds=None):
+    payload = json.dumps(message).encode('utf-8')
+    header = struct.pack(_HEADER_FORMAT, len(payload))
+    if fds:
+        import array
+        sock.sendmsg([header], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+    else:
+        sock.sendall(header)
+    sock.sendall(payload)
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError('Connection closed before the message was received.')
+        data += chunk
+    return data
+
+
+def _recv_message(sock, max_fds=0):
+    import array
+    fds = array.array('i')
+    header_size = struct.calcsize(_HEADER_FORMAT)
+    if max_fds:
+        header, ancdata, _, _ = sock.recvmsg(header_size, socket.CMSG_SPACE(max_fds * fds.itemsize))
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+        if not header:
+            raise EOFError('Connection closed before the message was received.')
+        header += _recv_exactly(sock, header_size - len(header))
+    else:
+        header = _recv_exactly(sock, header_size)
+    size, = struct.unpack(_HEADER_FORMAT, header)
+    return json.loads(_recv_exactly(sock, size).decode('utf-8')), list(fds)
+
+
+def _connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (OSError, IOError):
+        sock.close()
+        return None
+    return sock
+
+
+def invoke_with_daemon(args):
+    """ Forward an invocation to the running daemon.
+
+    :param args: The command line arguments
+    :type args: list
+    :return: The exit code of the command, or None if the command must run in this process.
+    :rtype: int
+    """
+    # tab completion talks to the shell through extra file descriptors, so it always runs in process.
+    if '_ARGCOMPLETE' in os.environ or not is_daemon_supported() or not _is_daemon_enabled():
+        return None
+    sock = _connect(get_daemon_socket_path())
+    if not sock:
+        return None
+    try:
+        try:
+            _send_message(sock, {'args': list(args), 'env': dict(os.environ), 'cwd': os.getcwd()}, _STDIO_FDS)
+        except (OSError, IOError):
+            # e.g. one of the standard streams is closed, which can't be forwarded
+            return None
+        while True:
+            try:
+                reply, _ = _recv_message(sock)
+                return reply['exit_code']
+            except KeyboardInterrupt:
+                # Let the command handle the interrupt and wait for its exit code.
+                sock.sendall(b'\x03')
+            except (EOFError, OSError, IOError, ValueError, KeyError):
+                print('The az daemon stopped before the command completed.', file=sys.stderr)
+                return 1
+    finally:
+        sock.close()
+
+
+class AzDaemon(object):
+    """ Serves `az` invocations forwarded by `invoke_with_daemon` from a warm process. """
+
+    def __init__(self, socket_path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.socket_path = socket_path or get_daemon_socket_path()
+        self.idle_timeout = idle_timeout
+        self._listener = None
+
+    @staticmethod
+    def warm_up():
+        """ Import the command modules, their handlers and the SDKs of the active cloud profile """
+        from importlib import import_module
+        from knack.log import get_logger
+        from azure.cli.core import get_default_cli, MainCommandsLoader
+        from azure.cli.core.profiles import AZURE_API_PROFILES
+        from azure.cli.core.profiles._shared import get_versioned_sdk_path
+
+        logger = get_logger(__name__)
+        cli_ctx = get_default_cli()
+        loader = MainCommandsLoader(cli_ctx)
+        loader.load_command_table(None)
+
+        modules = set()
+        for command_loader in loader.loaders:
+            package = command_loader.__module__
+            modules.update('{}.{}'.format(package, name) for name in ['_params', '_validators', 'custom'])
+        profile = cli_ctx.cloud.profile
+        for resource_type in AZURE_API_PROFILES[profile]:
+            try:
+                modules.add(get_versioned_sdk_path(profile, resource_type))
+            except Exception:  # pylint: disable=broad-except
+                pass
+        for module in sorted(modules):
+            try:
+                import_module(module)
+            except Exception:  # pylint: disable=broad-except
+                logger.debug("Unable to import '%s'.", module)
+
+    def serve_forever(self):
+        import signal
+
+        # children are reaped automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            self._listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self._listener.listen(64)
+        refresh_tokens = self._should_refresh_tokens()
+        idle_since = time.time()
+        try:
+            while True:
+                idle_time = self.idle_timeout - (time.time() - idle_since)
+                if idle_time <= 0:
+                    break
+                self._listener.settimeout(min(idle_time, TOKEN_REFRESH_INTERVAL) if refresh_tokens else idle_time)
+                try:
+                    conn, _ = self._listener.accept()
+                except socket.timeout:
+                    if refresh_tokens:
+                        self._refresh_tokens()
+                    continue
+                idle_since = time.time()
+                conn.settimeout(None)
+                try:
+                    if not self._handle(conn):
+                        break
+                except Exception:  # pylint: disable=broad-except
+                    pass
+                finally:
+                    conn.close()
+        finally:
+            self._listener.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    @staticmethod
+    def _should_refresh_tokens():
+        from azure.cli.core import get_default_cli
+        from azure.cli.core._token_refresh import get_refresh_lead_time
+        return bool(get_refresh_lead_time(get_default_cli()))
+
+    @staticmethod
+    def _refresh_tokens():
+        """ Refresh the tokens in this process, which has no other thread to fork with. The accounts and tokens are
+        read again from their files, and the forked commands read them from the files too. """
+        from azure.cli.core import get_default_cli
+        from azure.cli.core._profile import Profile
+        from azure.cli.core._session import ACCOUNT
+        from azure.cli.core._token_refresh import refresh_tokens
+
+        cli_ctx = get_default_cli()
+        ACCOUNT.load(ACCOUNT.filename)
+        refresh_tokens(cli_ctx, Profile(cli_ctx=cli_ctx, use_global_creds_cache=False, async_persist=False))
+
+    @staticmethod
+    def _is_same_user(conn):
+        peercred = getattr(socket, 'SO_PEERCRED', None)
+        if peercred is None:
+            # the socket is only accessible by its owner
+            return True
+        _, uid, _ = struct.unpack('3i', conn.getsockopt(socket.SOL_SOCKET, peercred, struct.calcsize('3i')))
+        return uid == os.getuid()
+
+    def _handle(self, conn):
+        """ Handle a single connection. Returns False when the server should stop. """
+        if not self._is_same_user(conn):
+            return True
+        request, fds = _recv_message(conn, max_fds=len(_STDIO_FDS))
+        try:
+            command = request.get('command')
+            if command == 'stop':
+                _send_message(conn, {'pid': os.getpid()})
+                return False
+            elif command == 'status':
+                from azure.cli.core import __version__
+                _send_message(conn, {'pid': os.getpid(), 'version': __version__})
+                return True
+            if len(fds) != len(_STDIO_FDS):
+                return True
+            if os.fork() == 0:
+                exit_code = 1
+                try:
+                    self._listener.close()
+                    exit_code = self._run(conn, request, fds)
+                finally:
+                    os._exit(exit_code)  # pylint: disable=protected-access
+        finally:
+            for fd in fds:
+                os.close(fd)
+        return True
+
+    @staticmethod
+    def _watch_for_interrupt(conn):
+        """ Raise KeyboardInterrupt in the command when the client is interrupted or goes away. Returns an event to
+        set once the command completed. """
+        import signal
+        import threading
+
+        completed = threading.Event()
+
+        def _watch():
+            try:
+                conn.recv(1)
+            except (OSError, IOError):
+                pass
+            if not completed.is_set():
+                os.kill(os.getpid(), signal.SIGINT)
+
+        watcher = threading.Thread(target=_watch)
+        watcher.daemon = True
+        watcher.start()
+        return completed
+
+    @staticmethod
+    def _redirect_stdio(fds):
+        import io
+        import locale
+
+        for fd, target in zip(fds, _STDIO_FDS):
+            os.dup2(fd, target)
+        encoding = locale.getpreferredencoding()
+        # buffering=1 selects line buffering, as the interpreter does for terminals and stderr
+        sys.stdin = io.open(0, 'r', encoding=encoding, closefd=False)
+        sys.stdout = io.open(1, 'w', buffering=1 if os.isatty(1) else -1, encoding=encoding, closefd=False)
+        sys.stderr = io.open(2, 'w', buffering=1, encoding=encoding, closefd=False)
+
+    def _run(self, conn, request, fds):
+        import signal
+
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        self._redirect_stdio(fds)
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+
+        exit_code = 1
+        completed = self._watch_for_interrupt(conn)
+        try:
+            exit_code = _invoke(request['args'])
+        except SystemExit as ex:
+            # sys.exit() and sys.exit(None) succeed, while sys.exit('message') fails
+            exit_code = 0 if ex.code is None else (ex.code if isinstance(ex.code, int) else 1)
+        except KeyboardInterrupt:
+            exit_code = 1
+        finally:
+            completed.set()
+            for stream in (sys.stdout, sys.stderr):
+                try:
+                    stream.flush()
+                except (OSError, IOError, ValueError):
+                    pass
+            try:
+                _send_message(conn, {'exit_code': exit_code})
+            except (OSError, IOError):
+                pass
+        return exit_code
+
+
+def _invoke(args):
+    """ Run a command the same way `python -m azure.cli` does """
+    from knack.completion import ARGCOMPLETE_ENV_NAME
+    from azure.cli.core import get_default_cli
+    import azure.cli.core.telemetry as telemetry
+
+    az_cli = get_default_cli()
+    telemetry.set_application(az_cli, ARGCOMPLETE_ENV_NAME)
+    try:
+        telemetry.start()
+        exit_code = az_cli.invoke(args)
+        if exit_code and exit_code != 0:
+            telemetry.set_failure()
+        else:
+            telemetry.set_success()
+        return exit_code or 0
+    except KeyboardInterrupt:
+        telemetry.set_user_fault('keyboard interrupt')
+        return 1
+    finally:
+        telemetry.conclude()
+
+
+def _request(command):
+    sock = _connect(get_daemon_socket_path())
+    if not sock:
+        return None
+    try:
+        _send_message(sock, {'command': command})
+        reply, _ = _recv_message(sock)
+        return reply
+    except (EOFError, OSError, IOError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def _daemonize():
+    """ Detach from the controlling terminal. Returns True in the daemon process. """
+    if os.fork() != 0:
+        return False
+    os.setsid()
+    if os.fork() != 0:
+        os._exit(0)  # pylint: disable=protected-access
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in _STDIO_FDS:
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    return True
+
+
+def main(args=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m azure.cli.core.daemon',
+                                     description='Manage the resident az server.')
+    parser.add_argument('action', choices=['start', 'stop', 'status'])
+    parser.add_argument('--idle-timeout', type=int, default=DEFAULT_IDLE_TIMEOUT,
+                        help='Seconds without requests after which the server exits.')
+    parser.add_argument('--foreground', action='store_true', help='Do not detach from the terminal.')
+    options = parser.parse_args(args)
+
+    if not is_daemon_supported():
+        print('The az daemon requires Unix domain sockets and Python 3.', file=sys.stderr)
+        return 1
+
+    if options.action == 'start':
+        return _start(options.idle_timeout, options.foreground)
+    return _control(options.action)
+
+
+def _control(action):
+    status = _request('status')
+    if action == 'status':
+        if status:
+            print('The az daemon (version {}) is running with pid {}.'.format(status['version'], status['pid']))
+            return 0
+        print('The az daemon is not running.')
+        return 1
+    if status:
+        _request('stop')
+    return 0
+
+
+def _start(idle_timeout, foreground):
+    status = _request('status')
+    if status:
+        print('The az daemon is already running with pid {}.'.format(status['pid']))
+        return 0
+    daemon = AzDaemon(idle_timeout=idle_timeout)
+    if foreground:
+        daemon.warm_up()
+        daemon.serve_forever()
+        return 0
+    if _daemonize():
+        try:
+            daemon.warm_up()
+            daemon.serve_forever()
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+    # wait for the server to finish warming up
+    for _ in range(600):
+        if _request('status'):
+            print('The az daemon is running. Set core.use_daemon to true to use it.')
+            return 0
+        time.sleep(0.1)
+    print('The az daemon did not start.', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,8 +5,7 @@
 
 from __future__ import print_function
 from knack.util import CLIError
-from knack.help import GroupHelpFile
-from azure.cli.core._help import CliCommandHelpFile
+from azure.cli.core._help import CliCommandHelpFile, CliGroupHelpFile
 from azure.cli.core.commands.arm import add_id_parameters
 
 
@@ -27,7 +26,7 @@ def get_all_help(cli_ctx):
     help_files = []
     for cmd, parser in zip(sub_parser_keys, sub_parser_values):
         try:
-            help_file = GroupHelpFile(cmd, parser) if _is_group(parser) else CliCommandHelpFile(cmd, parser)
+            help_file = CliGroupHelpFile(cli_ctx, cmd, parser) if _is_group(parser) else CliCommandHelpFile(cmd, parser)
             help_file.load(parser)
             help_files.append(help_file)
         except Exception as ex:  # pylint: disable=broad-except
@@ -0,0 +1,292 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Startup profiler used by `az --profile-startup`.
+
+Records the time spent in each phase of an invocation (CLI initialization, command table and argument loading,
+parsing, validation, the command handler and output formatting) together with the tree of the modules imported
+while they run. It only depends on the standard library, so `python -m azure.cli` loads it without the __init__ of
+azure.cli.core and starts it before the rest of the CLI is imported.
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+import threading
+import timeit
+
+try:
+    import __builtin__ as builtins  # pylint: disable=import-error
+except ImportError:
+    import builtins
+
+PROFILE_ARG = '--profile-startup'
+PROFILE_FORMAT_ARG = '--profile-startup-format'
+PROFILE_FORMATS = ['json', 'chrome']
+
+_profiler = None
+
+
+class _NullPhase(object):  # pylint: disable=too-few-public-methods
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Span(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, name, category, start, thread_id, args=None):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = 0.0
+        self.thread_id = thread_id
+        self.args = args
+        self.children = []
+
+    @property
+    def self_duration(self):
+        return self.duration - sum(c.duration for c in self.children)
+
+    def to_dict(self, origin):
+        result = {
+            'name': self.name,
+            'category': self.category,
+            'start': round((self.start - origin) * 1000, 3),
+            'duration': round(self.duration * 1000, 3),
+            'self': round(self.self_duration * 1000, 3)
+        }
+        if self.args:
+            result['args'] = self.args
+        if self.children:
+            result['children'] = [c.to_dict(origin) for c in self.children]
+        return result
+
+
+class _Phase(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, profiler, name, category, args):
+        self._profiler = profiler
+        self._span = None
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._span = self._profiler.push(self._name, self._category, self._args)
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._profiler.pop(self._span)
+        return False
+
+
+class StartupProfiler(object):
+    """ Collects nested timing spans. Times are in seconds relative to the profiler creation. """
+
+    def __init__(self):
+        self.origin = timeit.default_timer()
+        self.roots = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._original_import = None
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def push(self, name, category='phase', args=None):
+        span = _Span(name, category, timeit.default_timer(), threading.current_thread().ident, args)
+        stack = self._stack()
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            with self._lock:
+                self.roots.append(span)
+        stack.append(span)
+        return span
+
+    def pop(self, span, discard=False):
+        span.duration = timeit.default_timer() - span.start
+        stack = self._stack()
+        while stack and stack.pop() is not span:
+            pass
+        if discard:
+            siblings = stack[-1].children if stack else self.roots
+            with self._lock:
+                siblings.remove(span)
+
+    def phase(self, name, category='phase', **kwargs):
+        return _Phase(self, name, category, kwargs or None)
+
+    def install_import_hook(self):
+        """ Time every import statement which loads at least one new module. """
+        if self._original_import:
+            return
+        original_import = self._original_import = builtins.__import__
+        profiler = self
+
+        # pylint: disable=redefined-builtin
+        def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+            module_count = len(sys.modules)
+            span = profiler.push(_resolve_name(name, globals, level), 'import')
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                # imports of modules which were already loaded are too cheap to be interesting
+                profiler.pop(span, discard=len(sys.modules) == module_count and not span.children)
+
+        builtins.__import__ = _profiled_import
+
+    def uninstall_import_hook(self):
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _iter_spans(self, spans=None):
+        if spans is None:
+            spans = self.roots
+        for span in spans:
+            yield span
+            for child in self._iter_spans(span.children):
+                yield child
+
+    def to_dict(self):
+        """ The phase tree, the total time per phase and command module and the import cost of each module,
+        in milliseconds.
+        """
+        phases = {}
+        command_modules = {}
+        imports = {}
+        for span in self._iter_spans():
+            if span.category == 'import':
+                entry = imports.setdefault(span.name, {'duration': 0.0, 'self': 0.0})
+                entry['duration'] += span.duration * 1000
+                entry['self'] += span.self_duration * 1000
+            else:
+                totals = phases if span.category == 'phase' else command_modules
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration * 1000
+        return {
+            'total': round((timeit.default_timer() - self.origin) * 1000, 3),
+            'phases': {name: round(duration, 3) for name, duration in phases.items()},
+            'commandModules': {name: round(duration, 3) for name, duration in command_modules.items()},
+            'imports': sorted(({'name': name, 'duration': round(cost['duration'], 3), 'self': round(cost['self'], 3)}
+                               for name, cost in imports.items()), key=lambda i: i['self'], reverse=True),
+            'tree': [span.to_dict(self.origin) for span in self.roots]
+        }
+
+    def to_chrome_trace(self):
+        """ Complete events in the Trace Event Format, viewable in chrome://tracing. """
+        pid = os.getpid()
+        events = []
+        for span in self._iter_spans():
+            event = {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round((span.start - self.origin) * 1e6, 1),
+                'dur': round(span.duration * 1e6, 1),
+                'pid': pid,
+                'tid': span.thread_id
+            }
+            if span.args:
+                event['args'] = span.args
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path=None, output_format='json'):
+        self.uninstall_import_hook()
+        data = self.to_chrome_trace() if output_format == 'chrome' else self.to_dict()
+        if path:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+        else:
+            print(json.dumps(data, indent=2), file=sys.stderr)
+
+
+def _resolve_name(name, globals_, level):
+    """ The absolute name of a relative import. """
+    if level <= 0 or not globals_:
+        return name
+    package = globals_.get('__package__') or globals_.get('__name__', '')
+    if '__path__' not in globals_ and not globals_.get('__package__'):
+        package = package.rpartition('.')[0]
+    if level > 1:
+        package = package.rsplit('.', level - 1)[0]
+    return '{}.{}'.format(package, name) if name else package
+
+
+def extract_profile_args(args):
+    """ Remove the profiler arguments from the command line.
+
+    :return: The remaining arguments, whether the profiler is enabled, the output path and the output format.
+    """
+    remaining = []
+    enabled = False
+    path = None
+    output_format = 'json'
+    args = iter(args)
+    for arg in args:
+        if arg == PROFILE_ARG:
+            enabled = True
+        elif arg.startswith(PROFILE_ARG + '='):
+            enabled = True
+            path = arg.split('=', 1)[1] or None
+        elif arg == PROFILE_FORMAT_ARG:
+            output_format = next(args, output_format)
+        elif arg.startswith(PROFILE_FORMAT_ARG + '='):
+            output_format = arg.split('=', 1)[1]
+        else:
+            remaining.append(arg)
+    if output_format not in PROFILE_FORMATS:
+        raise ValueError('{} must be one of {}'.format(PROFILE_FORMAT_ARG, ', '.join(PROFILE_FORMATS)))
+    return remaining, enabled, path, output_format
+
+
+def start_profiler():
+    global _profiler  # pylint: disable=global-statement
+    _profiler = StartupProfiler()
+    _profiler.install_import_hook()
+    return _profiler
+
+
+def stop_profiler():
+    global _profiler  # pylint: disable=global-statement
+    profiler, _profiler = _profiler, None
+    if profiler:
+        profiler.uninstall_import_hook()
+    return profiler
+
+
+def get_profiler():
+    return _profiler
+
+
+def profile_phase(name, category='phase', **kwargs):
+    """ Context manager which records a phase when the profiler is enabled and does nothing otherwise. """
+    if _profiler is None:
+        return _NULL_PHASE
+    return _profiler.phase(name, category, **kwargs)
+
+
+def profile_output(cli_ctx):
+    """ Record the output formatting, which happens in knack once the command returns. """
+    out = cli_ctx.output.out
+
+    def _profiled_out(*args, **kwargs):
+        with profile_phase('output'):
+            return out(*args, **kwargs)
+
+    cli_ctx.output.out = _profiled_out
@@ -0,0 +1,90 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+import mock
+import requests
+from msrest import Configuration
+
+from azure.cli.core.commands.client_factory import _get_mgmt_service_client
+from azure.cli.testsdk import TestCli
+
+
+class _Client(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, credentials, subscription_id, base_url=None, api_version=None):
+        self.credentials = credentials
+        self.subscription_id = subscription_id
+        self.api_version = api_version
+        self.config = Configuration(base_url)
+        self._client = mock.MagicMock()
+
+
+def _account(subscription_id, user='user@example.com'):
+    return {'id': subscription_id, 'tenantId': 'tenant', 'user': {'name': user, 'type': 'user'}}
+
+
+class TestClientFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.cli = TestCli()
+        self.accounts = {None: _account('sub1'), 'sub2': _account('sub2')}
+        patcher = mock.patch('azure.cli.core._profile.Profile', autospec=True)
+        profile = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        profile.get_subscription.side_effect = lambda subscription=None: self.accounts[subscription]
+        profile.get_login_credentials.side_effect = lambda subscription_id=None, resource=None: (
+            mock.MagicMock(), self.accounts[subscription_id]['id'], 'tenant')
+        self.profile = profile
+
+    def test_mgmt_client_is_reused(self):
+        client, subscription_id = _get_mgmt_service_client(self.cli, _Client, api_version='2018-01-01')
+        self.assertEqual(subscription_id, 'sub1')
+        self.assertIs(_get_mgmt_service_client(self.cli, _Client, api_version='2018-01-01')[0], client)
+        self.assertEqual(self.profile.get_login_credentials.call_count, 1)
+
+        # another subscription, API version or resource is a different client
+        self.assertEqual(_get_mgmt_service_client(self.cli, _Client, subscription_id='sub2',
+                                                  api_version='2018-01-01')[1], 'sub2')
+        other_clients = [_get_mgmt_service_client(self.cli, _Client, api_version='2017-01-01')[0],
+                         _get_mgmt_service_client(self.cli, _Client, api_version='2018-01-01', resource='other')[0]]
+        self.assertNotIn(client, other_clients)
+        self.assertEqual(self.profile.get_login_credentials.call_count, 4)
+
+        # changing the default account is picked up
+        self.accounts[None] = _account('sub1', user='other@example.com')
+        self.assertIsNot(_get_mgmt_service_client(self.cli, _Client, api_version='2018-01-01')[0], client)
+
+        # the command headers are refreshed for every command
+        self.cli.data['command'] = 'vm list'
+        client, _ = _get_mgmt_service_client(self.cli, _Client, subscription_id='sub2', api_version='2018-01-01')
+        client._client.add_header.assert_called_with('CommandName', 'vm list')  # pylint: disable=protected-access
+
+        # each CLI context has its own clients
+        self.assertIsNot(_get_mgmt_service_client(TestCli(), _Client, api_version='2018-01-01')[0], client)
+
+    def test_mgmt_client_cache_disabled(self):
+        with mock.patch.dict('os.environ', {'AZURE_CORE_CACHE_MGMT_CLIENTS': 'false'}):
+            client, _ = _get_mgmt_service_client(self.cli, _Client)
+            self.assertIsNot(_get_mgmt_service_client(self.cli, _Client)[0], client)
+
+    def test_mgmt_client_reuses_connections(self):
+        client, _ = _get_mgmt_service_client(self.cli, _Client)
+        sessions = [requests.Session(), requests.Session()]
+        for session in sessions:
+            client.config.session_configuration_callback(session, client.config, {})
+            session.close()
+        adapter = sessions[0].get_adapter('https://management.azure.com')
+        self.assertIs(sessions[1].get_adapter('https://management.azure.com'), adapter)
+
+        # a request specific retry policy keeps the adapter msrest created
+        session = requests.Session()
+        client.config.session_configuration_callback(session, client.config, {'retries': 1})
+        self.assertIsNot(session.get_adapter('https://management.azure.com'), adapter)
+
+
+if __name__ == '__main__':
+    unittest.main()
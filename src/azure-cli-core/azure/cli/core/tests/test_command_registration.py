@@ -95,6 +95,56 @@ class TestCommandRegistration(unittest.TestCase):
                                           command_metadata.arguments[existing].options)
         self.assertEqual(command_metadata.arguments['vm_name'].options_list, ('--wonky-name', '-n'))
 
+    def test_scoped_arguments(self):
+
+        loaded_scopes = []
+
+        class TestCommandsLoader(AzCommandsLoader):
+
+            def load_command_table(self, args):
+                super(TestCommandsLoader, self).load_command_table(args)
+                with self.command_group('test register', operations_tmpl='{}#TestCommandRegistration.{{}}'.format(__name__)) as g:
+                    g.command('sample-vm-get', 'sample_vm_get')
+                with self.command_group('test other', operations_tmpl='{}#TestCommandRegistration.{{}}'.format(__name__)) as g:
+                    g.command('sample-vm-get', 'sample_vm_get')
+                return self.command_table
+
+            def load_arguments(self, command):
+                super(TestCommandsLoader, self).load_arguments(command)
+
+                def _load_register_arguments():
+                    loaded_scopes.append('test register')
+                    with self.argument_context('test register sample-vm-get') as c:
+                        c.argument('vm_name', options_list=('--wonky-name', '-n'), required=False)
+
+                def _load_other_arguments():
+                    loaded_scopes.append('test other')
+                    with self.argument_context('test other sample-vm-get') as c:
+                        c.argument('vm_name', options_list=('--other-name',))
+
+                def _load_reg_arguments():
+                    # only a prefix of 'test register' by characters, not by words
+                    loaded_scopes.append('test reg')
+
+                self.load_scoped_arguments(command, [
+                    ('test register', _load_register_arguments),
+                    ('test other', _load_other_arguments),
+                    ('test reg', _load_reg_arguments)
+                ])
+
+        cli = TestCli(commands_loader_cls=TestCommandsLoader)
+        command = 'test register sample-vm-get'
+        loader = _prepare_test_commands_loader(TestCommandsLoader, cli, command)
+
+        self.assertEqual(loaded_scopes, ['test register'])
+        self.assertEqual(loader.command_table[command].arguments['vm_name'].options_list, ('--wonky-name', '-n'))
+
+        # every scope is evaluated when applicability checks are skipped
+        del loaded_scopes[:]
+        loader.skip_applicability = True
+        loader.load_arguments(command)
+        self.assertEqual(loaded_scopes, ['test register', 'test other', 'test reg'])
+
     def test_register_command(self):
 
         class TestCommandsLoader(AzCommandsLoader):
@@ -220,6 +270,67 @@ class TestCommandRegistration(unittest.TestCase):
         self.assertTrue(isinstance(ext2.command_source, ExtensionCommandSource))
         self.assertTrue(ext2.command_source.overrides_command)
 
+    @mock.patch('importlib.import_module', _mock_import_lib)
+    @mock.patch('pkgutil.iter_modules', _mock_iter_modules)
+    @mock.patch('azure.cli.core.commands._load_command_loader', _mock_load_command_loader)
+    @mock.patch('azure.cli.core.extension.get_extension_modname', _mock_extension_modname)
+    @mock.patch('azure.cli.core.extension.get_extensions', _mock_get_extensions)
+    def test_command_index(self):
+        from azure.cli.core import CommandIndex
+        from azure.cli.core._session import Session
+
+        index = Session()
+        with mock.patch('azure.cli.core._session.INDEX', index):
+            cli = TestCli()
+            cli.loader = MainCommandsLoader(cli)
+            cli.loader.load_command_table(['hello', 'world'])
+
+            # a full load builds the index
+            self.assertEqual(index['commandIndex']['hello']['modules'], [__name__])
+            self.assertTrue(index['commandIndex']['hello']['extensions'])
+
+            command_index = CommandIndex(cli, {__name__: None})
+            self.assertEqual(command_index.get(['hello', 'world']),
+                             (index['commandIndex']['hello']['modules'],
+                              index['commandIndex']['hello']['extensions']))
+            self.assertIsNone(command_index.get(['unknown']))
+            self.assertIsNone(command_index.get(['--version']))
+            self.assertIsNone(command_index.get([]))
+
+            # a different set of installed modules invalidates the index
+            self.assertIsNone(CommandIndex(cli, {__name__: None, 'other': None}).get(['hello', 'world']))
+
+            # subsequent loads only import the modules recorded in the index
+            cli.loader = MainCommandsLoader(cli)
+            with mock.patch.object(CommandIndex, 'update') as update_mock:
+                cmd_tbl = cli.loader.load_command_table(['hello', 'world'])
+                self.assertFalse(update_mock.called)
+            self.assertIn('hello world', cmd_tbl)
+            self.assertIn('hello noodle', cmd_tbl)
+
+    @mock.patch('importlib.import_module', _mock_import_lib)
+    @mock.patch('pkgutil.iter_modules', _mock_iter_modules)
+    @mock.patch('azure.cli.core.commands._load_command_loader', _mock_load_command_loader)
+    @mock.patch('azure.cli.core.extension.get_extension_modname', _mock_extension_modname)
+    @mock.patch('azure.cli.core.extension.get_extensions', _mock_get_extensions)
+    def test_command_index_stale_entry(self):
+        from azure.cli.core import CommandIndex
+        from azure.cli.core._session import Session
+
+        index = Session()
+        with mock.patch('azure.cli.core._session.INDEX', index):
+            cli = TestCli()
+            cli.loader = MainCommandsLoader(cli)
+            cli.loader.load_command_table(['hello', 'world'])
+            # the recorded sources no longer provide the command
+            index['commandIndex']['hello'] = {'modules': [], 'extensions': []}
+
+            cli.loader = MainCommandsLoader(cli)
+            with mock.patch.object(CommandIndex, 'update') as update_mock:
+                cmd_tbl = cli.loader.load_command_table(['hello', 'world'])
+                self.assertTrue(update_mock.called)
+            self.assertIn('hello world', cmd_tbl)
+
     def test_argument_with_overrides(self):
 
         global_vm_name_type = CLIArgumentType(
@@ -0,0 +1,113 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+import mock
+
+from azure.cli.core.daemon import (AzDaemon, invoke_with_daemon, is_daemon_supported, _is_daemon_enabled,
+                                   _send_message, _recv_message)
+
+
+@unittest.skipUnless(is_daemon_supported(), 'The daemon requires Unix domain sockets.')
+class TestDaemon(unittest.TestCase):
+
+    def test_message_round_trip_with_fds(self):
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        read_fd, write_fd = os.pipe()
+        try:
+            message = {'args': ['storage', 'blob', 'list'], 'env': {'KEY': u'\u00e9' * 1000}, 'cwd': '/'}
+            _send_message(client, message, [write_fd])
+            received, fds = _recv_message(server, max_fds=3)
+            self.assertEqual(received, message)
+            self.assertEqual(len(fds), 1)
+
+            # the received descriptor refers to the same pipe
+            os.write(fds[0], b'hello')
+            os.close(fds[0])
+            self.assertEqual(os.read(read_fd, 5), b'hello')
+        finally:
+            for fd in (read_fd, write_fd):
+                os.close(fd)
+            client.close()
+            server.close()
+
+    def test_message_without_fds(self):
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            _send_message(client, {'command': 'status'})
+            self.assertEqual(_recv_message(server, max_fds=3), ({'command': 'status'}, []))
+            client.close()
+            with self.assertRaises(EOFError):
+                _recv_message(server)
+        finally:
+            server.close()
+
+    def test_daemon_enabled(self):
+        with mock.patch.dict('os.environ', {'AZURE_CORE_USE_DAEMON': 'true'}):
+            self.assertTrue(_is_daemon_enabled())
+        with mock.patch.dict('os.environ', {'AZURE_CORE_USE_DAEMON': 'no'}):
+            self.assertFalse(_is_daemon_enabled())
+
+        config_dir = tempfile.mkdtemp()
+        with mock.patch.dict('os.environ', {'AZURE_CONFIG_DIR': config_dir}):
+            os.environ.pop('AZURE_CORE_USE_DAEMON', None)
+            self.assertFalse(_is_daemon_enabled())
+            with open(os.path.join(config_dir, 'config'), 'w') as f:
+                f.write('[core]\nuse_daemon = yes\n')
+            self.assertTrue(_is_daemon_enabled())
+
+    def test_invoke_without_daemon_runs_in_process(self):
+        config_dir = tempfile.mkdtemp()
+        with mock.patch.dict('os.environ', {'AZURE_CONFIG_DIR': config_dir, 'AZURE_CORE_USE_DAEMON': 'true'}):
+            self.assertIsNone(invoke_with_daemon(['account', 'list']))
+        with mock.patch.dict('os.environ', {'AZURE_CONFIG_DIR': config_dir, 'AZURE_CORE_USE_DAEMON': 'false'}):
+            with mock.patch('azure.cli.core.daemon._connect') as connect_mock:
+                self.assertIsNone(invoke_with_daemon(['account', 'list']))
+                self.assertFalse(connect_mock.called)
+
+    def test_daemon_control_requests(self):
+        daemon = AzDaemon(socket_path=os.path.join(tempfile.mkdtemp(), 'daemon.sock'))
+
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        _send_message(client, {'command': 'status'})
+        self.assertTrue(daemon._handle(server))  # pylint: disable=protected-access
+        reply, _ = _recv_message(client)
+        self.assertEqual(reply['pid'], os.getpid())
+        client.close()
+        server.close()
+
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        _send_message(client, {'command': 'stop'})
+        self.assertFalse(daemon._handle(server))  # pylint: disable=protected-access
+        client.close()
+        server.close()
+
+    def test_run_exit_codes(self):
+        daemon = AzDaemon(socket_path=os.path.join(tempfile.mkdtemp(), 'daemon.sock'))
+        request = {'args': ['account', 'list'], 'cwd': os.getcwd(), 'env': dict(os.environ)}
+
+        for error, expected in [(SystemExit(), 0), (SystemExit(None), 0), (SystemExit(2), 2),
+                                (SystemExit('error'), 1), (KeyboardInterrupt(), 1)]:
+            client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                with mock.patch('azure.cli.core.daemon._invoke', side_effect=error), \
+                        mock.patch.object(AzDaemon, '_redirect_stdio'), \
+                        mock.patch.object(AzDaemon, '_watch_for_interrupt', return_value=threading.Event()), \
+                        mock.patch.dict(os.environ):
+                    self.assertEqual(daemon._run(server, request, []), expected)  # pylint: disable=protected-access
+                reply, _ = _recv_message(client)
+                self.assertEqual(reply, {'exit_code': expected})
+            finally:
+                client.close()
+                server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,10 +8,10 @@ from __future__ import print_function
 import logging
 import unittest
 
-from azure.cli.core._help import ArgumentGroupRegistry, CliCommandHelpFile
+from azure.cli.core._help import ArgumentGroupRegistry, CliCommandHelpFile, CliGroupHelpFile
 from azure.cli.testsdk import TestCli
 
-from knack.help import HelpObject, GroupHelpFile, HelpAuthoringException
+from knack.help import HelpObject, HelpAuthoringException
 
 
 class HelpTest(unittest.TestCase):
@@ -50,11 +50,55 @@ class HelpTest(unittest.TestCase):
 
         for name, parser in parser_dict.items():
             try:
-                help_file = GroupHelpFile(name, parser) if _is_group(parser) else CliCommandHelpFile(name, parser)
+                help_file = CliGroupHelpFile(cli, name, parser) if _is_group(parser) \
+                    else CliCommandHelpFile(name, parser)
                 help_file.load(parser)
             except Exception as ex:
                 raise HelpAuthoringException('{}, {}'.format(name, ex))
 
+    def test_help_index(self):
+        import os
+        import shutil
+        import tempfile
+        import mock
+        from knack.help_files import helps
+        from azure.cli.core import _help_index
+
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        cli_ctx = mock.MagicMock()
+        cli_ctx.config.config_dir = config_dir
+        loader = mock.MagicMock(cmd_to_mod_map={'storage account list': 'storage', 'vm list': 'vm'})
+
+        with mock.patch.dict(_help_index._MODULE_HELP, clear=True):
+            data = _help_index.get_help_data(cli_ctx, 'storage account', loader)
+            self.assertEqual(data['type'], 'group')
+            self.assertTrue(data['short-summary'])
+            # only the index of the module which provides the group is loaded
+            self.assertEqual(list(_help_index._MODULE_HELP), ['storage'])
+            self.assertTrue(os.path.isfile(os.path.join(config_dir, 'helpIndex', 'storage.json')))
+            self.assertIsNone(_help_index.get_help_data(cli_ctx, 'storage unknown', loader))
+
+        # the index is read from the configuration directory without importing the help again
+        with mock.patch.dict(_help_index._MODULE_HELP, clear=True), \
+                mock.patch.object(_help_index, '_compile_help_module', side_effect=AssertionError):
+            self.assertEqual(_help_index.get_help_data(cli_ctx, 'storage account', loader), data)
+
+        # an index compiled from another version of the help is compiled again
+        with mock.patch.dict(_help_index._MODULE_HELP, clear=True), \
+                mock.patch.object(_help_index, '_compile_help_module', return_value={'storage account': 'compiled'}), \
+                mock.patch('azure.cli.core.__version__', '0.0.0'):
+            self.assertEqual(_help_index.get_help_data(cli_ctx, 'storage account', loader), 'compiled')
+
+        # the help registered directly, e.g. by an extension, takes precedence
+        with mock.patch.dict(_help_index._MODULE_HELP, clear=True), \
+                mock.patch.dict(helps, {'storage account': 'short-summary: From an extension.'}):
+            self.assertEqual(_help_index.get_help_data(cli_ctx, 'storage account', loader)['short-summary'],
+                             'From an extension.')
+            all_help = _help_index.get_all_help_data(cli_ctx, loader)
+            self.assertEqual(all_help['storage account']['short-summary'], 'From an extension.')
+            self.assertIn('vm create', all_help)
+
 
 def _store_parsers(parser, d):
     for s in parser.subparsers.values():
@@ -9,7 +9,7 @@ import unittest
 from collections import OrderedDict
 from six import StringIO
 
-from azure.cli.core._output import OutputProducer
+from azure.cli.core._output import OutputProducer, format_jsonl
 
 from knack.output import format_json, format_table, format_tsv
 from knack.util import CommandResultItem, normalize_newlines
@@ -178,6 +178,13 @@ qwerty  0b1f6472qwerty  True
         result = format_tsv(CommandResultItem([obj1, obj2]))
         self.assertEqual(result, '1\t2\n3\t4\n')
 
+    def test_out_jsonl(self):
+        output_producer = OutputProducer(formatter=format_jsonl, file=self.io)
+        output_producer.out(CommandResultItem([{'name': 'a', 'tags': {'x': 1}}, OrderedDict([('name', 'b')]), 'c']))
+        output_producer.out(CommandResultItem({'name': 'd'}))
+        self.assertEqual(self.io.getvalue(),
+                         '{"name": "a", "tags": {"x": 1}}\n{"name": "b"}\n"c"\n{"name": "d"}\n')
+
 
 if __name__ == '__main__':
     unittest.main()
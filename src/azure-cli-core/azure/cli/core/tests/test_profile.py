@@ -1003,6 +1003,40 @@ class TestProfile(unittest.TestCase):
         self.assertEqual([], subs)
         mock_logger.warning.assert_called_once_with(mock.ANY, mock.ANY, mock.ANY)
 
+    @mock.patch('azure.cli.core._profile.logger', autospec=True)
+    def test_find_subscriptions_in_many_tenants(self, mock_logger):
+        cli = TestCli()
+        tenants = ['tenant{}'.format(i) for i in range(20)]
+
+        def get_auth_context(_, tenant, _2):
+            context = mock.MagicMock()
+            context.acquire_token_with_username_password.return_value = self.token_entry1
+            if tenant == 'tenant3':
+                context.acquire_token.side_effect = AdalError('Account is disabled')
+            else:
+                context.acquire_token.return_value = dict(self.token_entry1, accessToken=tenant)
+            return context
+
+        def get_arm_client(credentials):
+            token = credentials.token['access_token']
+            client = mock.MagicMock()
+            client.tenants.list.return_value = [TenantStub(t) for t in tenants]
+            client.subscriptions.list.return_value = \
+                [SubscriptionStub('subscriptions/' + token, token, self.state1, token)] if token in tenants else []
+            return client
+
+        finder = SubscriptionFinder(cli, get_auth_context, None, get_arm_client)
+        mgmt_resource = 'https://management.core.windows.net/'
+        # action
+        subs = finder.find_from_user_account(self.user1, 'bar', None, mgmt_resource)
+
+        # assert, the tenants are searched concurrently, a tenant which fails to authenticate is skipped
+        expected_tenants = [t for t in tenants if t != 'tenant3']
+        self.assertEqual([s.display_name for s in subs], expected_tenants)
+        self.assertEqual([s.tenant_id for s in subs], expected_tenants)
+        self.assertEqual(finder.tenants, expected_tenants)
+        mock_logger.warning.assert_called_once_with(mock.ANY, mock.ANY, mock.ANY)
+
     @mock.patch('adal.AuthenticationContext', autospec=True)
     def test_find_subscriptions_from_particular_tenent(self, mock_auth_context):
         def just_raise(ex):
@@ -1136,11 +1170,17 @@ class TestProfile(unittest.TestCase):
         profile._set_subscriptions(consolidated)
         mock_auth_context.acquire_token_with_username_password.return_value = self.token_entry1
         mock_auth_context.acquire_token.return_value = self.token_entry1
-        mock_auth_context.acquire_token_with_client_credentials.return_value = self.token_entry1
+        mock_auth_context.acquire_token_with_client_credentials.return_value = dict(self.token_entry1,
+                                                                                    accessToken='sp token')
         mock_arm_client = mock.MagicMock()
         mock_arm_client.tenants.list.return_value = [TenantStub(self.tenant_id)]
-        mock_arm_client.subscriptions.list.side_effect = deepcopy([[self.subscription1], [self.subscription2, sp_subscription1]])
-        finder = SubscriptionFinder(cli, lambda _, _1, _2: mock_auth_context, None, lambda _: mock_arm_client)
+        mock_arm_client.subscriptions.list.return_value = deepcopy([self.subscription1])
+        mock_sp_arm_client = mock.MagicMock()
+        mock_sp_arm_client.subscriptions.list.return_value = deepcopy([self.subscription2, sp_subscription1])
+        # the accounts are refreshed concurrently, the subscriptions of each are listed with its own token
+        finder = SubscriptionFinder(cli, lambda _, _1, _2: mock_auth_context, None,
+                                    lambda c: mock_sp_arm_client if c.token['access_token'] == 'sp token'
+                                    else mock_arm_client)
         profile._creds_cache.retrieve_secret_of_service_principal = lambda _: 'verySecret'
         profile._creds_cache.flush_to_disk = lambda _: ''
         # action
@@ -1226,10 +1266,11 @@ class TestProfile(unittest.TestCase):
         # assert
         self.assertEqual(creds_cache.retrieve_secret_of_service_principal(test_sp['servicePrincipalId']), None)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
-    def test_credscache_add_new_sp_creds(self, _, mock_open_for_write, mock_read_file):
+    def test_credscache_add_new_sp_creds(self, _, mock_open_for_write, mock_read_file, mock_replace_file):
         cli = TestCli()
         test_sp = {
             "servicePrincipalId": "myapp",
@@ -1253,6 +1294,7 @@ class TestProfile(unittest.TestCase):
         self.assertEqual(token_entries, [self.token_entry1])
         self.assertEqual(creds_cache._service_principal_creds, [test_sp, test_sp2])
         mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_replace_file.assert_called_once_with(mock.ANY, creds_cache._token_file.path)
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
@@ -1275,10 +1317,11 @@ class TestProfile(unittest.TestCase):
         self.assertEqual(creds_cache._service_principal_creds, [test_sp])
         self.assertFalse(mock_open_for_write.called)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
-    def test_credscache_add_preexisting_sp_new_secret(self, _, mock_open_for_write, mock_read_file):
+    def test_credscache_add_preexisting_sp_new_secret(self, _, mock_open_for_write, mock_read_file, mock_replace_file):
         cli = TestCli()
         test_sp = {
             "servicePrincipalId": "myapp",
@@ -1298,10 +1341,11 @@ class TestProfile(unittest.TestCase):
         self.assertEqual(creds_cache._service_principal_creds, [new_creds])
         self.assertTrue(mock_open_for_write.called)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
-    def test_credscache_remove_creds(self, _, mock_open_for_write, mock_read_file):
+    def test_credscache_remove_creds(self, _, mock_open_for_write, mock_read_file, mock_replace_file):
         cli = TestCli()
         test_sp = {
             "servicePrincipalId": "myapp",
@@ -1328,11 +1372,12 @@ class TestProfile(unittest.TestCase):
         mock_open_for_write.assert_called_with(mock.ANY, 'w+')
         self.assertEqual(mock_open_for_write.call_count, 2)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
     @mock.patch('adal.AuthenticationContext', autospec=True)
-    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_open_for_write, mock_read_file):  # pylint: disable=line-too-long
+    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_open_for_write, mock_read_file, mock_replace_file):  # pylint: disable=line-too-long
         cli = TestCli()
         token_entry2 = {
             "accessToken": "new token",
@@ -1381,6 +1426,153 @@ class TestProfile(unittest.TestCase):
 
         self.assertTrue(re.findall(r'bad error for you', str(context.exception)))
 
+    def test_credscache_merges_changes_of_concurrent_processes(self):
+        import shutil
+        import tempfile
+        cli = TestCli()
+        token_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, token_dir)
+        token_file = os.path.join(token_dir, 'accessTokens.json')
+        with open(token_file, 'w') as f:
+            json.dump([self.token_entry1], f)
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        token_entry2 = dict(self.token_entry1, userId='User2@outlook.com', accessToken='token2')
+
+        # two az processes load the file
+        with mock.patch.dict('os.environ', {'AZURE_ACCESS_TOKEN_FILE': token_file}):
+            creds_cache1 = CredsCache(cli, async_persist=False)
+            creds_cache2 = CredsCache(cli, async_persist=False)
+        creds_cache1.load_adal_token_cache()
+        creds_cache2.load_adal_token_cache()
+
+        # action
+        creds_cache1.save_service_principal_cred(test_sp)
+        creds_cache2.adal_token_cache.add([token_entry2])
+        creds_cache2.persist_cached_creds()
+        creds_cache2.remove_cached_creds(self.user1)
+
+        # assert, the changes of each process are kept
+        with open(token_file) as f:
+            self.assertEqual(json.load(f), [token_entry2, test_sp])
+        self.assertEqual(creds_cache2.retrieve_secret_of_service_principal('myapp'), 'Secret')
+        # tokens are looked up by user in an index, case insensitively like ADAL
+        self.assertEqual(creds_cache2.adal_token_cache.find({'userId': 'user2@OUTLOOK.com'}), [token_entry2])
+        self.assertEqual(creds_cache2.adal_token_cache.find({'userId': self.user1}), [])
+
+    def test_account_session_merges_changes_of_concurrent_processes(self):
+        import shutil
+        import tempfile
+        from azure.cli.core._session import AccountSession
+        cli = TestCli()
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        profile_file = os.path.join(profile_dir, 'azureProfile.json')
+        storage = AccountSession()
+        storage.load(profile_file)
+        profile = Profile(cli_ctx=cli, storage=storage, use_global_creds_cache=False, async_persist=False)
+        subscription3 = SubscriptionStub('subscriptions/3', 'baz account', self.state1, self.tenant_id)
+        profile._set_subscriptions(profile._normalize_properties(self.user1, [self.subscription1], False))
+        profile._set_subscriptions(profile._normalize_properties(self.user2, [self.subscription2, subscription3],
+                                                                 False))
+
+        # two az processes load the file
+        storage1, storage2 = AccountSession(), AccountSession()
+        storage1.load(profile_file)
+        storage2.load(profile_file)
+        profile1 = Profile(cli_ctx=cli, storage=storage1, use_global_creds_cache=False, async_persist=False)
+        profile2 = Profile(cli_ctx=cli, storage=storage2, use_global_creds_cache=False, async_persist=False)
+        self.assertEqual(profile1.get_subscription()['id'], '3')
+        self.assertEqual(profile2.get_subscription('BAR account')['id'], '2')
+
+        # action
+        profile1.set_active_subscription('1')
+        with mock.patch('azure.cli.core.util.write_file_atomically') as mock_write:
+            # nothing is written when nothing changed
+            storage2.save()
+        mock_write.assert_not_called()
+        profile2.logout(self.user2)
+
+        # assert, the changes of each process are kept
+        storage.load(profile_file)
+        self.assertEqual([(s['id'], s['isDefault']) for s in storage['subscriptions']], [('1', True)])
+        self.assertEqual(profile.get_subscription()['name'], self.display_name1)
+        with self.assertRaisesRegexp(CLIError, "az account set"):
+            profile.get_subscription('2')
+
+    def test_refresh_tokens_which_expire_soon(self):
+        import shutil
+        import tempfile
+        from datetime import datetime, timedelta
+        cli = TestCli()
+        token_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, token_dir)
+        token_file = os.path.join(token_dir, 'accessTokens.json')
+        expires_on = datetime.utcnow() + timedelta(minutes=10)
+        token_entry = dict(self.token_entry1, expiresOn=str(expires_on))
+        with open(token_file, 'w') as f:
+            json.dump([token_entry], f)
+        mock_context = mock.MagicMock()
+        mock_context.authority.url = token_entry['_authority']
+        mock_context.acquire_token_with_refresh_token.return_value = {
+            'accessToken': 'new token',
+            'refreshToken': 'new refresh token',
+            'expiresOn': str(expires_on + timedelta(hours=1))
+        }
+        with mock.patch.dict('os.environ', {'AZURE_ACCESS_TOKEN_FILE': token_file}):
+            profile = Profile(cli_ctx=cli, storage={'subscriptions': None},
+                              auth_ctx_factory=lambda *_, **__: mock_context,
+                              use_global_creds_cache=False, async_persist=False)
+        profile._set_subscriptions(profile._normalize_properties(self.user1, [self.subscription1], False))
+        resource = token_entry['resource']
+
+        # the token expires in 10 minutes, after the lead time of 5 minutes
+        self.assertEqual(profile.refresh_tokens([resource], 5 * 60), [])
+        mock_context.acquire_token_with_refresh_token.assert_not_called()
+
+        # it expires within the lead time of 30 minutes
+        self.assertEqual(profile.refresh_tokens([resource], 30 * 60), [resource])
+        mock_context.acquire_token_with_refresh_token.assert_called_once_with('faked123', token_entry['_clientId'],
+                                                                              resource)
+        with open(token_file) as f:
+            tokens = json.load(f)
+        self.assertEqual(len(tokens), 1)
+        self.assertEqual(tokens[0]['accessToken'], 'new token')
+        self.assertEqual(tokens[0]['refreshToken'], 'new refresh token')
+        self.assertEqual(tokens[0]['resource'], resource)
+
+        # the token of a resource which was never requested is left to the command which requests it
+        self.assertEqual(profile.refresh_tokens(['https://graph.windows.net/'], 30 * 60), [])
+        mock_context.acquire_token.assert_not_called()
+
+        # the tokens are marked as being refreshed before they are refreshed, a command requesting one waits
+        mock_context.acquire_token.return_value = tokens[0]
+        refresh = profile.start_token_refresh([resource], 30 * 60)
+        with mock.patch('threading.Event.wait') as wait_mock:
+            profile.get_raw_token(resource)
+        wait_mock.assert_called_once_with(60)
+        refresh()
+        with mock.patch('threading.Event.wait') as wait_mock:
+            profile.get_raw_token(resource)
+        wait_mock.assert_not_called()
+
+    def test_flush_at_exit_waits_for_token_refreshes(self):
+        import threading
+        creds_cache = CredsCache(cli_ctx=TestCli(), async_persist=False)
+        creds_cache.start_token_refreshes(self.user1, 'tenant', ['resource1', 'resource2'])
+        for i, resource in enumerate(['resource1', 'resource2']):
+            timer = threading.Timer(0.05 * (i + 1), creds_cache.end_token_refresh, (self.user1, 'tenant', resource))
+            timer.start()
+            self.addCleanup(timer.cancel)
+        pending = []
+        with mock.patch.object(creds_cache, 'flush_to_disk',
+                               side_effect=lambda: pending.extend(creds_cache._token_refreshes._events)):
+            creds_cache._flush_at_exit()
+        self.assertEqual(pending, [])
+
     def test_service_principal_auth_client_secret(self):
         sp_auth = ServicePrincipalAuth('verySecret!')
         result = sp_auth.get_entry_to_persist('sp_id1', 'tenant1')
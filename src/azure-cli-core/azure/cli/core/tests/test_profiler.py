@@ -0,0 +1,93 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from azure.cli.core.profiler import (StartupProfiler, extract_profile_args, start_profiler, stop_profiler,
+                                     get_profiler, profile_phase)
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_extract_profile_args(self):
+        self.assertEqual(extract_profile_args(['vm', 'list', '-g', 'rg']),
+                         (['vm', 'list', '-g', 'rg'], False, None, 'json'))
+        self.assertEqual(extract_profile_args(['vm', 'list', '--profile-startup']),
+                         (['vm', 'list'], True, None, 'json'))
+        self.assertEqual(extract_profile_args(['--profile-startup=out.json', 'vm', 'list',
+                                               '--profile-startup-format', 'chrome']),
+                         (['vm', 'list'], True, 'out.json', 'chrome'))
+        with self.assertRaises(ValueError):
+            extract_profile_args(['--profile-startup', '--profile-startup-format=xml'])
+
+    def test_nested_phases(self):
+        profiler = StartupProfiler()
+        with profiler.phase('invoke'):
+            with profiler.phase('load_command_table'):
+                with profiler.phase('vm', 'command_module'):
+                    pass
+            with profiler.phase('handler'):
+                pass
+
+        result = profiler.to_dict()
+        self.assertEqual(sorted(result['phases']), ['handler', 'invoke', 'load_command_table'])
+        self.assertEqual(list(result['commandModules']), ['vm'])
+        tree = result['tree']
+        self.assertEqual(len(tree), 1)
+        self.assertEqual([c['name'] for c in tree[0]['children']], ['load_command_table', 'handler'])
+        self.assertEqual(tree[0]['children'][0]['children'][0]['category'], 'command_module')
+        self.assertGreaterEqual(tree[0]['duration'], tree[0]['self'])
+
+        trace = profiler.to_chrome_trace()
+        self.assertEqual(len(trace['traceEvents']), 4)
+        self.assertTrue(all(e['ph'] == 'X' and e['pid'] == os.getpid() for e in trace['traceEvents']))
+
+    def test_import_hook(self):
+        module_name = 'json.tool'
+        sys.modules.pop(module_name, None)
+        profiler = StartupProfiler()
+        profiler.install_import_hook()
+        try:
+            with profiler.phase('imports'):
+                import json.tool  # pylint: disable=unused-variable
+                import os.path  # pylint: disable=reimported
+        finally:
+            profiler.uninstall_import_hook()
+
+        imports = [i['name'] for i in profiler.to_dict()['imports']]
+        self.assertIn(module_name, imports)
+        # already loaded modules are not recorded
+        self.assertNotIn('os.path', imports)
+
+    def test_profile_phase(self):
+        self.assertIsNone(get_profiler())
+        with profile_phase('handler'):
+            pass
+
+        profiler = start_profiler()
+        try:
+            with profile_phase('handler'):
+                pass
+        finally:
+            self.assertIs(stop_profiler(), profiler)
+        self.assertIsNone(get_profiler())
+        self.assertEqual(list(profiler.to_dict()['phases']), ['handler'])
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            profiler.dump(path, 'chrome')
+            with open(path) as f:
+                self.assertEqual(json.load(f)['traceEvents'][0]['name'], 'handler')
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
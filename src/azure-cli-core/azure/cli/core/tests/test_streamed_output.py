@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import errno
+import json
+import sys
+import unittest
+
+import mock
+from six import StringIO
+
+from azure.cli.core import AzCommandsLoader
+from azure.cli.core.commands import CliCommandType
+from azure.cli.testsdk import TestCli
+
+# the number of items fetched by the sample commands
+fetched = []
+
+
+def sample_blob_list(count=250, fail_at=None):
+    for i in range(int(count)):
+        if fail_at is not None and i == int(fail_at):
+            raise ValueError('listing failed')
+        fetched.append(i)
+        yield {'name': 'blob{}'.format(i), 'index': i}
+
+
+def sample_blob_show():
+    return {'name': 'blob0'}
+
+
+def _upper_names(result):
+    return [dict(item, name=item['name'].upper()) for item in result]
+
+
+class _StreamingCommandsLoader(AzCommandsLoader):
+
+    def load_command_table(self, args):
+        test_type = CliCommandType(operations_tmpl='{}#{{}}'.format(__name__))
+        with self.command_group('test', test_type) as g:
+            g.command('list', 'sample_blob_list', transform=_upper_names)
+            g.command('show', 'sample_blob_show')
+            g.command('iterate', 'sample_blob_list')
+        return self.command_table
+
+    def load_arguments(self, command):
+        self.command_table[command].load_arguments()
+        self._update_command_definitions()  # pylint: disable=protected-access
+
+
+class _ClosedPipe(StringIO):
+
+    def write(self, s):
+        if s and self.tell() > 0:
+            raise IOError(errno.EPIPE, 'Broken pipe')
+        return StringIO.write(self, s)
+
+
+class TestStreamedOutput(unittest.TestCase):
+
+    def setUp(self):
+        del fetched[:]
+        self.cli = TestCli(commands_loader_cls=_StreamingCommandsLoader)
+
+    def _invoke(self, args, out_file=None):
+        out_file = out_file or StringIO()
+        exit_code = self.cli.invoke(args.split(), out_file=out_file)
+        return exit_code, out_file.getvalue()
+
+    def test_jsonl_streams_pages(self):
+        written = []
+        out_file = StringIO()
+
+        def _flush():
+            # the items fetched when a page is written
+            written.append(len(fetched))
+        out_file.flush = _flush
+
+        exit_code, output = self._invoke('test list -o jsonl', out_file)
+        self.assertEqual(exit_code, 0)
+        lines = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([item['index'] for item in lines], list(range(250)))
+        self.assertEqual(lines[0]['name'], 'BLOB0')
+        self.assertEqual(written, [100, 200, 250])
+
+    def test_jsonl_query_applies_to_each_page(self):
+        _, output = self._invoke('test list --count 5 -o jsonl --query [?index>`2`].name')
+        self.assertEqual(output.splitlines(), ['"BLOB3"', '"BLOB4"'])
+
+    def test_jsonl_query_is_not_left_registered(self):
+        self._invoke('test list --count 5 -o jsonl --query [].name')
+        _, output = self._invoke('test show -o json')
+        self.assertEqual(json.loads(output), {'name': 'blob0'})
+
+    def test_jsonl_stops_fetching_when_reader_is_gone(self):
+        exit_code, _ = self._invoke('test list --count 1000 -o jsonl', _ClosedPipe())
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(len(fetched), 200)
+
+    def test_jsonl_error_while_streaming(self):
+        with mock.patch('azure.cli.core.util.handle_exception', return_value=1) as handle_exception:
+            exit_code, output = self._invoke('test list --fail-at 150 -o jsonl')
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(len(output.splitlines()), 100)
+        self.assertEqual(str(handle_exception.call_args[0][0]), 'listing failed')
+
+    def test_other_formats_are_not_streamed(self):
+        _, output = self._invoke('test list --count 3 -o json')
+        self.assertEqual([item['name'] for item in json.loads(output)], ['BLOB0', 'BLOB1', 'BLOB2'])
+        _, output = self._invoke('test iterate --count 2 -o json')
+        self.assertEqual([item['name'] for item in json.loads(output)], ['blob0', 'blob1'])
+        _, output = self._invoke('test show -o jsonl')
+        self.assertEqual(output, '{"name": "blob0"}\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,10 +4,12 @@
 # --------------------------------------------------------------------------------------------
 
 from __future__ import print_function
+import os
 import sys
 import json
 import base64
 import binascii
+from contextlib import contextmanager
 import six
 
 from knack.log import get_logger
@@ -205,7 +207,6 @@ def hash_string(value, length=16, force_lower=False):
 
 
 def in_cloud_console():
-    import os
     return os.environ.get('ACC_CLOUD', None)
 
 
@@ -225,7 +226,6 @@ DISABLE_VERIFY_VARIABLE_NAME = "AZURE_CLI_DISABLE_CONNECTION_VERIFICATION"
 
 
 def should_disable_connection_verify():
-    import os
     return bool(os.environ.get(DISABLE_VERIFY_VARIABLE_NAME))
 
 
@@ -252,3 +252,64 @@ def sdk_no_wait(no_wait, func, *args, **kwargs):
     if no_wait:
         kwargs.update({'raw': True, 'polling': False})
     return func(*args, **kwargs)
+
+
+def get_file_stamp(path):
+    """ The inode, modification time and size of a file, to detect that another process wrote it, or None. """
+    try:
+        stat = os.stat(path)
+        # the file is replaced when it's written, so its inode changes too where there are inodes
+        return stat.st_ino, getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size
+    except OSError:
+        return None
+
+
+@contextmanager
+def file_lock(path):
+    """ Lock a file exclusively across processes, through a `.lock` file next to it. """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+        import msvcrt
+
+    try:
+        lock_file = open(path + '.lock', 'a')
+    except (IOError, OSError) as ex:
+        logger.debug("Unable to lock '%s': %s", path, ex)
+        yield
+        return
+
+    with lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_file_atomically(path, text, encoding=None):
+    """ Write a file readable by its owner only, replacing it at once so that no process reads it partially. """
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with os.fdopen(os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600), 'wb' if encoding else 'w+') \
+            as temp_file:
+        temp_file.write(text.encode(encoding) if encoding else text)
+    replace_file(temp_path, path)
+
+
+def replace_file(source, destination):
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)  # pylint: disable=no-member
+    else:
+        # Python 2 can't replace an existing file on Windows
+        if os.name == 'nt' and os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
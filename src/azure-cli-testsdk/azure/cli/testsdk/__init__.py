@@ -34,6 +34,7 @@ class TestCli(AzCli):
         from azure.cli.core.parser import AzCliCommandParser
         from azure.cli.core._config import GLOBAL_CONFIG_DIR, ENV_VAR_PREFIX
         from azure.cli.core._help import AzCliHelp
+        from azure.cli.core._output import AzOutputProducer
 
         from knack.completion import ARGCOMPLETE_ENV_NAME
 
@@ -45,6 +46,7 @@ class TestCli(AzCli):
             parser_cls=AzCliCommandParser,
             logging_cls=AzCliLogging,
             help_cls=AzCliHelp,
+            output_cls=AzOutputProducer,
             invocation_cls=AzCliCommandInvoker)
 
         self.data['headers'] = {}  # the x-ms-client-request-id is generated before a command is to execute
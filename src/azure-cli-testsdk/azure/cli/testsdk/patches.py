@@ -49,9 +49,21 @@ def patch_load_cached_subscriptions(unit_test):
             "tenantId": MOCKED_TENANT_ID,
             "isDefault": True}]
 
+    def _get_subscription_index(profile):
+        # Profile.get_subscription looks the subscriptions up through an index, which is built from the mocked ones
+        from azure.cli.core._session import SubscriptionIndex
+        subscriptions = []
+        for subscription in profile.load_cached_subscriptions():
+            subscription.setdefault('environmentName', profile.cli_ctx.cloud.name)
+            subscriptions.append(subscription)
+        return SubscriptionIndex(subscriptions)
+
     mock_in_unit_test(unit_test,
                       'azure.cli.core._profile.Profile.load_cached_subscriptions',
                       _handle_load_cached_subscription)
+    mock_in_unit_test(unit_test,
+                      'azure.cli.core._profile.Profile._get_subscription_index',
+                      _get_subscription_index)
 
 
 def patch_retrieve_token_for_user(unit_test):
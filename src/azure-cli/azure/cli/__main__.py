@@ -3,15 +3,65 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from __future__ import print_function
+
 import sys
 import uuid
 
-from knack.completion import ARGCOMPLETE_ENV_NAME
-from knack.log import get_logger
 
-from azure.cli.core import get_default_cli
+def _import_core_module(name):
+    """ Import a module of azure.cli.core which only depends on the standard library without running the __init__ of
+    azure.cli.core, which imports knack and the rest of the CLI. The module is registered under its full name so the
+    CLI uses the same module once it's loaded. """
+    import os
+    full_name = 'azure.cli.core.{}'.format(name)
+    if full_name in sys.modules:
+        return sys.modules[full_name]
+    for path in sys.modules['azure.cli'].__path__:
+        module_path = os.path.join(path, 'core', name + '.py')
+        if os.path.isfile(module_path):
+            break
+    else:
+        # e.g. an installation which only ships the compiled modules
+        import importlib
+        return importlib.import_module(full_name)
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp
+        return imp.load_source(full_name, module_path)
+    spec = spec_from_file_location(full_name, module_path)
+    module = module_from_spec(spec)
+    sys.modules[full_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+profiler_module = _import_core_module('profiler')
+extract_profile_args = profiler_module.extract_profile_args
+profile_phase = profiler_module.profile_phase
+
+# Start profiling before the rest of the CLI is imported.
+try:
+    cli_args, profile_enabled, profile_path, profile_format = extract_profile_args(sys.argv[1:])
+except ValueError as ex:
+    print('az: error: {}'.format(ex), file=sys.stderr)
+    sys.exit(2)
+profiler = profiler_module.start_profiler() if profile_enabled else None
+
+# Forward the invocation to the daemon, if it's running, before the rest of the CLI is imported. The daemon can't
+# profile the startup of this process.
+daemon_exit_code = None if profiler else _import_core_module('daemon').invoke_with_daemon(cli_args)
+if daemon_exit_code is not None:
+    sys.exit(daemon_exit_code)
+
+# pylint: disable=wrong-import-position
+from knack.completion import ARGCOMPLETE_ENV_NAME  # noqa: E402
+from knack.log import get_logger  # noqa: E402
+
+from azure.cli.core import get_default_cli  # noqa: E402
 
-import azure.cli.core.telemetry as telemetry
+import azure.cli.core.telemetry as telemetry  # noqa: E402
 
 
 # A workaround for https://bugs.python.org/issue32502 (https://github.com/Azure/azure-cli/issues/5184)
@@ -29,14 +79,18 @@ def cli_main(cli, args):
     return cli.invoke(args)
 
 
-az_cli = get_default_cli()
+with profile_phase('cli_init'):
+    az_cli = get_default_cli()
+if profiler:
+    profiler_module.profile_output(az_cli)
 
 telemetry.set_application(az_cli, ARGCOMPLETE_ENV_NAME)
 
 try:
     telemetry.start()
 
-    exit_code = cli_main(az_cli, sys.argv[1:])
+    with profile_phase('invoke'):
+        exit_code = cli_main(az_cli, cli_args)
 
     if exit_code and exit_code != 0:
         telemetry.set_failure()
@@ -49,3 +103,5 @@ except KeyboardInterrupt:
     sys.exit(1)
 finally:
     telemetry.conclude()
+    if profiler:
+        profiler.dump(profile_path, profile_format)
@@ -6,7 +6,6 @@
 # pylint: disable=unused-import
 
 from azure.cli.core import AzCommandsLoader
-import azure.cli.command_modules.ams._help
 
 
 class MediaServicesCommandsLoader(AzCommandsLoader):
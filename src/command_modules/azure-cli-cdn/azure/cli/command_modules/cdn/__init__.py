@@ -3,7 +3,6 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 # pylint: disable=unused-import
-import azure.cli.command_modules.cdn._help
 
 from azure.cli.core import AzCommandsLoader
 
@@ -5,8 +5,6 @@
 
 from azure.cli.core import AzCommandsLoader
 
-import azure.cli.command_modules.cognitiveservices._help  # pylint: disable=unused-import
-
 from azure.cli.command_modules.cognitiveservices._client_factory import cf_cognitive_service_accounts
 
 
@@ -12,8 +12,6 @@ from knack.util import CLIError
 from azure.cli.core import AzCommandsLoader
 from azure.cli.core.commands import CliCommandType
 
-import azure.cli.command_modules.extension._help  # pylint: disable=unused-import
-
 
 # pylint: disable=line-too-long
 class ExtensionCommandsLoader(AzCommandsLoader):
@@ -6,8 +6,6 @@
 from azure.cli.core import AzCommandsLoader
 from azure.cli.core.commands import CliCommandType
 
-import azure.cli.command_modules.feedback._help  # pylint: disable=unused-import
-
 
 class FeedbackCommandsLoader(AzCommandsLoader):
 
@@ -3,14 +3,12 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import yaml
-
-from knack.help_files import helps
-
 
 def build_command_table(cli_ctx):
     from azure.cli.core import MainCommandsLoader
-    cmd_table = MainCommandsLoader(cli_ctx).load_command_table(None)
+    from azure.cli.core._help_index import get_all_help_data
+    loader = MainCommandsLoader(cli_ctx)
+    cmd_table = loader.load_command_table(None)
     for command in cmd_table:
         cmd_table[command].load_arguments()
 
@@ -45,8 +43,7 @@ def build_command_table(cli_ctx):
         com_descip['parameters'] = param_descrip
         data[command] = com_descip
 
-    for command in helps:
-        diction_help = yaml.load(helps[command])
+    for command, diction_help in get_all_help_data(cli_ctx, loader).items():
         if command not in data:
             data[command] = {
                 'short-summary': diction_help.get(
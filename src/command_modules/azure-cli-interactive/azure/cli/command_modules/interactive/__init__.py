@@ -20,6 +20,21 @@ helps['interactive'] = """
                 For more information on interactive mode, see: https://azure.microsoft.com/en-us/blog/welcome-to-azure-cli-shell/
             """
 
+helps['batch-exec'] = """
+            type: command
+            short-summary: Run many az commands in a single process.
+            long-summary: >
+                Each line of the file is run as an az command, with or without the leading 'az'. Blank lines and
+                lines starting with '#' are skipped. The command modules, credentials and clients loaded by one line
+                are reused by the following ones. One JSON object with the line number, command, exit code and
+                result (or error) of each command is written per line, in the order of the file.
+            examples:
+                - name: Run the commands in a file.
+                  text: az batch-exec --file commands.txt
+                - name: Run the commands read from stdin, four at a time.
+                  text: cat commands.txt | az batch-exec --parallel 4
+            """
+
 
 class InteractiveCommandsLoader(AzCommandsLoader):
 
@@ -30,6 +45,9 @@ class InteractiveCommandsLoader(AzCommandsLoader):
 
         with self.command_group('', operations_tmpl='azure.cli.command_modules.interactive#{}') as g:
             g.command('interactive', 'start_shell')
+
+        with self.command_group('', operations_tmpl='azure.cli.command_modules.interactive.batch#{}') as g:
+            g.command('batch-exec', 'batch_exec')
         return self.command_table
 
     def load_arguments(self, _):
@@ -40,5 +58,12 @@ class InteractiveCommandsLoader(AzCommandsLoader):
             c.argument('style', options_list=['--style', '-s'], help='The colors of the shell.',
                        choices=style_options())
 
+        with self.argument_context('batch-exec') as c:
+            c.argument('commands_file', options_list=['--file', '-f'],
+                       help="File with one az command per line. Use '-' to read the commands from stdin.")
+            c.argument('parallel', type=int,
+                       help='Number of commands to run concurrently. Only use it for commands that are independent '
+                            'of each other.')
+
 
 COMMAND_LOADER_CLS = InteractiveCommandsLoader
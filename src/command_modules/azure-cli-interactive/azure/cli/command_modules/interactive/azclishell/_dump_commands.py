@@ -5,11 +5,10 @@
 
 import json
 import os
-import yaml
 
-from knack.help_files import helps
 from knack.log import get_logger
 from azure.cli.core import MainCommandsLoader
+from azure.cli.core._help_index import get_all_help_data
 from azure.cli.core.commands.arm import add_id_parameters
 
 
@@ -114,7 +113,7 @@ class FreshTable(object):
             except (ImportError, ValueError):
                 pass
 
-        load_help_files(cmd_table_data)
+        load_help_files(cmd_table_data, get_all_help_data(shell_ctx.cli_ctx, main_loader))
         elapsed = timeit.default_timer() - start_time
         logger.debug('Command table dumped: %s sec', elapsed)
         FreshTable.command_table = main_loader.command_table
@@ -125,11 +124,10 @@ class FreshTable(object):
             json.dump(cmd_table_data, help_file)
 
 
-def load_help_files(data):
+def load_help_files(data, help_data):
     """ loads all the extra information from help files """
-    for command_name, help_yaml in helps.items():
+    for command_name, help_entry in help_data.items():
 
-        help_entry = yaml.load(help_yaml)
         try:
             help_type = help_entry['type']
         except KeyError:
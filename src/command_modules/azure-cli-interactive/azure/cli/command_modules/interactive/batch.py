@@ -0,0 +1,126 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from __future__ import print_function
+
+import collections
+import copy
+import json
+import os
+import shlex
+import sys
+import types
+
+from knack.util import CLIError
+
+# commands which can't be nested in a batch
+_UNSUPPORTED_COMMANDS = ['batch-exec', 'interactive']
+
+
+def read_commands(commands_file):
+    """ Returns the (line number, command line) pairs of a command file, skipping blank lines and comments. """
+    if commands_file == '-':
+        content = sys.stdin.read()
+    else:
+        from azure.cli.core.util import read_file_content
+        content = read_file_content(os.path.expanduser(commands_file))
+    commands = []
+    for line_number, line in enumerate(content.splitlines(), 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            commands.append((line_number, line))
+    return commands
+
+
+def split_command(line):
+    args = shlex.split(line)
+    if args and args[0] == 'az':
+        args = args[1:]
+    if not args:
+        raise CLIError('no command given')
+    if args[0] in _UNSUPPORTED_COMMANDS:
+        raise CLIError("'{}' can't be run from a batch".format(args[0]))
+    return args
+
+
+def _clone_cli_ctx(cli_ctx):
+    # Each worker thread needs its own invocation state and event handlers, since handlers such as the one of
+    # --query are registered for a single invocation. The configuration and the loaded modules (and with them the
+    # credential cache and the service clients) are shared.
+    clone = copy.copy(cli_ctx)
+    clone.data = copy.deepcopy(cli_ctx.data)
+    clone._event_handlers = collections.defaultdict(list)  # pylint: disable=protected-access
+    for event_name, handlers in cli_ctx._event_handlers.items():  # pylint: disable=protected-access
+        clone._event_handlers[event_name] = list(handlers)  # pylint: disable=protected-access
+    return clone
+
+
+def _result_to_list(pages):
+    # a result streamed with --output jsonl is a generator of pages
+    result = []
+    for page in pages:
+        result.extend(page if isinstance(page, list) else [page])
+    return result
+
+
+def run_command(cli_ctx, line_number, line):
+    """ Runs a single command line and returns its outcome as a JSON serializable dictionary. """
+    entry = {'line': line_number, 'command': line, 'exitCode': 0, 'result': None}
+    try:
+        args = split_command(line)
+        # Every line gets a new invoker, so the command table is loaded again for each of them. This is cheap
+        # once the owning command module is imported and found from the command index; the table itself isn't
+        # reused as the invoker truncates it and loads the arguments of the command into it.
+        cli_ctx.invocation = cli_ctx.invocation_cls(cli_ctx=cli_ctx,
+                                                    parser_cls=cli_ctx.parser_cls,
+                                                    commands_loader_cls=cli_ctx.commands_loader_cls,
+                                                    help_cls=cli_ctx.help_cls)
+        cmd_result = cli_ctx.invocation.execute(args)
+        if cmd_result:
+            result = cmd_result.result
+            entry['result'] = _result_to_list(result) if isinstance(result, types.GeneratorType) else result
+    except SystemExit as ex:
+        # argument parsing errors and help requests
+        entry['exitCode'] = ex.code if isinstance(ex.code, int) else 1
+    except Exception as ex:  # pylint: disable=broad-except
+        entry['exitCode'] = cli_ctx.exception_handler(ex)
+        entry['error'] = str(ex)
+    return entry
+
+
+def batch_exec(cmd, commands_file='-', parallel=1):
+    if parallel < 1:
+        raise CLIError('usage error: --parallel must be a positive number.')
+    commands = read_commands(commands_file)
+    cli_ctx = cmd.cli_ctx
+    current_invocation = cli_ctx.invocation
+
+    def _write(entry):
+        print(json.dumps(entry, default=str), file=cli_ctx.out_file)
+        cli_ctx.out_file.flush()
+        return entry['exitCode']
+
+    try:
+        if parallel == 1 or len(commands) < 2:
+            exit_codes = [_write(run_command(cli_ctx, *command)) for command in commands]
+        else:
+            import threading
+            from concurrent.futures import ThreadPoolExecutor
+            local = threading.local()
+
+            def _run_in_worker(command):
+                if not hasattr(local, 'cli_ctx'):
+                    local.cli_ctx = _clone_cli_ctx(cli_ctx)
+                return run_command(local.cli_ctx, *command)
+
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                # results are written in the order of the file, as soon as they are available
+                exit_codes = [_write(entry) for entry in executor.map(_run_in_worker, commands)]
+    finally:
+        cli_ctx.invocation = current_invocation
+
+    failed = len([code for code in exit_codes if code])
+    if failed:
+        raise CLIError('{} of {} commands failed.'.format(failed, len(commands)))
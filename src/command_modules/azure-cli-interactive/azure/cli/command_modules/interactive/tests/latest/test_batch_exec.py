@@ -0,0 +1,98 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import collections
+import json
+import os
+import tempfile
+import unittest
+
+import mock
+import six
+
+from knack.util import CLIError
+
+from azure.cli.command_modules.interactive.batch import read_commands, split_command, batch_exec, _clone_cli_ctx
+
+
+class BatchExecTest(unittest.TestCase):
+
+    def _write_commands(self, content):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_read_commands(self):
+        path = self._write_commands('az group list\n\n# a comment\n  storage account list -g rg  \n')
+        self.assertEqual(read_commands(path), [(1, 'az group list'), (4, 'storage account list -g rg')])
+
+    def test_split_command(self):
+        self.assertEqual(split_command('az vm list -g "my group"'), ['vm', 'list', '-g', 'my group'])
+        self.assertEqual(split_command('vm list'), ['vm', 'list'])
+        with self.assertRaises(CLIError):
+            split_command('az')
+        with self.assertRaises(CLIError):
+            split_command('az batch-exec -f other.txt')
+
+    def _run_batch(self, content, parallel):
+        path = self._write_commands(content)
+        out = six.StringIO()
+        cmd = mock.MagicMock()
+        cmd.cli_ctx.out_file = out
+        cmd.cli_ctx.data = {}
+        cmd.cli_ctx.exception_handler.return_value = 1
+
+        def _invocation(cli_ctx, **_):
+            invocation = mock.MagicMock()
+
+            def _execute(args):
+                if args[0] == 'fail':
+                    raise CLIError('failed')
+                if args[0] == 'stream':
+                    return mock.MagicMock(result=(page for page in [args[:2], args[2:], {'last': True}]))
+                return mock.MagicMock(result=args)
+            invocation.execute.side_effect = _execute
+            return invocation
+
+        cmd.cli_ctx.invocation_cls.side_effect = _invocation
+        error = None
+        try:
+            batch_exec(cmd, path, parallel)
+        except CLIError as ex:
+            error = ex
+        return [json.loads(line) for line in out.getvalue().splitlines()], error
+
+    def test_batch_exec(self):
+        for parallel in [1, 3]:
+            entries, error = self._run_batch('group list\nfail now\naz vm list\nvm show -n "a b"\n', parallel)
+            self.assertEqual([e['line'] for e in entries], [1, 2, 3, 4])
+            self.assertEqual([e['exitCode'] for e in entries], [0, 1, 0, 0])
+            self.assertEqual(entries[1]['error'], 'failed')
+            self.assertEqual(entries[3]['result'], ['vm', 'show', '-n', 'a b'])
+            self.assertEqual(str(error), '1 of 4 commands failed.')
+
+        entries, error = self._run_batch('stream list a b\n', 1)
+        self.assertEqual(entries[0]['result'], ['stream', 'list', 'a', 'b', {'last': True}])
+
+        entries, error = self._run_batch('group list\n', 1)
+        self.assertEqual(len(entries), 1)
+        self.assertIsNone(error)
+
+    def test_clone_cli_ctx(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.data = {'command': 'group list'}
+        cli_ctx._event_handlers = collections.defaultdict(list, {'filter': ['handler']})
+        clone = _clone_cli_ctx(cli_ctx)
+        clone.data['command'] = 'vm list'
+        clone._event_handlers['filter'].append('query_handler')
+        clone._event_handlers['other'].append('other_handler')
+        self.assertEqual(cli_ctx.data, {'command': 'group list'})
+        self.assertEqual(dict(cli_ctx._event_handlers), {'filter': ['handler']})
+
+
+if __name__ == '__main__':
+    unittest.main()
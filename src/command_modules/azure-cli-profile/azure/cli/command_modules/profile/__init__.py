@@ -8,7 +8,6 @@ from azure.cli.core.commands import CliCommandType
 
 from azure.cli.command_modules.profile._completers import get_subscription_id_list
 from azure.cli.command_modules.profile._format import transform_account_list
-import azure.cli.command_modules.profile._help  # pylint: disable=unused-import
 
 
 class ProfileCommandsLoader(AzCommandsLoader):
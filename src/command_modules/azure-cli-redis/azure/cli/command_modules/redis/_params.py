@@ -6,7 +6,6 @@
 # pylint: disable=line-too-long
 
 from azure.cli.core.commands.parameters import get_resource_name_completion_list, name_type, tags_type
-import azure.cli.command_modules.redis._help  # pylint: disable=unused-import
 from azure.cli.command_modules.redis._validators import JsonString, ScheduleEntryList
 
 from azure.mgmt.redis.models.redis_management_client_enums import RebootType, RedisKeyType, SkuName
@@ -7,8 +7,6 @@ from azure.cli.core import AzCommandsLoader
 from azure.cli.core.profiles import ResourceType
 from azure.cli.core.commands import AzCommandGroup, AzArgumentContext
 
-import azure.cli.command_modules.storage._help  # pylint: disable=unused-import
-
 
 class StorageCommandsLoader(AzCommandsLoader):
     def __init__(self, cli_ctx=None):
@@ -157,10 +155,13 @@ class StorageCommandGroup(AzCommandGroup):
 
     def _register_data_plane_account_arguments(self, command_name):
         """ Add parameters required to create a storage client """
+        from azure.cli.command_modules.storage._account_cache import invalidate_on_authentication_failure
         from azure.cli.command_modules.storage._validators import validate_client_parameters
         command = self.command_loader.command_table.get(command_name, None)
         if not command:
             return
+        command.exception_handler = invalidate_on_authentication_failure(self.command_loader.cli_ctx,
+                                                                         command.exception_handler)
 
         group_name = 'Storage Account'
         command.add_argument('account_name', '--account-name', required=False, default=None,
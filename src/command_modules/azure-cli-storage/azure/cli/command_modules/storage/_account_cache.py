@@ -0,0 +1,153 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Local cache of the storage accounts resolved from their name, so that the data plane commands given only an
+account name don't list the storage accounts of the subscription and their keys on every invocation.
+
+The resource id of an account is kept until it's found to be stale, its key for `storage.account_cache_ttl` seconds
+(default: 1 hour, 0 disables the cache). The file is only readable by its owner, like the token cache.
+"""
+
+import os
+import time
+
+from azure.cli.core._session import Session
+from azure.cli.core.commands.client_factory import get_mgmt_service_client
+from azure.cli.core.profiles import ResourceType, get_sdk
+
+ACCOUNT_CACHE_FILE = 'storageAccountCache.json'
+DEFAULT_TTL = 3600
+
+# the account whose cached key is used by the current command
+_CACHED_KEY_ACCOUNT = 'storage_cached_key_account'
+
+
+class StorageAccountCache(object):
+
+    def __init__(self, cli_ctx):
+        self.cli_ctx = cli_ctx
+        self.ttl = cli_ctx.config.getint('storage', 'account_cache_ttl', fallback=DEFAULT_TTL)
+        self._session = None
+        self._subscription_id = None
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _load(self):
+        if self._session is None:
+            path = os.path.join(self.cli_ctx.config.config_dir, ACCOUNT_CACHE_FILE)
+            if not os.path.exists(path):
+                with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600), 'w') as f:
+                    f.write('{}')
+            self._session = Session()
+            self._session.load(path)
+        return self._session
+
+    def _key(self, account_name):
+        if self._subscription_id is None:
+            from azure.cli.core._profile import Profile
+            self._subscription_id = Profile(cli_ctx=self.cli_ctx).get_subscription_id()
+        return '{}/{}'.format(self._subscription_id, account_name)
+
+    def get(self, account_name):
+        """ The cached resource id and key of an account. The key is None when it has expired. """
+        if not self.enabled:
+            return None, None
+        entry = self._load().get(self._key(account_name))
+        if not entry:
+            return None, None
+        key = entry.get('key') if time.time() - entry.get('keyCachedOn', 0) < self.ttl else None
+        if key:
+            self.cli_ctx.data[_CACHED_KEY_ACCOUNT] = account_name
+        return entry.get('id'), key
+
+    def set(self, account_name, account_id, key):
+        if not self.enabled:
+            return
+        session = self._load()
+        session[self._key(account_name)] = {'id': account_id, 'key': key, 'keyCachedOn': time.time()}
+
+    def remove(self, account_name):
+        if not self.enabled:
+            return
+        session = self._load()
+        if session.get(self._key(account_name)) is not None:
+            del session[self._key(account_name)]
+
+    def purge(self, account_name=None):
+        """ Remove an account from the cache, in all subscriptions, or all of them. """
+        session = self._load()
+        for key in list(session):
+            if account_name is None or key.rsplit('/', 1)[-1] == account_name:
+                del session.data[key]
+        session.save_with_retry()
+
+
+def invalidate_on_authentication_failure(cli_ctx, exception_handler=None):
+    """ An exception handler for the data plane commands. When the service rejected the request with a 403 while the
+    command used a cached account key, the key was probably regenerated and is removed from the cache.
+    """
+    def handler(ex):
+        account_name = cli_ctx.data.get(_CACHED_KEY_ACCOUNT)
+        if account_name and getattr(ex, 'status_code', None) == 403:
+            from knack.log import get_logger
+            StorageAccountCache(cli_ctx).remove(account_name)
+            get_logger(__name__).warning("The cached key of storage account '%s' was rejected and has been removed "
+                                         "from the cache. Run the command again to query the current key.",
+                                         account_name)
+        if exception_handler is None:
+            raise ex
+        exception_handler(ex)
+
+    return handler
+
+
+def query_account_key(cli_ctx, account_name):
+    """Query the storage account key. This is used when the customer doesn't offer account key but name."""
+    from msrestazure.azure_exceptions import CloudError
+    from msrestazure.tools import parse_resource_id
+
+    cache = StorageAccountCache(cli_ctx)
+    account_id, key = cache.get(account_name)
+    if key:
+        return key
+
+    scf = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_STORAGE)
+    if account_id:
+        # the resource group is known, get the keys directly
+        try:
+            key = _list_account_key(cli_ctx, scf, parse_resource_id(account_id)['resource_group'], account_name)
+        except CloudError as ex:
+            if ex.status_code != 404:
+                raise
+            # the account was deleted or moved since it was cached
+            account_id = None
+
+    if not account_id:
+        acc = next((x for x in scf.storage_accounts.list() if x.name == account_name), None)
+        if not acc:
+            cache.remove(account_name)
+            raise ValueError("Storage account '{}' not found.".format(account_name))
+        account_id = acc.id
+        key = _list_account_key(cli_ctx, scf, parse_resource_id(acc.id)['resource_group'], account_name)
+
+    cache.set(account_name, account_id, key)
+    return key
+
+
+def _list_account_key(cli_ctx, scf, resource_group_name, account_name):
+    t_storage_account_keys, t_storage_account_list_keys_results = get_sdk(
+        cli_ctx,
+        ResourceType.MGMT_STORAGE,
+        'models.storage_account_keys#StorageAccountKeys',
+        'models.storage_account_list_keys_result#StorageAccountListKeysResult')
+
+    keys = scf.storage_accounts.list_keys(resource_group_name, account_name)
+    if t_storage_account_keys:
+        return keys.key1
+    if t_storage_account_list_keys_results:
+        return keys.keys[0].value  # pylint: disable=no-member
+    return None
@@ -0,0 +1,100 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Local cache of the MD5 of the files compared with blobs, so that a large file which didn't change is not read again
+every time it's uploaded, downloaded or synchronized.
+
+The MD5 of a file is kept in an SQLite database with the size and the modification time of the file it was computed
+from, and is computed again when either of them changed. Entries which were not used for `storage.hash_cache_days`
+days (default: 30, 0 disables the cache) are removed.
+"""
+
+import os
+import threading
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+HASH_CACHE_FILE = 'storageHashCache.db'
+DEFAULT_RETENTION_DAYS = 30
+
+# a file modified this recently may still be written in the same mtime tick, its MD5 is not cached
+MIN_FILE_AGE = 2
+
+
+class FileHashCache(object):
+
+    def __init__(self, cli_ctx):
+        self.cli_ctx = cli_ctx
+        self.retention_days = cli_ctx.config.getint('storage', 'hash_cache_days', fallback=DEFAULT_RETENTION_DAYS)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.retention_days > 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _connect(self):
+        if self._connection is None and self.enabled:
+            try:
+                import sqlite3
+                path = os.path.join(self.cli_ctx.config.config_dir, HASH_CACHE_FILE)
+                if not os.path.exists(path):
+                    os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+                # the connection is shared by the workers of a batch, its use is serialized by the lock
+                self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+                self._connection.execute('CREATE TABLE IF NOT EXISTS file_md5 (path TEXT PRIMARY KEY, size INTEGER, '
+                                         'mtime REAL, md5 TEXT, used REAL)')
+            except Exception as ex:  # pylint: disable=broad-except
+                # e.g. a Python built without sqlite3 or a corrupted database, the files are hashed every time
+                logger.debug('the file hash cache is not available: %s', ex)
+                self.retention_days = 0
+        return self._connection
+
+    def get_md5(self, file_path):
+        """ The base64 encoded MD5 of a local file, read from the cache when the file didn't change. """
+        from azure.cli.command_modules.storage.util import compute_file_md5
+
+        path = os.path.realpath(file_path)
+        stat = os.stat(path)
+        now = time.time()
+        with self._lock:
+            row = self._execute('SELECT size, mtime, md5 FROM file_md5 WHERE path = ?', (path,))
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+                self._execute('UPDATE file_md5 SET used = ? WHERE path = ?', (now, path))
+                return row[2]
+
+        md5 = compute_file_md5(path)
+        if now - stat.st_mtime >= MIN_FILE_AGE:
+            with self._lock:
+                self._execute('INSERT OR REPLACE INTO file_md5 VALUES (?, ?, ?, ?, ?)',
+                              (path, stat.st_size, stat.st_mtime, md5, now))
+        return md5
+
+    def _execute(self, statement, parameters):
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            with connection:
+                return connection.execute(statement, parameters).fetchone()
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug('failed to access the file hash cache: %s', ex)
+            return None
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._execute('DELETE FROM file_md5 WHERE used < ?', (time.time() - self.retention_days * 86400,))
+                self._connection.close()
+                self._connection = None
@@ -27,10 +27,36 @@ helps['storage entity insert'] = """
           short-summary: The server timeout, expressed in seconds.
 """
 
+helps['storage entity insert-batch'] = """
+    type: command
+    short-summary: Insert the entities of a JSON lines or CSV file into a table.
+    long-summary: >
+        The entities are read as a stream and grouped by PartitionKey into batches of up to 100 entities. The
+        batches of different partitions are committed in parallel, those of a partition one after the other, so an
+        entity given more than once gets its last value. A batch is inserted atomically: when one of its entities
+        can't be inserted, none of them is. A batch failing with a transient error is retried.
+    parameters:
+        - name: --table-name -t
+          type: string
+          short-summary: The name of the table to insert the entities into.
+        - name: --if-exists
+          type: string
+          short-summary: Behavior when an entity already exists for the specified PartitionKey and RowKey.
+    examples:
+        - name: Insert or replace the entities of a JSON lines file, one JSON object per line.
+          text: az storage entity insert-batch -t MyTable -s entities.jsonl --if-exists replace
+        - name: Insert the rows of a CSV file read from the standard input.
+          text: cat entities.csv | az storage entity insert-batch -t MyTable -s - --format csv
+"""
+
 helps['storage blob upload'] = """
     type: command
     short-summary: Upload a file to a storage blob.
-    long-summary: Creates a new blob from a file path, or updates the content of an existing blob with automatic chunking and progress notifications.
+    long-summary: >
+        Creates a new blob from a file path, or updates the content of an existing blob with automatic chunking and
+        progress notifications. With `--file -` the standard input is uploaded as it is read, in blocks of 4 MB growing
+        up to 64 MB for very large streams, up to --max-connections blocks at a time. The blob is only created or
+        replaced once the whole stream has been uploaded.
     parameters:
         - name: --type -t
           short-summary: Defaults to 'page' for *.vhd files, or 'block' otherwise.
@@ -45,6 +71,10 @@ helps['storage blob upload'] = """
     examples:
         - name: Upload to a blob.
           text: az storage blob upload -f /path/to/file -c MyContainer -n MyBlob
+        - name: Upload a file unless the blob has the same content already.
+          text: az storage blob upload -f /path/to/file -c MyContainer -n MyBlob --if-changed
+        - name: Upload the output of a command, without staging it on the disk.
+          text: tar -cz /data | az storage blob upload -f - -c MyContainer -n data.tar.gz --max-connections 4
 """
 
 helps['storage file upload'] = """
@@ -178,6 +208,24 @@ helps['storage account keys list'] = """
           text: az storage account keys list -g MyResourceGroup -n MyStorageAccount
 """
 
+helps['storage account cache'] = """
+    type: group
+    short-summary: Manage the local cache of storage account keys.
+    long-summary: >
+        When a data plane command is given an account name but no key, SAS token or connection string, the resource
+        id and the key of the account are queried and cached locally. Keys are cached for `account_cache_ttl` seconds
+        of the `storage` configuration section (default 3600, 0 disables the cache) and are removed when the service
+        rejects them.
+"""
+
+helps['storage account cache purge'] = """
+    type: command
+    short-summary: Remove storage accounts from the local cache.
+    examples:
+        - name: Remove the cached key of a storage account after regenerating it.
+          text: az storage account cache purge -n MyStorageAccount
+"""
+
 helps['storage blob'] = """
     type: group
     short-summary: Manage object storage for unstructured data (blobs).
@@ -197,6 +245,9 @@ helps['storage blob list'] = """
     parameters:
         - name: --include
           short-summary: 'Specifies additional datasets to include: (c)opy-info, (m)etadata, (s)napshots, (d)eleted-soft. Can be combined.'
+    examples:
+        - name: Write the names of the blobs of a large container as they are listed, one JSON value per line.
+          text: az storage blob list -c MyContainer -o jsonl --query [].name
 """
 
 helps['storage blob copy'] = """
@@ -256,6 +307,12 @@ helps['storage blob set-tier'] = """
 helps['storage blob upload-batch'] = """
     type: command
     short-summary: Upload files from a local directory to a blob container.
+    long-summary: >
+        Files are uploaded in parallel, smallest first. A file whose upload fails with a transient error is retried,
+        and the failure of a file doesn't stop the upload of the others. Use --journal to resume an interrupted or
+        partially failed batch without uploading the completed files again, or --if-changed to skip the files whose
+        blobs have the same content. The MD5 of the files is cached locally with their size and modification time,
+        so that a file is only read again when it changed.
     parameters:
         - name: --source -s
           type: string
@@ -290,11 +347,30 @@ helps['storage blob upload-batch'] = """
           short-summary: The max length in bytes permitted for an append blob.
         - name: --lease-id
           short-summary: Required if the blob has an active lease
+    examples:
+        - name: Upload a directory with 32 parallel uploads, recording the progress in a journal.
+          text: az storage blob upload-batch -d mycontainer -s ./site --max-workers 32 --journal ./site-upload.journal
+        - name: Upload only the files of a directory which changed since they were last uploaded.
+          text: az storage blob upload-batch -d mycontainer -s ./artifacts --if-changed
+"""
+
+helps['storage blob sync'] = """
+    type: command
+    short-summary: Synchronize a local directory to a blob container.
+    long-summary: >
+        Only the files which are not in the container, or whose blob has a different size, or which were modified
+        after their blob was uploaded and have a different MD5, are uploaded. The container is listed page by page.
+    examples:
+        - name: Upload the new and changed files of a directory and delete the blobs of deleted files.
+          text: az storage blob sync -s ./site -c mycontainer --delete-destination
 """
 
 helps['storage blob download-batch'] = """
     type: command
     short-summary: Download blobs from a blob container recursively.
+    long-summary: >
+        The container is listed first, to check that no two blobs have the same local path, and the blobs are then
+        downloaded in parallel. A blob is skipped when the local file already has its size and MD5.
     parameters:
         - name: --source -s
           type: string
@@ -315,6 +391,7 @@ helps['storage blob download-batch'] = """
 helps['storage blob delete-batch'] = """
     type: command
     short-summary: Delete blobs from a blob container recursively.
+    long-summary: Blobs are deleted in parallel while the container is listed.
     parameters:
         - name: --source -s
           type: string
@@ -342,6 +419,11 @@ helps['storage blob delete-batch'] = """
 helps['storage blob copy start-batch'] = """
     type: command
     short-summary: Copy multiple blobs or files to a blob container.
+    long-summary: >
+        The copies are started in parallel and the service copies the data asynchronously. With --wait, the command
+        tracks the copies until they complete: a copy which failed on the service is started again, and the number of
+        blobs and bytes copied, the throughput and the failures are reported. Use --journal to resume an interrupted
+        or partially failed batch without copying the completed blobs again.
     parameters:
         - name: --destination-container
           type: string
@@ -371,6 +453,9 @@ helps['storage blob copy start-batch'] = """
         - name: --source-sas
           type: string
           short-summary: The shared access signature for the source storage account.
+    examples:
+        - name: Copy the blobs of a container to another account and wait until the copies complete.
+          text: az storage blob copy start-batch --destination-container backup --source-account-name mysourceaccount --source-container data --wait --journal ./backup.journal
 """
 
 helps['storage container'] = """
@@ -486,6 +571,9 @@ helps['storage entity query'] = """
                         specified and that generator has finished enumerating results. If
                         specified, this generator will begin returning results from the
                         point where the previous generator stopped.
+    examples:
+        - name: Write all the entities of a partition as they are queried, one JSON document per line.
+          text: az storage entity query -t MyTable --filter "PartitionKey eq 'p1'" -o jsonl
 """
 
 helps['storage file'] = """
@@ -520,6 +608,10 @@ helps['storage file metadata'] = """
 helps['storage file upload-batch'] = """
     type: command
     short-summary: Upload files from a local directory to an Azure Storage File Share in a batch operation.
+    long-summary: >
+        The directories of the destination are created first, each of them once, then the files are uploaded in
+        parallel. A file whose upload fails with a transient error is retried, and the failure of a file doesn't stop
+        the upload of the others.
     parameters:
         - name: --source -s
           type: string
@@ -659,6 +751,35 @@ helps['storage message'] = """
     short-summary: Manage queue storage messages.
 """
 
+helps['storage message put-batch'] = """
+    type: command
+    short-summary: Put the lines of a file into a queue, one message per line.
+    long-summary: >
+        The lines are read as a stream and put in parallel, so the source can be the output of another command. Empty
+        lines are skipped. A message failing with a transient error is retried. Shows the number of messages sent and
+        the throughput.
+    examples:
+        - name: Put the lines of a file as messages which expire after an hour.
+          text: az storage message put-batch -q MyQueue -s messages.txt --time-to-live 3600
+        - name: Put the messages read from the standard input.
+          text: cat messages.txt | az storage message put-batch -q MyQueue -s -
+"""
+
+helps['storage message drain'] = """
+    type: command
+    short-summary: Receive and delete the messages of a queue until it is empty.
+    long-summary: >
+        Messages are received in batches of up to 32 by parallel requests, and each message is deleted once it has
+        been written to the output, which requires --output jsonl. A message whose deletion failed, or received when
+        the command was interrupted, is visible again after the visibility timeout. The number of messages and the
+        throughput are logged with --verbose.
+    examples:
+        - name: Save the messages of a queue to a file, one JSON object per line.
+          text: az storage message drain -q MyQueue -o jsonl > messages.jsonl
+        - name: Receive up to 1000 messages, invisible to the other consumers for 5 minutes until they are deleted.
+          text: az storage message drain -q MyQueue --max-messages 1000 --visibility-timeout 300 -o jsonl
+"""
+
 helps['storage metrics'] = """
     type: group
     short-summary: Manage storage service metrics.
@@ -59,6 +59,14 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
                                     action='store_true', validator=add_progress_callback)
     socket_timeout_type = CLIArgumentType(help='The socket timeout(secs), used by the service to regulate data flow.',
                                           type=int)
+    max_workers_type = CLIArgumentType(help='The maximum number of files or blobs transferred in parallel.', type=int,
+                                       arg_group='Batch Transfer')
+    retries_type = CLIArgumentType(help='The number of times the transfer of a file or blob is retried after a '
+                                        'transient failure.', type=int, arg_group='Batch Transfer')
+    journal_type = CLIArgumentType(help='A local file which records the completed transfers. When the command is '
+                                        'run again with the same journal, the files which were transferred and have '
+                                        'not changed since are skipped.', type=file_type, completer=FilesCompleter(),
+                                   arg_group='Batch Transfer')
 
     sas_help = 'The permissions the SAS grants. Allowed values: {}. Do not use if a stored access policy is ' \
                'referenced with --id that specifies this value. Can be combined.'
@@ -152,6 +160,10 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
     with self.argument_context('storage account keys list') as c:
         c.argument('account_name', acct_name_type, id_part=None)
 
+    with self.argument_context('storage account cache purge') as c:
+        c.argument('account_name', acct_name_type, options_list=['--name', '-n'], id_part=None,
+                   help='The storage account to remove from the cache. Default: all accounts.')
+
     with self.argument_context('storage account network-rule') as c:
         from ._validators import validate_subnet
         c.argument('storage_account_name', acct_name_type, id_part=None)
@@ -246,7 +258,8 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         t_blob_content_settings = self.get_sdk('blob.models#ContentSettings')
         c.register_content_settings_argument(t_blob_content_settings, update=False)
 
-        c.argument('file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter())
+        c.argument('file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(),
+                   help='Path of the file to upload, or - to upload the standard input as a block blob.')
         c.argument('max_connections', type=int)
         c.argument('blob_type', options_list=('--type', '-t'), validator=validate_blob_type,
                    arg_type=get_enum_type(get_blob_types()))
@@ -259,6 +272,8 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('tier', validator=page_blob_tier_validator,
                    arg_type=get_enum_type(get_blob_tier_names(self.cli_ctx, 'PremiumPageBlobTier')),
                    min_api='2017-04-17')
+        c.argument('if_changed', action='store_true',
+                   help='Skip the upload when the blob has the size and the MD5 of the file.')
 
     with self.argument_context('storage blob upload-batch') as c:
         from .sdkutil import get_blob_types
@@ -275,6 +290,11 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('maxsize_condition', arg_group='Content Control')
         c.argument('validate_content', action='store_true', min_api='2016-05-31', arg_group='Content Control')
         c.argument('blob_type', options_list=('--type', '-t'), arg_type=get_enum_type(get_blob_types()))
+        c.argument('max_workers', max_workers_type)
+        c.argument('retries', retries_type)
+        c.argument('journal', journal_type)
+        c.argument('if_changed', action='store_true', arg_group='Content Control',
+                   help='Skip the files whose blobs have the same size and MD5.')
         c.extra('no_progress', progress_type)
         c.extra('socket_timeout', socket_timeout_type)
 
@@ -297,6 +317,27 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.extra('socket_timeout', socket_timeout_type)
         c.argument('max_connections', type=int,
                    help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+        c.argument('max_workers', max_workers_type)
+        c.argument('retries', retries_type)
+
+    with self.argument_context('storage blob sync') as c:
+        from ._validators import process_blob_sync_parameters
+        c.argument('source', options_list=('--source', '-s'), validator=process_blob_sync_parameters,
+                   help='The directory where the files to be synchronized are located.')
+        c.argument('destination_path', options_list=('--destination-path', '-d'),
+                   help='The path under the container where the blobs are synchronized. Default: the container root.')
+        c.argument('pattern', help='The pattern used for globbing the files to synchronize. The supported patterns '
+                                   "are '*', '?', '[seq]', and '[!seq]'.")
+        c.argument('delete_destination', action='store_true',
+                   help='Delete the blobs under the destination path which have no local file.')
+        c.argument('blob_type', options_list=('--type', '-t'), arg_type=get_enum_type(['block', 'page']),
+                   help='The type of the uploaded blobs.')
+        c.argument('max_connections', type=int,
+                   help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+        c.argument('dryrun', action='store_true',
+                   help='Show the blobs which would be uploaded or deleted, without changing them.')
+        c.argument('max_workers', max_workers_type)
+        c.argument('retries', retries_type)
 
     with self.argument_context('storage blob delete') as c:
         from .sdkutil import get_delete_blob_snapshot_type_names
@@ -310,6 +351,8 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('delete_snapshots', arg_type=get_enum_type(get_delete_blob_snapshot_type_names()),
                    help='Required if the blob has associated snapshots.')
         c.argument('lease_id', help='Required if the blob has an active lease.')
+        c.argument('max_workers', max_workers_type)
+        c.argument('retries', retries_type)
 
     with self.argument_context('storage blob lease') as c:
         c.argument('lease_duration', type=int)
@@ -346,6 +389,13 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source_share')
         c.argument('prefix', validator=process_blob_copy_batch_namespace)
 
+    with self.argument_context('storage blob copy start-batch') as c:
+        c.argument('max_workers', max_workers_type)
+        c.argument('retries', retries_type)
+        c.argument('journal', journal_type)
+        c.argument('wait', action='store_true', arg_group='Batch Transfer',
+                   help='Wait until the service has completed the copies and show the statistics of the batch.')
+
     with self.argument_context('storage blob incremental-copy start') as c:
         from azure.cli.command_modules.storage._validators import process_blob_source_uri
 
@@ -564,6 +614,8 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('max_connections', arg_group='Download Control', type=int)
         c.argument('validate_content', action='store_true', min_api='2016-05-31')
         c.register_content_settings_argument(t_file_content_settings, update=False, arg_group='Content Settings')
+        c.argument('max_workers', max_workers_type)
+        c.argument('retries', retries_type)
         c.extra('no_progress', progress_type)
 
     with self.argument_context('storage file download-batch') as c:
@@ -653,6 +705,26 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('message_id', options_list='--id')
         c.argument('content', type=unicode_string, help='Message content, up to 64KB in size.')
 
+    with self.argument_context('storage message put-batch') as c:
+        c.argument('source', options_list=('--source', '-s'),
+                   help='A file of messages, one per line, or - to read them from the standard input.')
+        c.argument('visibility_timeout', type=int,
+                   help='The number of seconds the messages are invisible after they are put. Default: 0.')
+        c.argument('time_to_live', type=int,
+                   help='The number of seconds the messages are kept in the queue. Default: 7 days.')
+        c.argument('max_workers', max_workers_type, help='The maximum number of messages put in parallel.')
+        c.argument('retries', retries_type, help='The number of times a message is retried after a transient failure.')
+
+    with self.argument_context('storage message drain') as c:
+        c.argument('batch_size', type=int, arg_group='Batch Transfer',
+                   help='The number of messages requested by each get request, up to 32.')
+        c.argument('visibility_timeout', type=int,
+                   help='The number of seconds a message received is invisible to the other consumers, until it is '
+                        'deleted. Default: 30.')
+        c.argument('max_messages', type=int, help='The maximum number of messages to receive. Default: all of them.')
+        c.argument('max_workers', max_workers_type, help='The maximum number of get requests in flight.')
+        c.argument('retries', retries_type, help='The number of times a request is retried after a transient failure.')
+
     with self.argument_context('storage table') as c:
         c.argument('table_name', table_name_type, options_list=('--name', '-n'))
 
@@ -695,6 +767,17 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
     with self.argument_context('storage entity insert') as c:
         c.argument('if_exists', arg_type=get_enum_type(['fail', 'merge', 'replace']))
 
+    with self.argument_context('storage entity insert-batch') as c:
+        c.argument('source', options_list=('--source', '-s'),
+                   help='A file of entities, one per line, or - to read them from the standard input. Each entity '
+                        'must have a PartitionKey and a RowKey.')
+        c.argument('source_format', options_list='--format', arg_type=get_enum_type(['jsonl', 'csv']),
+                   help='The format of the entities: JSON objects or CSV with a header row. Default: csv for a .csv '
+                        'file, jsonl otherwise.')
+        c.argument('if_exists', arg_type=get_enum_type(['fail', 'merge', 'replace']))
+        c.argument('max_workers', max_workers_type, help='The maximum number of batches committed in parallel.')
+        c.argument('retries', retries_type, help='The number of times a batch is retried after a transient failure.')
+
     with self.argument_context('storage entity query') as c:
         c.argument('accept', default='minimal', validator=validate_table_payload_format,
                    arg_type=get_enum_type(['none', 'minimal', 'full']),
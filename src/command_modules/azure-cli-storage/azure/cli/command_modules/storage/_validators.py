@@ -5,10 +5,10 @@
 
 # pylint: disable=protected-access
 
-from azure.cli.core.commands.client_factory import get_mgmt_service_client
 from azure.cli.core.commands.validators import validate_key_value_pairs
 from azure.cli.core.profiles import ResourceType, get_sdk
 
+from azure.cli.command_modules.storage._account_cache import query_account_key
 from azure.cli.command_modules.storage._client_factory import get_storage_data_service_client
 from azure.cli.command_modules.storage.util import glob_files_locally, guess_content_type
 from azure.cli.command_modules.storage.sdkutil import get_table_data_type
@@ -17,32 +17,6 @@ from azure.cli.command_modules.storage.url_quote_util import encode_for_url
 storage_account_key_options = {'primary': 'key1', 'secondary': 'key2'}
 
 
-# Utilities
-
-
-# pylint: disable=inconsistent-return-statements
-def _query_account_key(cli_ctx, account_name):
-    """Query the storage account key. This is used when the customer doesn't offer account key but name."""
-    scf = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_STORAGE)
-    acc = next((x for x in scf.storage_accounts.list() if x.name == account_name), None)
-    if acc:
-        from msrestazure.tools import parse_resource_id
-        rg = parse_resource_id(acc.id)['resource_group']
-
-        t_storage_account_keys, t_storage_account_list_keys_results = get_sdk(
-            cli_ctx,
-            ResourceType.MGMT_STORAGE,
-            'models.storage_account_keys#StorageAccountKeys',
-            'models.storage_account_list_keys_result#StorageAccountListKeysResult')
-
-        if t_storage_account_keys:
-            return scf.storage_accounts.list_keys(rg, account_name).key1
-        elif t_storage_account_list_keys_results:
-            return scf.storage_accounts.list_keys(rg, account_name).keys[0].value  # pylint: disable=no-member
-    else:
-        raise ValueError("Storage account '{}' not found.".format(account_name))
-
-
 # region PARAMETER VALIDATORS
 
 def validate_table_payload_format(cmd, namespace):
@@ -97,7 +71,7 @@ def validate_client_parameters(cmd, namespace):
 
     # if account name is specified but no key, attempt to query
     if n.account_name and not n.account_key and not n.sas_token:
-        n.account_key = _query_account_key(cmd.cli_ctx, n.account_name)
+        n.account_key = query_account_key(cmd.cli_ctx, n.account_name)
 
 
 def process_blob_source_uri(cmd, namespace):
@@ -151,7 +125,7 @@ def process_blob_source_uri(cmd, namespace):
             # the source account is different from destination account but the key is missing
             # try to query one.
             try:
-                source_account_key = _query_account_key(cmd.cli_ctx, source_account_name)
+                source_account_key = query_account_key(cmd.cli_ctx, source_account_name)
             except ValueError:
                 raise ValueError('Source storage account {} not found.'.format(source_account_name))
     # else: both source account name and key are given by user
@@ -245,7 +219,7 @@ def validate_source_uri(cmd, namespace):  # pylint: disable=too-many-statements
         else:
             # the source account is different from destination account but the key is missing try to query one.
             try:
-                source_account_key = _query_account_key(cmd.cli_ctx, source_account_name)
+                source_account_key = query_account_key(cmd.cli_ctx, source_account_name)
             except ValueError:
                 raise ValueError('Source storage account {} not found.'.format(source_account_name))
 
@@ -416,23 +390,24 @@ def validate_entity(namespace):
         raise argparse.ArgumentError(
             None, 'incorrect usage: entity requires: {}'.format(missing_keys))
 
-    def cast_val(key, val):
-        """ Attempts to cast numeric values (except RowKey and PartitionKey) to numbers so they
-        can be queried correctly. """
-        if key in ['PartitionKey', 'RowKey']:
-            return val
+    # ensure numbers are converted from strings so querying will work correctly
+    values = {key: cast_entity_value(key, val) for key, val in values.items()}
+    namespace.entity = values
 
-        def try_cast(to_type):
-            try:
-                return to_type(val)
-            except ValueError:
-                return None
 
-        return try_cast(int) or try_cast(float) or val
+def cast_entity_value(key, val):
+    """ Attempts to cast numeric values (except RowKey and PartitionKey) to numbers so they
+    can be queried correctly. """
+    if key in ['PartitionKey', 'RowKey']:
+        return val
 
-    # ensure numbers are converted from strings so querying will work correctly
-    values = {key: cast_val(key, val) for key, val in values.items()}
-    namespace.entity = values
+    def try_cast(to_type):
+        try:
+            return to_type(val)
+        except ValueError:
+            return None
+
+    return try_cast(int) or try_cast(float) or val
 
 
 def validate_marker(namespace):
@@ -610,7 +585,7 @@ def get_source_file_or_blob_service_client(cmd, namespace):
         if not (source_key or source_sas):
             # when either storage account key or SAS is given, try to fetch the key in the current
             # subscription
-            source_key = _query_account_key(cmd.cli_ctx, source_account)
+            source_key = query_account_key(cmd.cli_ctx, source_account)
 
         if source_container:
             ns['source_client'] = get_storage_data_service_client(cmd.cli_ctx,
@@ -697,6 +672,15 @@ def process_blob_batch_source_parameters(cmd, namespace):
             namespace.account_name = identifier.account_name
 
 
+def process_blob_sync_parameters(namespace):
+    """Process the source of the storage blob sync command"""
+    import os
+
+    if not os.path.isdir(namespace.source):
+        raise ValueError('incorrect usage: source must be an existing directory')
+    namespace.source = os.path.realpath(namespace.source)
+
+
 def process_blob_upload_batch_parameters(cmd, namespace):
     """Process the source and destination of storage blob upload command"""
     import os
@@ -61,6 +61,9 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
         g.custom_command('list', 'list_network_rules')
         g.custom_command('remove', 'remove_network_rule')
 
+    with self.command_group('storage account cache', custom_command_type=get_custom_sdk('account', None)) as g:
+        g.custom_command('purge', 'purge_account_cache')
+
     with self.command_group('storage logging', get_custom_sdk('logging', multi_service_properties_factory)) as g:
         from ._transformers import transform_logging_list_output
         g.storage_command('update', 'set_logging')
@@ -112,6 +115,7 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
         g.storage_custom_command('upload-batch', 'storage_blob_upload_batch')
         g.storage_custom_command('download-batch', 'storage_blob_download_batch')
         g.storage_custom_command('delete-batch', 'storage_blob_delete_batch')
+        g.storage_custom_command('sync', 'storage_blob_sync')
 
         g.storage_command('metadata show', 'get_blob_metadata', exception_handler=g.get_handler_suppress_404())
         g.storage_command('metadata update', 'set_blob_metadata')
@@ -296,11 +300,15 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
         g.storage_custom_command('policy list', 'list_acl_policies', table_transformer=transform_acl_list_output)
         g.storage_custom_command('policy update', 'set_acl_policy')
 
-    with self.command_group('storage message', queue_sdk) as g:
+    with self.command_group('storage message', queue_sdk,
+                            custom_command_type=get_custom_sdk('queue', queue_data_service_factory)) as g:
         from ._transformers import create_boolean_result_output_transformer
         from ._format import transform_message_show
 
         g.storage_command('put', 'put_message')
+        g.storage_custom_command('put-batch', 'put_message_batch')
+        # each message is written before it's deleted
+        g.storage_custom_command('drain', 'drain_messages', stream_page_size=1)
         g.storage_command('get', 'get_messages', table_transformer=transform_message_show)
         g.storage_command('peek', 'peek_messages', table_transformer=transform_message_show)
         g.storage_command('delete', 'delete_message', transform=create_boolean_result_output_transformer('deleted'),
@@ -350,3 +358,4 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
         g.storage_command('show', 'get_entity', table_transformer=transform_entity_show,
                           exception_handler=g.get_handler_suppress_404())
         g.storage_custom_command('insert', 'insert_table_entity')
+        g.storage_custom_command('insert-batch', 'insert_table_entity_batch')
@@ -180,3 +180,8 @@ def remove_network_rule(cmd, client, resource_group_name, storage_account_name,
     StorageAccountUpdateParameters = cmd.get_models('StorageAccountUpdateParameters')
     params = StorageAccountUpdateParameters(network_rule_set=rules)
     return client.update(resource_group_name, storage_account_name, params)
+
+
+def purge_account_cache(cmd, account_name=None):
+    from azure.cli.command_modules.storage._account_cache import StorageAccountCache
+    StorageAccountCache(cmd.cli_ctx).purge(account_name)
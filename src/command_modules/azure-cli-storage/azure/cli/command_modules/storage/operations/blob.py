@@ -5,6 +5,7 @@
 
 from __future__ import print_function
 
+import functools
 import os
 from knack.log import get_logger
 
@@ -12,11 +13,27 @@ from azure.cli.command_modules.storage.util import (create_blob_service_from_sto
                                                     create_file_share_from_storage_client,
                                                     create_short_lived_share_sas,
                                                     create_short_lived_container_sas,
-                                                    filter_none, collect_blobs, collect_files,
+                                                    collect_blobs, collect_files, iter_blobs,
                                                     mkdir_p, guess_content_type, normalize_blob_file_path,
-                                                    check_precondition_success)
+                                                    check_precondition_success,
+                                                    glob_files_locally)
 from azure.cli.command_modules.storage.url_quote_util import encode_for_url, make_encoded_file_url_and_params
 
+COPY_POLL_INTERVAL = 1
+MAX_COPY_POLL_INTERVAL = 30
+# beyond this number of pending copies, their status is read by listing the container rather than blob by blob
+COPY_STATUS_LIST_THRESHOLD = 100
+
+# a stream of unknown length is uploaded in blocks which double in size every STREAM_BLOCKS_PER_SIZE blocks, so that
+# a small stream takes little memory while the 50,000 blocks of a blob can hold more than 1 TB
+STREAM_BLOCK_SIZE = 4 * 1024 * 1024
+MAX_STREAM_BLOCK_SIZE = 100 * 1024 * 1024
+STREAM_BLOCKS_PER_SIZE = 10000
+MAX_BLOCKS = 50000
+
+# the result of a file of upload-batch --if-changed whose blob has the same content already
+_UNCHANGED = object()
+
 
 def set_blob_tier(client, container_name, blob_name, tier, blob_type='block', timeout=None):
     if blob_type == 'block':
@@ -47,7 +64,8 @@ def set_delete_policy(client, enable=None, days_retained=None):
 
 def storage_blob_copy_batch(cmd, client, source_client, destination_container=None,
                             destination_path=None, source_container=None, source_share=None,
-                            source_sas=None, pattern=None, dryrun=False):
+                            source_sas=None, pattern=None, dryrun=False, max_workers=8, retries=3, wait=False,
+                            journal=None):
     """Copy a group of blob or files to a blob container."""
     logger = None
     if dryrun:
@@ -70,17 +88,22 @@ def storage_blob_copy_batch(cmd, client, source_client, destination_container=No
             source_sas = create_short_lived_container_sas(cmd, source_client.account_name, source_client.account_key,
                                                           source_container)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_blob_copy(blob_name):
-            if dryrun:
+        if dryrun:
+            for blob_name in collect_blobs(source_client, source_container, pattern):
                 logger.warning('  - copy blob %s', blob_name)
-            else:
-                return _copy_blob_to_blob_container(client, source_client, destination_container, destination_path,
-                                                    source_container, source_sas, blob_name)
+            return []
+
+        def _blob_sources():
+            import calendar
+            for blob in iter_blobs(source_client, source_container, pattern):
+                last_modified = blob.properties.last_modified
+                yield (blob.name,
+                       source_client.make_blob_url(source_container, encode_for_url(blob.name), sas_token=source_sas),
+                       blob.properties.content_length,
+                       calendar.timegm(last_modified.utctimetuple()) if last_modified else None)
 
-        return list(filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client,
-                                                                                 source_container,
-                                                                                 pattern)))
+        return _copy_to_blob_container(client, destination_container, destination_path, _blob_sources(),
+                                       max_workers=max_workers, retries=retries, wait=wait, journal=journal)
 
     elif source_share:
         # copy blob from file share
@@ -92,52 +115,58 @@ def storage_blob_copy_batch(cmd, client, source_client, destination_container=No
             source_sas = create_short_lived_share_sas(cmd, source_client.account_name, source_client.account_key,
                                                       source_share)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_file_copy(file_info):
-            dir_name, file_name = file_info
-            if dryrun:
+        if dryrun:
+            for dir_name, file_name in collect_files(cmd, source_client, source_share, pattern):
                 logger.warning('  - copy file %s', os.path.join(dir_name, file_name))
-            else:
-                return _copy_file_to_blob_container(client, source_client, destination_container, destination_path,
-                                                    source_share, source_sas, dir_name, file_name)
-
-        return list(filter_none(action_file_copy(file) for file in collect_files(cmd,
-                                                                                 source_client,
-                                                                                 source_share,
-                                                                                 pattern)))
+            return []
+
+        def _file_sources():
+            for dir_name, file_name in collect_files(cmd, source_client, source_share, pattern):
+                file_url, dir_name, file_name = make_encoded_file_url_and_params(source_client, source_share,
+                                                                                 dir_name, file_name, source_sas)
+                # the listing of a share doesn't tell when a file was last modified
+                yield os.path.join(dir_name, file_name) if dir_name else file_name, file_url, None, None
+
+        return _copy_to_blob_container(client, destination_container, destination_path, _file_sources(),
+                                       max_workers=max_workers, retries=retries, wait=wait, journal=journal,
+                                       noun='files')
     else:
         raise ValueError('Fail to find source. Neither blob container or file share is specified')
 
 
 # pylint: disable=unused-argument
-def storage_blob_download_batch(client, source, destination, source_container_name, pattern=None, dryrun=False,
-                                progress_callback=None, max_connections=2):
+def storage_blob_download_batch(cmd, client, source, destination, source_container_name, pattern=None, dryrun=False,
+                                progress_callback=None, max_connections=2, max_workers=8, retries=3):
+    from azure.cli.command_modules.storage._hash_cache import FileHashCache
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures
+
+    logger = get_logger(__name__)
 
-    def _download_blob(blob_service, container, destination_folder, normalized_blob_name, blob_name):
+    def _is_up_to_date(blob, destination_path):
+        """ Whether the local file has the size and the MD5 of the blob. """
+        content_md5 = blob.properties.content_settings.content_md5
+        return bool(content_md5) and os.path.isfile(destination_path) and \
+            os.path.getsize(destination_path) == blob.properties.content_length and \
+            hash_cache.get_md5(destination_path) == content_md5
+
+    def _download_blob(item):
+        normalized_blob_name, blob = item
         # TODO: try catch IO exception
-        destination_path = os.path.join(destination_folder, normalized_blob_name)
+        destination_path = os.path.join(destination, normalized_blob_name)
+        if _is_up_to_date(blob, destination_path):
+            logger.info('skipping %s, the local file is up to date', blob.name)
+            return None
         destination_folder = os.path.dirname(destination_path)
         if not os.path.exists(destination_folder):
             mkdir_p(destination_folder)
 
-        blob = blob_service.get_blob_to_path(container, blob_name, destination_path, max_connections=max_connections,
-                                             progress_callback=progress_callback)
-        return blob.name
-
-    source_blobs = collect_blobs(client, source_container_name, pattern)
-    blobs_to_download = {}
-    for blob_name in source_blobs:
-        # remove starting path seperator and normalize
-        normalized_blob_name = normalize_blob_file_path(None, blob_name)
-        if normalized_blob_name in blobs_to_download:
-            from knack.util import CLIError
-            raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` parameter '
-                           'to select for a subset of blobs to download OR utilize the `storage blob download` '
-                           'command instead to download individual blobs.'.format(normalized_blob_name))
-        blobs_to_download[normalized_blob_name] = blob_name
+        result = client.get_blob_to_path(source_container_name, blob.name, destination_path,
+                                         max_connections=max_connections)
+        return result.name
 
+    blobs_to_download = _list_blobs_to_download(client, source_container_name, pattern)
     if dryrun:
-        logger = get_logger(__name__)
+        source_blobs = [blob.name for _, blob in blobs_to_download]
         logger.warning('download action: from %s to %s', source, destination)
         logger.warning('    pattern %s', pattern)
         logger.warning('  container %s', source_container_name)
@@ -147,8 +176,34 @@ def storage_blob_download_batch(client, source, destination, source_container_na
             logger.warning('  - %s', b)
         return []
 
-    return list(_download_blob(client, source_container_name, destination, blob_normed, blobs_to_download[blob_normed])
-                for blob_normed in blobs_to_download)
+    with FileHashCache(cmd.cli_ctx) as hash_cache:
+        downloaded, failures = run_transfers(_download_blob, blobs_to_download, max_workers=max_workers,
+                                             retries=retries, total=len(blobs_to_download),
+                                             progress_callback=progress_callback)
+    results = [name for name in downloaded if name is not None]
+    if len(results) < len(downloaded):
+        logger.warning('skipped %d blobs whose local files are up to date', len(downloaded) - len(results))
+    raise_for_failures(failures, len(downloaded) + len(failures), 'download', describe=lambda b: b[1].name,
+                       noun='blobs')
+    return results
+
+
+def _list_blobs_to_download(client, container_name, pattern):
+    """ The (download path, blob) of the blobs matching a pattern. Every download path is checked before anything is
+    written, so the whole container is listed first. """
+    blobs_to_download = []
+    normalized_blob_names = set()
+    for blob in iter_blobs(client, container_name, pattern):
+        # remove starting path seperator and normalize
+        normalized_blob_name = normalize_blob_file_path(None, blob.name)
+        if normalized_blob_name in normalized_blob_names:
+            from knack.util import CLIError
+            raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` parameter '
+                           'to select for a subset of blobs to download OR utilize the `storage blob download` '
+                           'command instead to download individual blobs.'.format(normalized_blob_name))
+        normalized_blob_names.add(normalized_blob_name)
+        blobs_to_download.append((normalized_blob_name, blob))
+    return blobs_to_download
 
 
 def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  # pylint: disable=too-many-locals
@@ -157,7 +212,8 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
                               content_settings=None, metadata=None, validate_content=False,
                               maxsize_condition=None, max_connections=2, lease_id=None, progress_callback=None,
                               if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_workers=8, retries=3,
+                              journal=None, if_changed=False):
     def _create_return_result(blob_name, blob_content_settings, upload_result=None):
         blob_name = normalize_blob_file_path(destination_path, blob_name)
         return {
@@ -180,38 +236,174 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
         for src, dst in source_files or []:
             results.append(_create_return_result(dst, guess_content_type(src, content_settings, t_content_settings)))
     else:
+        from azure.cli.command_modules.storage._hash_cache import FileHashCache
+        from azure.cli.command_modules.storage.transfer import TransferJournal, run_transfers, raise_for_failures
+
         @check_precondition_success
         def _upload_blob(*args, **kwargs):
             return upload_blob(*args, **kwargs)
 
-        for src, dst in source_files or []:
-            logger.warning('uploading %s', src)
+        def _journal_name(dst):
+            return client.make_blob_url(destination_container_name, normalize_blob_file_path(destination_path, dst))
+
+        def _upload(item):
+            src, dst, stat = item
+            blob_name = normalize_blob_file_path(destination_path, dst)
             guessed_content_settings = guess_content_type(src, content_settings, t_content_settings)
+            if if_changed:
+                content_md5 = _get_md5_if_changed(client, destination_container_name, blob_name, src, hash_cache)
+                if content_md5 is None:
+                    logger.info('skipping %s, the blob has the same content', src)
+                    return _UNCHANGED
+                guessed_content_settings = _with_content_md5(guessed_content_settings, content_md5)
+            logger.warning('uploading %s', src)
 
-            include, result = _upload_blob(cmd, client, destination_container_name,
-                                           normalize_blob_file_path(destination_path, dst), src,
+            include, result = _upload_blob(cmd, client, destination_container_name, blob_name, src,
                                            blob_type=blob_type, content_settings=guessed_content_settings,
                                            metadata=metadata, validate_content=validate_content,
                                            maxsize_condition=maxsize_condition, max_connections=max_connections,
-                                           lease_id=lease_id, progress_callback=progress_callback,
-                                           if_modified_since=if_modified_since,
+                                           lease_id=lease_id, if_modified_since=if_modified_since,
                                            if_unmodified_since=if_unmodified_since, if_match=if_match,
                                            if_none_match=if_none_match, timeout=timeout)
-            if include:
-                results.append(_create_return_result(dst, guessed_content_settings, result))
+            if not include:
+                return None
+            if upload_journal:
+                upload_journal.record(_journal_name(dst), stat.st_size, stat.st_mtime, result.etag if result else None)
+            return _create_return_result(dst, guessed_content_settings, result)
+
+        upload_journal = TransferJournal(journal) if journal else None
+        hash_cache = FileHashCache(cmd.cli_ctx)
+        try:
+            files = []
+            for src, dst in source_files or []:
+                stat = os.stat(src)
+                if upload_journal and upload_journal.is_completed(_journal_name(dst), stat.st_size, stat.st_mtime):
+                    logger.info('skipping %s, which was uploaded already', src)
+                    continue
+                files.append((src, dst, stat))
+            if len(files) < len(source_files or []):
+                logger.warning('skipping %d files which were uploaded already according to the journal %s',
+                               len(source_files) - len(files), journal)
+
+            # small files first, so that large ones don't hold up all the workers while many small ones are waiting
+            files.sort(key=lambda f: f[2].st_size)
+            uploaded, failures = run_transfers(_upload, files, max_workers=max_workers, retries=retries,
+                                               total=len(files), progress_callback=progress_callback)
+        finally:
+            hash_cache.close()
+            if upload_journal:
+                upload_journal.close()
+        unchanged = len([r for r in uploaded if r is _UNCHANGED])
+        if unchanged:
+            logger.warning('skipped %d files whose blobs have the same content', unchanged)
+        results = [r for r in uploaded if r is not None and r is not _UNCHANGED]
+        raise_for_failures(failures, len(files), 'upload', describe=lambda f: f[0])
 
     return results
 
 
+def storage_blob_sync(cmd, client, source, container_name, destination_path=None, pattern=None,
+                      delete_destination=False, blob_type='block', max_connections=2, max_workers=8, retries=3,
+                      dryrun=False):
+    """Upload the files of a local directory which are new or changed since the blobs were uploaded."""
+    from azure.cli.command_modules.storage._hash_cache import FileHashCache
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures
+
+    logger = get_logger(__name__)
+    t_content_settings = cmd.get_models('blob.models#ContentSettings')
+
+    # blob name => (local path, stat); the local tree is kept in memory while the container is streamed
+    local_files = {normalize_blob_file_path(destination_path, relative_path): (path, os.stat(path))
+                   for path, relative_path in glob_files_locally(source, pattern)}
+    prefix = normalize_blob_file_path(destination_path, '') + '/' if destination_path else None
+    unchanged = []
+
+    def _run(operation):
+        action, blob_name, local_file = operation
+        if action == 'delete':
+            logger.warning('deleting %s', blob_name)
+            client.delete_blob(container_name, blob_name)
+        else:
+            logger.warning('uploading %s', local_file[0])
+            upload_blob(cmd, client, container_name, blob_name, local_file[0], blob_type=blob_type,
+                        content_settings=t_content_settings(), max_connections=max_connections)
+        return operation
+
+    with FileHashCache(cmd.cli_ctx) as hash_cache:
+        operations = _sync_operations(client, container_name, local_files, prefix, pattern, delete_destination,
+                                      hash_cache, unchanged)
+        if dryrun:
+            done, failures = list(operations), []
+        else:
+            done, failures = run_transfers(_run, operations, max_workers=max_workers, retries=retries)
+    raise_for_failures(failures, len(done) + len(failures), 'sync', describe=lambda o: o[1])
+    return {
+        'uploaded': [blob_name for action, blob_name, _ in done if action == 'upload'],
+        'deleted': [blob_name for action, blob_name, _ in done if action == 'delete'],
+        'unchanged': len(unchanged)
+    }
+
+
+def _sync_operations(client, container_name, local_files, prefix, pattern, delete_destination, hash_cache,
+                     unchanged):
+    """ The (action, blob name, local file) which sync the container with the local files, a dict of blob name =>
+    (local path, stat), in the order the container is listed. The names of the blobs which are up to date are added
+    to `unchanged`. """
+    from fnmatch import fnmatch
+
+    for blob in iter_blobs(client, container_name, (prefix or '') + '*'):
+        local_file = local_files.pop(blob.name, None)
+        if local_file:
+            if _is_blob_unchanged(blob, local_file[0], local_file[1], hash_cache):
+                unchanged.append(blob.name)
+            else:
+                yield 'upload', blob.name, local_file
+        elif delete_destination and (not pattern or fnmatch(blob.name[len(prefix or ''):], pattern)):
+            yield 'delete', blob.name, None
+    # the files left were not found in the container
+    for blob_name, local_file in sorted(local_files.items(), key=lambda f: f[1][1].st_size):
+        yield 'upload', blob_name, local_file
+
+
+def _is_blob_unchanged(blob, path, stat, hash_cache):
+    import calendar
+
+    properties = blob.properties
+    if properties.content_length != stat.st_size:
+        return False
+    if properties.last_modified and stat.st_mtime <= calendar.timegm(properties.last_modified.utctimetuple()):
+        # the blob was uploaded after the file was last changed
+        return True
+    content_md5 = properties.content_settings.content_md5
+    return bool(content_md5) and hash_cache.get_md5(path) == content_md5
+
+
 def upload_blob(cmd, client, container_name, blob_name, file_path, blob_type=None, content_settings=None, metadata=None,
                 validate_content=False, maxsize_condition=None, max_connections=2, lease_id=None, tier=None,
                 if_modified_since=None, if_unmodified_since=None, if_match=None, if_none_match=None, timeout=None,
-                progress_callback=None):
+                progress_callback=None, if_changed=False):
     """Upload a blob to a container."""
 
     t_content_settings = cmd.get_models('blob.models#ContentSettings')
     content_settings = guess_content_type(file_path, content_settings, t_content_settings)
 
+    if file_path == '-':
+        return _upload_block_blob_from_stream(cmd, client, container_name, blob_name,
+                                              _stdin_stream(blob_type, if_changed),
+                                              content_settings=content_settings, metadata=metadata,
+                                              validate_content=validate_content, max_connections=max_connections,
+                                              lease_id=lease_id, if_modified_since=if_modified_since,
+                                              if_unmodified_since=if_unmodified_since, if_match=if_match,
+                                              if_none_match=if_none_match, timeout=timeout,
+                                              progress_callback=progress_callback)
+
+    if if_changed:
+        content_md5 = _get_file_md5_if_changed(cmd, client, container_name, blob_name, file_path)
+        if content_md5 is None:
+            get_logger(__name__).warning('skipping the upload of %s, the blob has the same content', file_path)
+            return None
+        content_settings = _with_content_md5(content_settings, content_md5)
+
     def upload_append_blob():
         check_blob_args = {
             'container_name': container_name,
@@ -283,9 +475,133 @@ def upload_blob(cmd, client, container_name, blob_name, file_path, blob_type=Non
     return type_func[blob_type]()
 
 
+def _upload_block_blob_from_stream(cmd, client, container_name, blob_name, stream, content_settings=None,
+                                   metadata=None, validate_content=False, max_connections=2, lease_id=None,
+                                   timeout=None, progress_callback=None, **conditions):
+    """
+    Upload a stream of unknown length as the blocks of a block blob, committed once the stream has been read. Up to
+    `max_connections` blocks are uploaded while the next one is read, so the memory used is bounded by the size of a
+    block times the number of connections, whatever the length of the stream.
+    """
+    t_blob_block = cmd.get_models('blob.models#BlobBlock')
+
+    def _put_block(block_id, data):
+        client.put_block(container_name, blob_name, data, block_id, validate_content=validate_content,
+                         lease_id=lease_id, timeout=timeout)
+        return len(data)
+
+    block_ids, uploaded = _put_blocks(_put_block, _read_stream_blocks(stream), max(1, max_connections or 1),
+                                      progress_callback=progress_callback)
+    result = client.put_block_list(container_name, blob_name, [t_blob_block(id=block_id) for block_id in block_ids],
+                                   content_settings=content_settings, metadata=metadata,
+                                   validate_content=validate_content, lease_id=lease_id, timeout=timeout,
+                                   **conditions)
+    if progress_callback:
+        progress_callback(uploaded, uploaded)
+    return result
+
+
+def _read_stream_blocks(stream):
+    """ The (block id, data) of the blocks read from a stream, larger as more blocks are read. """
+    from knack.util import CLIError
+
+    count = 0
+    while True:
+        data = stream.read(min(STREAM_BLOCK_SIZE * 2 ** (count // STREAM_BLOCKS_PER_SIZE), MAX_STREAM_BLOCK_SIZE))
+        if not data:
+            return
+        if count == MAX_BLOCKS:
+            raise CLIError('The stream exceeds the maximum size of a block blob, {} blocks.'.format(MAX_BLOCKS))
+        # the ids of the blocks of a blob must have the same length
+        yield '{:032d}'.format(count), data
+        count += 1
+
+
+def _put_blocks(put_block, blocks, max_connections, progress_callback=None):
+    """ Upload blocks with up to `max_connections` in flight while the next one is read. Returns the ids of the
+    blocks, in order, and the count of bytes uploaded. """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from azure.cli.command_modules.storage.transfer import call_with_retries
+
+    block_ids = []
+    pending = set()
+    uploaded = [0]
+
+    def _complete(futures):
+        for future in futures:
+            pending.discard(future)
+            uploaded[0] += future.result()
+            if progress_callback:
+                progress_callback(uploaded[0], None)
+
+    executor = ThreadPoolExecutor(max_workers=max_connections)
+    try:
+        for block_id, data in blocks:
+            block_ids.append(block_id)
+            while len(pending) >= max_connections:
+                _complete(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending.add(executor.submit(call_with_retries, functools.partial(put_block, data=data), block_id))
+        _complete(wait(pending).done)
+    except BaseException:
+        # the uncommitted blocks are discarded by the service
+        for future in pending:
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False)
+    return block_ids, uploaded[0]
+
+
+def _stdin_stream(blob_type, if_changed):
+    """ The binary stream of the standard input, once the arguments of its upload are checked. """
+    import sys
+    from knack.util import CLIError
+
+    if blob_type != 'block':
+        raise CLIError('usage error: only block blobs can be uploaded from the standard input')
+    if if_changed:
+        raise CLIError('usage error: --if-changed can not be used with the standard input')
+    return getattr(sys.stdin, 'buffer', sys.stdin)
+
+
+def _get_file_md5_if_changed(cmd, client, container_name, blob_name, file_path):
+    from azure.cli.command_modules.storage._hash_cache import FileHashCache
+
+    with FileHashCache(cmd.cli_ctx) as hash_cache:
+        return _get_md5_if_changed(client, container_name, blob_name, file_path, hash_cache)
+
+
+def _get_md5_if_changed(client, container_name, blob_name, file_path, hash_cache):
+    """ The MD5 of a local file which must be uploaded, or None when the blob has the same size and MD5. """
+    from azure.common import AzureMissingResourceHttpError
+
+    content_md5 = hash_cache.get_md5(file_path)
+    try:
+        properties = client.get_blob_properties(container_name, blob_name).properties
+    except AzureMissingResourceHttpError:
+        return content_md5
+    if properties.content_length == os.path.getsize(file_path) and \
+            properties.content_settings.content_md5 == content_md5:
+        return None
+    return content_md5
+
+
+def _with_content_md5(content_settings, content_md5):
+    """ A copy of the content settings with the MD5 of the uploaded file, so that the next upload can compare it with
+    the blob. The content settings may be shared by the files of a batch. """
+    import copy
+    if content_settings.content_md5:
+        return content_settings
+    content_settings = copy.copy(content_settings)
+    content_settings.content_md5 = content_md5
+    return content_settings
+
+
 def storage_blob_delete_batch(client, source, source_container_name, pattern=None, lease_id=None,
                               delete_snapshots=None, if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_workers=8, retries=3):
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures
+
     @check_precondition_success
     def _delete_blob(blob_name):
         delete_blob_args = {
@@ -301,9 +617,10 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
         }
         return client.delete_blob(**delete_blob_args)
 
-    source_blobs = list(collect_blobs(client, source_container_name, pattern))
+    source_blobs = (blob.name for blob in iter_blobs(client, source_container_name, pattern))
 
     if dryrun:
+        source_blobs = list(source_blobs)
         logger = get_logger(__name__)
         logger.warning('delete action: from %s', source)
         logger.warning('    pattern %s', pattern)
@@ -314,38 +631,186 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
             logger.warning('  - %s', blob)
         return []
 
-    return [result for include, result in (_delete_blob(blob) for blob in source_blobs) if include]
+    # the deletes start while the container is being listed
+    deleted, failures = run_transfers(_delete_blob, source_blobs, max_workers=max_workers, retries=retries)
+    raise_for_failures(failures, len(deleted) + len(failures), 'delete', noun='blobs')
+    return [result for include, result in deleted if include]
+
+
+def _copy_to_blob_container(client, container, destination_path, sources, max_workers=8, retries=3, wait=False,
+                            journal=None, noun='blobs'):
+    """
+    Start the copies of the sources, an iterable of (name, URL, size, last modified time), to the container in
+    parallel. The service copies the data asynchronously: with `wait`, the status of the pending copies is polled,
+    less and less often while none of them completes, until all of them have succeeded or failed. A copy which failed
+    on the service is started again up to `retries` times.
+
+    :return: The URLs of the destination blobs or, with `wait`, the statistics of the batch.
+    """
+    import time
+    from azure.cli.command_modules.storage.transfer import TransferJournal, run_transfers, raise_for_failures
+
+    copy_journal = TransferJournal(journal) if journal else None
+    started_at = time.time()
+    skipped = [0]
+
+    def _copies():
+        for source_name, source_url, size, mtime in sources:
+            blob_name = normalize_blob_file_path(destination_path, source_name)
+            blob_url = client.make_blob_url(container, blob_name)
+            if copy_journal and copy_journal.is_completed(blob_url, size, mtime):
+                skipped[0] += 1
+                continue
+            yield {'source': source_name, 'sourceUrl': source_url, 'blob': blob_name, 'url': blob_url, 'size': size,
+                   'mtime': mtime, 'attempts': 0}
+
+    start = functools.partial(_start_blob_copy, client, container, copy_journal)
+    try:
+        started, failures = run_transfers(start, _copies(), max_workers=max_workers, retries=retries)
+        if skipped[0]:
+            get_logger(__name__).warning('skipping %d %s which were copied already according to the journal %s',
+                                         skipped[0], noun, journal)
+        total = len(started) + len(failures)
+        if not wait:
+            raise_for_failures(failures, total, 'copy', describe=lambda i: i['source'], noun=noun)
+            return [item['url'] for item, _ in started]
+
+        prefix = normalize_blob_file_path(destination_path, '') + '/' if destination_path else None
+        copied, retried = _wait_for_blob_copies(client, container, prefix, start, started, failures,
+                                                max_workers=max_workers, retries=retries, journal=copy_journal)
+    finally:
+        if copy_journal:
+            copy_journal.close()
+
+    summary = _summarize_blob_copies(copied, failures, skipped[0], retried, time.time() - started_at, noun)
+    raise_for_failures(failures, total, 'copy', describe=lambda i: i['source'], noun=noun)
+    return summary
+
+
+def _start_blob_copy(client, container, journal, item):
+    from azure.common import AzureConflictHttpError
+
+    item['attempts'] += 1
+    try:
+        copy = client.copy_blob(container, item['blob'], item['sourceUrl'])
+    except AzureConflictHttpError:
+        # the blob has a pending copy, e.g. started by an interrupted run of the batch
+        copy = client.get_blob_properties(container, item['blob']).properties.copy
+        if copy.status != 'pending':
+            raise
+    if copy.status == 'success' and journal:
+        journal.record(item['url'], item['size'], item['mtime'], None)
+    return item, copy
+
+
+def _wait_for_blob_copies(client, container, prefix, start, started, failures, max_workers=8, retries=3,
+                          journal=None):
+    """
+    Poll the status of the started copies, less and less often while none of them completes, until all of them have
+    succeeded or failed. A copy which failed on the service is started again with `start`, up to `retries` times.
+
+    :return: The completed copies, as (item, copy properties), and the number of copies started again. The copies
+    which failed are added to `failures`.
+    """
+    import time
+    from azure.cli.command_modules.storage.transfer import run_transfers
+
+    logger = get_logger(__name__)
+    total = len(started) + len(failures)
+    copied = []
+    pending = {}
+    retried = 0
+
+    def _track(started):
+        for item, copy in started:
+            if copy.status == 'success':
+                copied.append((item, copy))
+            else:
+                pending[item['blob']] = item
+
+    _track(started)
+    interval = COPY_POLL_INTERVAL
+    while pending:
+        time.sleep(interval)
+        statuses = _get_copy_statuses(client, container, list(pending), prefix, max_workers)
+        restarts = _collect_copy_statuses(statuses, pending, copied, failures, retries, journal)
+        if restarts:
+            retried += len(restarts)
+            restarted, restart_failures = run_transfers(start, restarts, max_workers=max_workers, retries=retries)
+            _track(restarted)
+            failures.extend(restart_failures)
+        completed = sum(1 for c in statuses.values() if not c or c.status != 'pending') - len(restarts)
+        if completed:
+            logger.warning('%d of %d copies completed, %d pending', total - len(pending), total, len(pending))
+        # poll less often while the copies are making no progress
+        interval = COPY_POLL_INTERVAL if completed else min(interval * 2, MAX_COPY_POLL_INTERVAL)
+    return copied, retried
+
+
+def _collect_copy_statuses(statuses, pending, copied, failures, retries, journal=None):
+    """ Move the pending copies which have completed to `copied` or `failures`. Returns the failed copies to start
+    again. """
+    logger = get_logger(__name__)
+    restarts = []
+    for blob_name, copy in statuses.items():
+        status = copy.status if copy else None
+        if status == 'pending':
+            continue
+        item = pending.pop(blob_name)
+        if status == 'success':
+            if journal:
+                journal.record(item['url'], item['size'], item['mtime'], None)
+            copied.append((item, copy))
+        elif status == 'failed' and item['attempts'] <= retries:
+            logger.info('copy of %s failed, starting it again: %s', item['source'], copy.status_description)
+            restarts.append(item)
+        elif copy:
+            failures.append((item, 'the copy {}: {}'.format(status, copy.status_description)))
+        else:
+            failures.append((item, 'the destination blob was deleted'))
+    return restarts
+
+
+def _summarize_blob_copies(copied, failures, skipped, retried, elapsed, noun):
+    copied_bytes = sum(_copied_bytes(item, copy) for item, copy in copied)
+    get_logger(__name__).warning('copied %d %s (%d bytes) in %.1f seconds, %d failed, %d retried', len(copied), noun,
+                                 copied_bytes, elapsed, len(failures), retried)
+    return {
+        'copied': len(copied),
+        'failed': len(failures),
+        'skipped': skipped,
+        'retries': retried,
+        'bytes': copied_bytes,
+        'elapsedSeconds': round(elapsed, 1),
+        'throughputMBps': round(copied_bytes / elapsed / 1024 / 1024, 2) if elapsed else None
+    }
+
 
+def _get_copy_statuses(client, container, blob_names, prefix=None, max_workers=8):
+    """ The copy properties of the blobs, None for the blobs which don't exist. A blob whose status couldn't be read
+    is left out. """
+    from azure.common import AzureMissingResourceHttpError
+    from azure.cli.command_modules.storage.transfer import run_transfers
 
-def _copy_blob_to_blob_container(blob_service, source_blob_service, destination_container, destination_path,
-                                 source_container, source_sas, source_blob_name):
-    from azure.common import AzureException
-    source_blob_url = source_blob_service.make_blob_url(source_container, encode_for_url(source_blob_name),
-                                                        sas_token=source_sas)
-    destination_blob_name = normalize_blob_file_path(destination_path, source_blob_name)
-    try:
-        blob_service.copy_blob(destination_container, destination_blob_name, source_blob_url)
-        return blob_service.make_blob_url(destination_container, destination_blob_name)
-    except AzureException:
-        from knack.util import CLIError
-        error_template = 'Failed to copy blob {} to container {}.'
-        raise CLIError(error_template.format(source_blob_name, destination_container))
+    if len(blob_names) > COPY_STATUS_LIST_THRESHOLD:
+        statuses = dict.fromkeys(blob_names)
+        for blob in client.list_blobs(container, prefix=prefix, include='copy'):
+            if blob.name in statuses:
+                statuses[blob.name] = blob.properties.copy
+        return statuses
 
+    def _get(blob_name):
+        try:
+            return blob_name, client.get_blob_properties(container, blob_name).properties.copy
+        except AzureMissingResourceHttpError:
+            return blob_name, None
 
-def _copy_file_to_blob_container(blob_service, source_file_service, destination_container, destination_path,
-                                 source_share, source_sas, source_file_dir, source_file_name):
-    from azure.common import AzureException
-    file_url, source_file_dir, source_file_name = \
-        make_encoded_file_url_and_params(source_file_service, source_share, source_file_dir,
-                                         source_file_name, source_sas)
+    statuses, _ = run_transfers(_get, blob_names, max_workers=max_workers)
+    return dict(statuses)
 
-    source_path = os.path.join(source_file_dir, source_file_name) if source_file_dir else source_file_name
-    destination_blob_name = normalize_blob_file_path(destination_path, source_path)
 
+def _copied_bytes(item, copy):
     try:
-        blob_service.copy_blob(destination_container, destination_blob_name, file_url)
-        return blob_service.make_blob_url(destination_container, destination_blob_name)
-    except AzureException as ex:
-        from knack.util import CLIError
-        error_template = 'Failed to copy file {} to container {}. {}'
-        raise CLIError(error_template.format(source_file_name, destination_container, ex))
+        return int(copy.progress.split('/')[1])
+    except (AttributeError, IndexError, ValueError):
+        return item['size'] or 0
@@ -26,17 +26,18 @@ def list_share_files(cmd, client, share_name, directory_name=None, timeout=None,
     if exclude_dir:
         t_file_properties = cmd.get_models('file.models#FileProperties')
 
-        return list(f for f in generator if isinstance(f.properties, t_file_properties))
+        return (f for f in generator if isinstance(f.properties, t_file_properties))
 
     return generator
 
 
 def storage_file_upload_batch(cmd, client, destination, source, destination_path=None, pattern=None, dryrun=False,
                               validate_content=False, content_settings=None, max_connections=1, metadata=None,
-                              progress_callback=None):
+                              progress_callback=None, max_workers=8, retries=3):
     """ Upload local files to Azure Storage File Share in batch """
 
-    from azure.cli.command_modules.storage.util import glob_files_locally, normalize_blob_file_path
+    from azure.cli.command_modules.storage.util import glob_files_locally
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures
 
     source_files = [c for c in glob_files_locally(source, pattern)]
     logger = get_logger(__name__)
@@ -51,17 +52,17 @@ def storage_file_upload_batch(cmd, client, destination, source, destination_path
                  'Type': guess_content_type(src, content_settings, settings_class).content_type} for src, dst in
                 source_files]
 
-    # TODO: Performance improvement
-    # 1. Upload files in parallel
-    def _upload_action(src, dst):
-        dst = normalize_blob_file_path(destination_path, dst)
-        dir_name = os.path.dirname(dst)
-        file_name = os.path.basename(dst)
+    files = _get_file_upload_paths(source_files, destination_path)
+
+    # the directories are created ahead of the files, so that the upload workers don't race to create them
+    _create_directories_in_files_share(client, destination, set(dir_name for _, dir_name, _ in files),
+                                       max_workers=max_workers, retries=retries)
 
-        _make_directory_in_files_share(client, destination, dir_name)
+    def _upload_action(item):
+        src, dir_name, file_name = item
         create_file_args = {'share_name': destination, 'directory_name': dir_name, 'file_name': file_name,
-                            'local_file_path': src, 'progress_callback': progress_callback,
-                            'content_settings': guess_content_type(src, content_settings, settings_class),
+                            'local_file_path': src, 'content_settings': guess_content_type(src, content_settings,
+                                                                                           settings_class),
                             'metadata': metadata, 'max_connections': max_connections}
 
         if cmd.supported_api_version(min_api='2016-05-31'):
@@ -72,7 +73,10 @@ def storage_file_upload_batch(cmd, client, destination, source, destination_path
 
         return client.make_file_url(destination, dir_name, file_name)
 
-    return list(_upload_action(src, dst) for src, dst in source_files)
+    results, failures = run_transfers(_upload_action, files, max_workers=max_workers, retries=retries,
+                                      total=len(files), progress_callback=progress_callback)
+    raise_for_failures(failures, len(files), 'upload', describe=lambda f: f[0])
+    return results
 
 
 def storage_file_download_batch(cmd, client, source, destination, pattern=None, dryrun=False, validate_content=False,
@@ -224,6 +228,17 @@ def storage_file_delete_batch(cmd, client, source, pattern=None, dryrun=False, t
     return [delete_action(f) for f in source_files]
 
 
+def _get_file_upload_paths(source_files, destination_path):
+    """ The (local path, directory name, file name) of the local files uploaded to a share. """
+    from azure.cli.command_modules.storage.util import normalize_blob_file_path
+
+    files = []
+    for src, dst in source_files:
+        dst = normalize_blob_file_path(destination_path, dst)
+        files.append((src, os.path.dirname(dst), os.path.basename(dst)))
+    return files
+
+
 def _create_file_and_directory_from_blob(file_service, blob_service, share, container, sas, blob_name,
                                          destination_dir=None, metadata=None, timeout=None, existing_dirs=None):
     """
@@ -296,7 +311,7 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
         p = os.path.dirname(p)
 
     for dir_name in reversed(parents):
-        if existing_dirs and (dir_name in existing_dirs):
+        if existing_dirs is not None and (dir_name in existing_dirs):
             continue
 
         try:
@@ -305,5 +320,36 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
             from knack.util import CLIError
             raise CLIError('Failed to create directory {}'.format(dir_name))
 
-        if existing_dirs:
-            existing_dirs.add(directory_path)
+        if existing_dirs is not None:
+            existing_dirs.add(dir_name)
+
+
+def _create_directories_in_files_share(file_service, file_share, directories, existing_dirs=None, max_workers=8,
+                                       retries=3):
+    """
+    Create the given directories and their parents, breadth first: the directories of a level are created in
+    parallel once all of their parents exist, and each directory is created once. The directories created are added
+    to the existing_dirs set.
+    """
+    import threading
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures
+
+    existing_dirs = set() if existing_dirs is None else existing_dirs
+    lock = threading.Lock()
+
+    levels = {}
+    for directory in directories:
+        while directory and directory not in existing_dirs:
+            levels.setdefault(directory.count('/'), set()).add(directory)
+            directory = os.path.dirname(directory)
+
+    def _create(dir_name):
+        file_service.create_directory(share_name=file_share, directory_name=dir_name, fail_on_exist=False)
+        with lock:
+            existing_dirs.add(dir_name)
+
+    for depth in sorted(levels):
+        level = sorted(levels[depth] - existing_dirs)
+        _, failures = run_transfers(_create, level, max_workers=max_workers, retries=retries)
+        raise_for_failures(failures, len(level), 'create', noun='directories')
+    return existing_dirs
@@ -0,0 +1,152 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+# the maximum number of messages the service returns by a get request
+MAX_MESSAGES_PER_GET = 32
+
+
+def put_message_batch(client, queue_name, source, visibility_timeout=None, time_to_live=None, max_workers=8,
+                      retries=3):
+    """
+    Put the lines of a file, or of the standard input, as messages of a queue. The lines are read as they are sent,
+    so the source can be larger than the memory or produced by another command. Empty lines are skipped.
+    """
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures
+
+    def _put(content):
+        client.put_message(queue_name, content, visibility_timeout=visibility_timeout, time_to_live=time_to_live)
+
+    def _messages(stream):
+        for line in stream:
+            content = line.rstrip('\r\n')
+            if content:
+                yield content
+
+    start = time.time()
+    if source == '-':
+        import sys
+        sent, failures = run_transfers(_put, _messages(sys.stdin), max_workers=max_workers, retries=retries)
+    else:
+        import io
+        with io.open(source, encoding='utf-8') as f:
+            sent, failures = run_transfers(_put, _messages(f), max_workers=max_workers, retries=retries)
+
+    raise_for_failures(failures, len(sent) + len(failures), 'put', noun='messages',
+                       describe=lambda content: "message '{}'".format(content[:64]))
+    return _throughput({'sent': len(sent)}, len(sent), start)
+
+
+def drain_messages(cmd, client, queue_name, batch_size=MAX_MESSAGES_PER_GET, visibility_timeout=None,
+                   max_messages=None, max_workers=8, retries=3):
+    """
+    Get the messages of a queue until it's empty, with up to `max_workers` get requests in flight. Each message is
+    deleted once the output requests the next one, which the jsonl output does after writing it, since the command
+    streams its result one message at a time. A message whose deletion failed, or which was received when the
+    command was interrupted, becomes visible again after the visibility timeout. The other output formats are only
+    written once the whole result is known, after the messages are deleted, so --output jsonl is required.
+    """
+    if cmd.cli_ctx.invocation.data['output'] != 'jsonl':
+        from knack.util import CLIError
+        raise CLIError('usage error: storage message drain deletes the messages as they are written, which requires '
+                       '--output jsonl.')
+    return _drain_messages(client, queue_name, batch_size, visibility_timeout, max_messages, max_workers, retries)
+
+
+def _drain_messages(client, queue_name, batch_size, visibility_timeout, max_messages, max_workers, retries):
+    from concurrent.futures import ThreadPoolExecutor
+    from azure.cli.command_modules.storage.transfer import call_with_retries, raise_for_failures
+
+    def _get(num_messages):
+        return call_with_retries(lambda n: client.get_messages(queue_name, num_messages=n,
+                                                               visibility_timeout=visibility_timeout),
+                                 num_messages, retries)
+
+    def _delete(message):
+        call_with_retries(lambda m: client.delete_message(queue_name, m.id, m.pop_receipt), message, retries)
+
+    def _deleted(message, future):
+        try:
+            future.result()
+            stats['deleted'] += 1
+        except Exception as ex:  # pylint: disable=broad-except
+            failures.append((message, ex))
+
+    max_workers = max(1, max_workers or 1)
+    batch_size = max(1, min(batch_size or MAX_MESSAGES_PER_GET, MAX_MESSAGES_PER_GET))
+    deletes = {}  # future => the message to delete
+    failures = []
+    stats = {'received': 0, 'deleted': 0}
+    start = time.time()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    batches = _receive_batches(executor, _get, deletes, _deleted, batch_size, max_workers, max_messages)
+    try:
+        for messages in batches:
+            stats['received'] += len(messages)
+            for message in messages:
+                yield message
+                # the consumer requests the next message once this one is written
+                deletes[executor.submit(_delete, message)] = message
+    finally:
+        batches.close()
+        # the messages written so far are still deleted
+        executor.shutdown(wait=True)
+        _throughput(stats, stats['received'], start)
+        logger.info('Received %d messages and deleted %d in %.1f seconds (%.1f messages/s).', stats['received'],
+                    stats['deleted'], stats['elapsedSeconds'], stats['messagesPerSecond'])
+
+    raise_for_failures(failures, stats['received'], 'delete', noun='messages',
+                       describe=lambda message: "message '{}'".format(message.id))
+
+
+def _receive_batches(executor, get, deletes, on_deleted, batch_size, max_workers, max_messages):
+    """
+    Generate the batches of messages received by up to `max_workers` get requests in flight, until the queue is
+    empty or `max_messages` were received. The deletions, a dict of their futures to the messages, are completed with
+    `on_deleted` in between, and fewer than `max_workers` batches wait for them before more messages are requested,
+    since these messages are invisible until their timeout.
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+
+    gets = {}  # future => the number of messages requested
+    requested = 0
+    empty = False
+    try:
+        while True:
+            while not empty and len(gets) < max_workers and len(deletes) < max_workers * batch_size and \
+                    (max_messages is None or requested < max_messages):
+                num_messages = batch_size if max_messages is None else min(batch_size, max_messages - requested)
+                gets[executor.submit(get, num_messages)] = num_messages
+                requested += num_messages
+            if not gets and not deletes:
+                return
+
+            for future in wait(list(gets) + list(deletes), return_when=FIRST_COMPLETED).done:
+                if future in deletes:
+                    on_deleted(deletes.pop(future), future)
+                    continue
+                messages = future.result()
+                requested -= gets.pop(future) - len(messages)
+                if messages:
+                    yield messages
+                else:
+                    # stop getting more messages, those in flight are still processed
+                    empty = True
+    finally:
+        for future in gets:
+            future.cancel()
+
+
+def _throughput(stats, count, start):
+    elapsed = time.time() - start
+    stats['elapsedSeconds'] = round(elapsed, 3)
+    stats['messagesPerSecond'] = round(count / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
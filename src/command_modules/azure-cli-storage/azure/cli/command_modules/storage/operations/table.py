@@ -14,3 +14,147 @@ def insert_table_entity(client, table_name, entity, if_exists='fail', timeout=No
     else:
         from knack.util import CLIError
         raise CLIError("Unrecognized value '{}' for --if-exists".format(if_exists))
+
+
+# the limits of an entity group transaction
+MAX_BATCH_ENTITIES = 100
+MAX_BATCH_SIZE = 4 * 1024 * 1024
+# the number of entities read ahead, waiting for more entities of their partition to fill a batch
+MAX_PENDING_ENTITIES = 10000
+
+_BATCH_OPERATIONS = {'fail': 'insert_entity', 'merge': 'insert_or_merge_entity', 'replace': 'insert_or_replace_entity'}
+
+
+def insert_table_entity_batch(cmd, client, table_name, source, source_format=None, if_exists='fail', max_workers=8,
+                              retries=3):
+    """
+    Insert the entities of a JSON lines or CSV file, or of the standard input, in entity group transactions of up to
+    100 entities of a partition. The batches of different partitions are committed in parallel, and those of a
+    partition in the order of the source, so that the last value of an entity given more than once wins.
+    """
+    import threading
+    from azure.cli.command_modules.storage.sdkutil import get_table_data_type
+    from azure.cli.command_modules.storage.transfer import run_transfers, raise_for_failures, call_with_retries
+
+    if if_exists not in _BATCH_OPERATIONS:
+        from knack.util import CLIError
+        raise CLIError("Unrecognized value '{}' for --if-exists".format(if_exists))
+    t_table_batch = get_table_data_type(cmd.cli_ctx, 'table', 'TableBatch')
+
+    # PartitionKey => the event set once the last batch of the partition read so far is committed or has failed
+    last_batches = {}
+    lock = threading.Lock()
+
+    def _commit_batch(entities):
+        table_batch = t_table_batch()
+        for entity in entities:
+            getattr(table_batch, _BATCH_OPERATIONS[if_exists])(entity)
+        client.commit_batch(table_name, table_batch)
+        return len(entities)
+
+    def _commit(batch):
+        partition_key, entities, previous_batch, done = batch
+        try:
+            # the previous batch of the partition was submitted first, so it's already running on another worker
+            if previous_batch:
+                previous_batch.wait()
+            # retried here so that the next batch of the partition waits for all the attempts
+            return call_with_retries(_commit_batch, entities, retries)
+        finally:
+            done.set()
+            with lock:
+                if last_batches.get(partition_key) is done:
+                    del last_batches[partition_key]
+
+    def _chained_batches(entities):
+        for partition_key, batch_entities in _entity_batches(entities):
+            done = threading.Event()
+            with lock:
+                previous_batch = last_batches.get(partition_key)
+                last_batches[partition_key] = done
+            yield partition_key, batch_entities, previous_batch, done
+
+    source_format = source_format or ('csv' if source.lower().endswith('.csv') else 'jsonl')
+    if source == '-':
+        import sys
+        inserted, failures = run_transfers(_commit, _chained_batches(_read_entities(sys.stdin, source_format)),
+                                           max_workers=max_workers, retries=0)
+    else:
+        with open(source) as f:
+            inserted, failures = run_transfers(_commit, _chained_batches(_read_entities(f, source_format)),
+                                               max_workers=max_workers, retries=0)
+
+    raise_for_failures(failures, len(inserted) + len(failures), 'insert', noun='batches',
+                       describe=lambda b: 'the batch of {} entities of partition {}'.format(len(b[1]), b[0]))
+    return {'inserted': sum(inserted), 'batches': len(inserted)}
+
+
+def _read_entities(stream, source_format):
+    """ The entities of a JSON lines or CSV stream, with their PartitionKey and RowKey. The values of a CSV are
+    converted to numbers when they are numeric. """
+    import json
+    from knack.util import CLIError
+    from azure.cli.command_modules.storage._validators import cast_entity_value
+
+    if source_format == 'csv':
+        import csv
+        rows = ((line, {key: cast_entity_value(key, value) for key, value in row.items() if value != ''})
+                for line, row in enumerate(csv.DictReader(stream), 2))
+    else:
+        def _rows():
+            for line, text in enumerate(stream, 1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except ValueError as ex:
+                        raise CLIError('line {}: invalid JSON: {}'.format(line, ex))
+        rows = _rows()
+
+    for line, entity in rows:
+        if not isinstance(entity, dict):
+            raise CLIError('line {}: an entity must be a JSON object'.format(line))
+        for key in list(entity):
+            for entity_key in ('PartitionKey', 'RowKey'):
+                if key != entity_key and key.lower() == entity_key.lower():
+                    entity[entity_key] = entity.pop(key)
+        missing_keys = [key for key in ('PartitionKey', 'RowKey') if key not in entity]
+        if missing_keys:
+            raise CLIError('line {}: the entity has no {}'.format(line, ' or '.join(missing_keys)))
+        yield entity
+
+
+def _entity_batches(entities):
+    """ Group the entities into batches of (PartitionKey, entities) which an entity group transaction can commit: up
+    to 100 entities of a partition, 4 MB in total, and at most one operation per entity. """
+    import json
+
+    # PartitionKey => [entities, their row keys, their size]
+    partitions = {}
+    pending = [0]
+
+    def _flush(partition_key):
+        entities, _, _ = partitions.pop(partition_key)
+        pending[0] -= len(entities)
+        return partition_key, entities
+
+    for entity in entities:
+        partition_key = entity['PartitionKey']
+        # a rough estimate of the size of the entity in the body of the batch
+        size = len(json.dumps(entity, default=str)) + 512
+        batch = partitions.get(partition_key)
+        if batch and (len(batch[0]) == MAX_BATCH_ENTITIES or batch[2] + size > MAX_BATCH_SIZE or
+                      entity['RowKey'] in batch[1]):
+            yield _flush(partition_key)
+            batch = None
+        if not batch:
+            batch = partitions[partition_key] = [[], set(), 0]
+        batch[0].append(entity)
+        batch[1].add(entity['RowKey'])
+        batch[2] += size
+        pending[0] += 1
+        if pending[0] > MAX_PENDING_ENTITIES:
+            # many partitions are interleaved, the largest batch is started rather than keeping them all in memory
+            yield _flush(max(partitions, key=lambda k: len(partitions[k][0])))
+
+    for partition_key in list(partitions):
+        yield _flush(partition_key)
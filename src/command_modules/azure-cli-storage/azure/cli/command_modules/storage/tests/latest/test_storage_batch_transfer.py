@@ -0,0 +1,706 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+from azure.common import AzureHttpError, AzureException, AzureMissingResourceHttpError
+from knack.util import CLIError
+
+from azure.cli.command_modules.storage.transfer import TransferJournal, run_transfers, raise_for_failures
+from azure.cli.command_modules.storage._hash_cache import FileHashCache
+from azure.cli.command_modules.storage.util import iter_blobs, compute_file_md5, glob_files_remotely
+from azure.cli.command_modules.storage.operations.blob import (storage_blob_upload_batch, storage_blob_download_batch,
+                                                               storage_blob_delete_batch, storage_blob_sync,
+                                                               storage_blob_copy_batch, upload_blob)
+from azure.cli.command_modules.storage.operations.file import storage_file_upload_batch
+from azure.cli.command_modules.storage.operations.table import insert_table_entity_batch
+from azure.cli.command_modules.storage.operations.queue import put_message_batch, drain_messages
+
+
+def _blob(name, content=None):
+    blob = mock.MagicMock()
+    blob.name = name
+    blob.properties.content_length = len(content) if content is not None else 0
+    blob.properties.content_settings.content_md5 = None
+    blob.properties.last_modified = None
+    if content is not None:
+        import base64
+        import hashlib
+        blob.properties.content_settings.content_md5 = base64.b64encode(
+            hashlib.md5(content.encode('utf-8')).digest()).decode('utf-8')
+    return blob
+
+
+class TestTransfer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_transfer_journal(self):
+        path = os.path.join(self.temp_dir, 'journal')
+        with TransferJournal(path) as journal:
+            self.assertIsNone(journal.get('a'))
+            journal.record('a', 10, 1.5, '"etag-a"')
+            journal.record('b', 20, 2.5)
+            journal.record('a', 11, 3.5, '"etag-a2"')
+        with open(path, 'a') as f:
+            f.write('{"name": "c", "si')  # interrupted write
+
+        journal = TransferJournal(path)
+        self.assertTrue(journal.is_completed('a', 11, 3.5))
+        self.assertFalse(journal.is_completed('a', 10, 1.5))
+        self.assertFalse(journal.is_completed('b', 20, 2.6))
+        self.assertFalse(journal.is_completed('c', 1, 1))
+        self.assertEqual(journal.get('a')['etag'], '"etag-a2"')
+
+    def test_run_transfers(self):
+        attempts = {}
+        lock = threading.Lock()
+
+        def _transfer(item):
+            with lock:
+                attempts[item] = attempts.get(item, 0) + 1
+            if item == 3 and attempts[item] < 3:
+                raise AzureHttpError('server busy', 503)
+            if item == 5:
+                raise AzureHttpError('forbidden', 403)
+            if item == 7:
+                raise AzureException('connection reset')
+            return item * 10
+
+        progress = []
+        results, failures = run_transfers(_transfer, iter(range(10)), max_workers=3, retries=2, retry_delay=0,
+                                          total=10, progress_callback=lambda current, total: progress.append(current))
+        self.assertEqual(results, [0, 10, 20, 30, 40, 60, 80, 90])
+        self.assertEqual([item for item, _ in failures], [5, 7])
+        # client errors are not retried, transient ones are until the retries are exhausted
+        self.assertEqual((attempts[3], attempts[5], attempts[7]), (3, 1, 3))
+        self.assertEqual(progress, list(range(1, 11)))
+
+        with self.assertRaisesRegexp(CLIError, '2 of 10 files failed to upload'):
+            raise_for_failures(failures, 10, 'upload')
+        raise_for_failures([], 10, 'upload')
+
+    def _cmd(self, models=mock.MagicMock):
+        cmd = mock.MagicMock()
+        cmd.get_models.return_value = models
+        cmd.cli_ctx.config.getint.return_value = 30
+        cmd.cli_ctx.config.config_dir = self.temp_dir
+        return cmd
+
+    def _create_files(self, sizes):
+        source = os.path.join(self.temp_dir, 'source')
+        os.mkdir(source)
+        files = []
+        for name, size in sizes:
+            path = os.path.join(source, name)
+            with open(path, 'w') as f:
+                f.write('x' * size)
+            files.append((path, name))
+        return source, files
+
+    def test_upload_batch_resumes_from_journal(self):
+        source, files = self._create_files([('large', 300), ('small', 1), ('medium', 20)])
+        journal = os.path.join(self.temp_dir, 'journal')
+        cmd = self._cmd()
+        client = mock.MagicMock()
+        client.make_blob_url.side_effect = lambda container, blob: 'https://account/{}/{}'.format(container, blob)
+        uploaded = []
+
+        def _create_blob_from_path(**kwargs):
+            if kwargs['blob_name'] == 'large' and len(uploaded) < 3:
+                uploaded.append(None)
+                raise AzureHttpError('forbidden', 403)
+            uploaded.append(kwargs['blob_name'])
+            return mock.MagicMock(etag='"{}"'.format(kwargs['blob_name']))
+        client.create_blob_from_path.side_effect = _create_blob_from_path
+
+        def _upload_batch():
+            return storage_blob_upload_batch(cmd, client, source, 'container', source_files=files,
+                                             destination_container_name='container', blob_type='block',
+                                             content_settings=mock.MagicMock(), max_workers=1, journal=journal)
+
+        with self.assertRaisesRegexp(CLIError, '1 of 3 files failed to upload'):
+            _upload_batch()
+        # smaller files are uploaded first
+        self.assertEqual(uploaded, ['small', 'medium', None])
+        self.assertTrue(TransferJournal(journal).is_completed('https://account/container/medium', 20,
+                                                              os.stat(files[2][0]).st_mtime))
+
+        # only the failed file is uploaded again
+        results = _upload_batch()
+        self.assertEqual(uploaded[3:], ['large'])
+        self.assertEqual([r['eTag'] for r in results], ['"large"'])
+
+        # a modified file is uploaded again
+        with open(files[1][0], 'w') as f:
+            f.write('changed')
+        os.utime(files[1][0], (0, 0))
+        _upload_batch()
+        self.assertEqual(uploaded[4:], ['small'])
+
+    def test_iter_blobs(self):
+        client = mock.MagicMock()
+        client.list_blobs.return_value = iter([_blob('dir/a.txt'), _blob('dir/b.json'), _blob('dir/sub/c.txt')])
+        self.assertEqual([b.name for b in iter_blobs(client, 'container', 'dir/*.txt')], ['dir/a.txt', 'dir/sub/c.txt'])
+        client.list_blobs.assert_called_once_with('container', prefix='dir/')
+
+        client.list_blobs.return_value = iter([_blob('a')])
+        self.assertEqual([b.name for b in iter_blobs(client, 'container')], ['a'])
+        client.list_blobs.assert_called_with('container', prefix=None)
+
+        client.get_blob_properties.side_effect = AzureMissingResourceHttpError('not found', 404)
+        self.assertEqual(list(iter_blobs(client, 'container', 'missing')), [])
+
+    def test_download_batch_skips_up_to_date_files(self):
+        destination = os.path.join(self.temp_dir, 'destination')
+        os.makedirs(os.path.join(destination, 'dir'))
+        for name, content in [('same', 'abc'), ('dir/changed', 'abc')]:
+            with open(os.path.join(destination, name), 'w') as f:
+                f.write(content)
+        self.assertEqual(compute_file_md5(os.path.join(destination, 'same')), _blob('same', 'abc').properties.
+                         content_settings.content_md5)
+
+        client = mock.MagicMock()
+        blobs = [_blob('same', 'abc'), _blob('/dir/changed', 'abd'), _blob('new', 'x'), _blob('no-md5')] + \
+            [_blob('more/{}'.format(i), 'x') for i in range(10)]
+        listed = []
+
+        def _list_blobs(container, prefix=None):
+            for blob in blobs:
+                listed.append(blob.name)
+                yield blob
+        client.list_blobs.side_effect = _list_blobs
+        downloads = []
+
+        def _get_blob_to_path(container, blob_name, file_path, **kwargs):
+            downloads.append((blob_name, file_path, len(listed)))
+            return _blob(blob_name)
+        client.get_blob_to_path.side_effect = _get_blob_to_path
+
+        results = storage_blob_download_batch(self._cmd(), client, 'container', destination, 'container',
+                                              max_workers=1)
+        self.assertEqual(sorted(d[:2] for d in downloads)[:3],
+                         [('/dir/changed', os.path.join(destination, 'dir/changed')),
+                          ('more/0', os.path.join(destination, 'more/0')),
+                          ('more/1', os.path.join(destination, 'more/1'))])
+        self.assertNotIn('same', [d[0] for d in downloads])
+        self.assertEqual(sorted(results), sorted(b.name for b in blobs[1:]))
+
+        # two blobs with the same local path, nothing is downloaded
+        blobs = [_blob('a'), _blob('b'), _blob('/a')]
+        del downloads[:]
+        with self.assertRaisesRegexp(CLIError, 'Multiple blobs with download path'):
+            storage_blob_download_batch(self._cmd(), client, 'container', destination, 'container')
+        self.assertEqual(downloads, [])
+
+    def test_file_hash_cache(self):
+        _, files = self._create_files([('old', 3), ('recent', 3)])
+        old, recent = files[0][0], files[1][0]
+        os.utime(old, (1000, 1000))
+        cli_ctx = self._cmd().cli_ctx
+        with mock.patch('azure.cli.command_modules.storage.util.compute_file_md5',
+                        side_effect=compute_file_md5) as compute:
+            with FileHashCache(cli_ctx) as hash_cache:
+                self.assertEqual(hash_cache.get_md5(old), _blob('old', 'xxx').properties.content_settings.content_md5)
+                hash_cache.get_md5(recent)
+            with FileHashCache(cli_ctx) as hash_cache:
+                hash_cache.get_md5(old)
+                # a file modified in the last seconds is hashed every time
+                hash_cache.get_md5(recent)
+                self.assertEqual(compute.call_count, 3)
+
+                with open(old, 'w') as f:
+                    f.write('changed')
+                os.utime(old, (1000, 1000))
+                self.assertEqual(hash_cache.get_md5(old), _blob('old', 'changed').properties.content_settings.
+                                 content_md5)
+                self.assertEqual(compute.call_count, 4)
+
+            cli_ctx.config.getint.return_value = 0
+            with FileHashCache(cli_ctx) as hash_cache:
+                hash_cache.get_md5(old)
+                self.assertEqual(compute.call_count, 5)
+
+    def test_upload_if_changed(self):
+        from azure.common import AzureMissingResourceHttpError
+
+        class _ContentSettings(object):
+            def __init__(self, content_type=None, content_encoding=None, content_language=None,
+                         content_disposition=None, cache_control=None, content_md5=None):
+                self.content_type, self.content_encoding, self.content_md5 = content_type, content_encoding, content_md5
+                self.content_language, self.content_disposition = content_language, content_disposition
+                self.cache_control = cache_control
+
+        source, files = self._create_files([('same', 3), ('changed', 3), ('new', 3)])
+        remote = {'same': _blob('same', 'xxx'), 'changed': _blob('changed', 'abc')}
+        client = mock.MagicMock()
+
+        def _get_blob_properties(container, blob_name):
+            if blob_name not in remote:
+                raise AzureMissingResourceHttpError('not found', 404)
+            return remote[blob_name]
+        client.get_blob_properties.side_effect = _get_blob_properties
+        cmd = self._cmd(models=_ContentSettings)
+
+        self.assertIsNone(upload_blob(cmd, client, 'container', 'same', files[0][0], blob_type='block',
+                                      content_settings=_ContentSettings(), if_changed=True))
+        self.assertFalse(client.create_blob_from_path.called)
+
+        upload_blob(cmd, client, 'container', 'changed', files[1][0], blob_type='block',
+                    content_settings=_ContentSettings(), if_changed=True)
+        # the MD5 of the file is set on the blob, to be compared by the next upload
+        self.assertEqual(client.create_blob_from_path.call_args[1]['content_settings'].content_md5,
+                         remote['same'].properties.content_settings.content_md5)
+
+        results = storage_blob_upload_batch(cmd, client, source, 'container', source_files=files,
+                                            destination_container_name='container', blob_type='block',
+                                            content_settings=_ContentSettings(), if_changed=True)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(sorted(c[1]['blob_name'] for c in client.create_blob_from_path.call_args_list),
+                         ['changed', 'changed', 'new'])
+
+        # a file whose upload fails a precondition isn't reported as unchanged
+        def _create_blob_from_path(container_name, blob_name, *args, **kwargs):
+            if blob_name == 'new':
+                raise AzureHttpError('precondition failed', 412)
+        client.create_blob_from_path.side_effect = _create_blob_from_path
+        logger = mock.MagicMock()
+        with mock.patch('azure.cli.command_modules.storage.operations.blob.get_logger', return_value=logger):
+            results = storage_blob_upload_batch(cmd, client, source, 'container', source_files=files,
+                                                destination_container_name='container', blob_type='block',
+                                                content_settings=_ContentSettings(), if_changed=True)
+        self.assertEqual(len(results), 1)
+        logger.warning.assert_any_call('skipped %d files whose blobs have the same content', 1)
+
+    def test_upload_stdin_in_blocks(self):
+        import io
+
+        class _BlobBlock(object):
+            def __init__(self, id=None):  # pylint: disable=redefined-builtin
+                self.id = id
+
+        lock = threading.Lock()
+        in_flight = [0, 0]
+        blocks = {}
+        attempts = []
+
+        def _put_block(container, blob, data, block_id, **kwargs):
+            with lock:
+                attempts.append(block_id)
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+                if len(attempts) == 2:
+                    in_flight[0] -= 1
+                    raise AzureHttpError('server busy', 503)
+            time.sleep(0.01)
+            with lock:
+                blocks[block_id] = data
+                in_flight[0] -= 1
+
+        client = mock.MagicMock()
+        client.put_block.side_effect = _put_block
+        content = b''.join(chr(ord('a') + i % 26).encode('utf-8') * 3 for i in range(60))
+        progress = []
+        cmd = self._cmd(models=_BlobBlock)
+        stdin = mock.MagicMock(buffer=io.BytesIO(content))
+
+        with mock.patch('azure.cli.command_modules.storage.operations.blob.STREAM_BLOCK_SIZE', 4), \
+                mock.patch('azure.cli.command_modules.storage.operations.blob.STREAM_BLOCKS_PER_SIZE', 5), \
+                mock.patch('azure.cli.command_modules.storage.operations.blob.MAX_STREAM_BLOCK_SIZE', 16), \
+                mock.patch('azure.cli.command_modules.storage.transfer.time.sleep'), \
+                mock.patch('sys.stdin', stdin):
+            upload_blob(cmd, client, 'container', 'blob', '-', blob_type='block', content_settings=mock.MagicMock(),
+                        max_connections=3, progress_callback=lambda current, total: progress.append((current, total)))
+
+        block_list = [block.id for block in client.put_block_list.call_args[0][2]]
+        self.assertEqual(b''.join(blocks[block_id] for block_id in block_list), content)
+        # the blocks grow from 4 to 8 and at most 16 bytes, the block ids have the same length
+        self.assertEqual([len(blocks[block_id]) for block_id in block_list], [4] * 5 + [8] * 5 + [16] * 7 + [8])
+        self.assertEqual(len(set(len(block_id) for block_id in block_list)), 1)
+        self.assertLessEqual(in_flight[1], 3)
+        self.assertEqual(progress[-1], (len(content), len(content)))
+
+        with self.assertRaisesRegexp(CLIError, 'only block blobs'):
+            upload_blob(cmd, client, 'container', 'blob', '-', blob_type='page', content_settings=mock.MagicMock())
+
+    def test_delete_batch(self):
+        client = mock.MagicMock()
+        client.list_blobs.return_value = iter([_blob('a'), _blob('b'), _blob('c'), _blob('d')])
+
+        def _delete_blob(blob_name, **kwargs):
+            if blob_name == 'b':
+                raise AzureHttpError('precondition failed', 412)
+            if blob_name == 'c':
+                raise AzureHttpError('forbidden', 403)
+        client.delete_blob.side_effect = _delete_blob
+
+        with self.assertRaisesRegexp(CLIError, '1 of 4 blobs failed to delete'):
+            storage_blob_delete_batch(client, 'container', 'container', max_workers=2)
+        self.assertEqual(sorted(c[1]['blob_name'] for c in client.delete_blob.call_args_list), ['a', 'b', 'c', 'd'])
+
+    def test_sync(self):
+        import datetime
+        from dateutil.tz import tzutc
+        source, _ = self._create_files([('same', 3), ('same-md5', 3), ('other-md5', 3), ('resized', 3), ('new', 3)])
+        os.utime(os.path.join(source, 'same'), (1000, 1000))
+        old = datetime.datetime(1970, 1, 1, tzinfo=tzutc())
+
+        def _remote(name, content, last_modified=None):
+            blob = _blob('site/' + name, content)
+            blob.properties.last_modified = last_modified or old
+            return blob
+
+        remote = [_remote('same', 'abc', datetime.datetime(1970, 1, 1, 1, tzinfo=tzutc())),
+                  _remote('same-md5', 'xxx'), _remote('other-md5', 'abc'), _remote('resized', 'xxxx'),
+                  _remote('deleted', 'x')]
+        client = mock.MagicMock()
+        client.list_blobs.side_effect = lambda container, prefix=None: iter(remote)
+        cmd = self._cmd()
+
+        result = storage_blob_sync(cmd, client, source, 'container', destination_path='site', dryrun=True)
+        self.assertEqual(result, {'uploaded': ['site/other-md5', 'site/resized', 'site/new'], 'deleted': [],
+                                  'unchanged': 2})
+        client.list_blobs.assert_called_with('container', prefix='site/')
+        self.assertFalse(client.create_blob_from_path.called)
+
+        result = storage_blob_sync(cmd, client, source, 'container', destination_path='site', delete_destination=True,
+                                   max_workers=1)
+        self.assertEqual(result['deleted'], ['site/deleted'])
+        self.assertEqual(sorted(c[1]['blob_name'] for c in client.create_blob_from_path.call_args_list),
+                         ['site/new', 'site/other-md5', 'site/resized'])
+        client.delete_blob.assert_called_once_with('container', 'site/deleted')
+
+    def test_file_upload_batch_creates_directories_once(self):
+        source = os.path.join(self.temp_dir, 'source')
+        for directory in ['a/b/c', 'a/d', 'e']:
+            os.makedirs(os.path.join(source, directory))
+        for name in ['root', 'a/1', 'a/2', 'a/b/c/3', 'a/b/c/4', 'a/d/5', 'e/6']:
+            with open(os.path.join(source, name), 'w') as f:
+                f.write(name)
+
+        events = []
+        lock = threading.Lock()
+        client = mock.MagicMock()
+        client.make_file_url.side_effect = lambda *parts: '/'.join(p for p in parts if p)
+
+        def _create_directory(share_name, directory_name, fail_on_exist):
+            with lock:
+                events.append(('dir', directory_name))
+        client.create_directory.side_effect = _create_directory
+
+        def _create_file_from_path(share_name, directory_name, file_name, **kwargs):
+            if file_name == '4' and not [e for e in events if e == ('file', '4')]:
+                with lock:
+                    events.append(('file', '4'))
+                raise AzureHttpError('server busy', 503)
+            with lock:
+                events.append(('file', file_name))
+        client.create_file_from_path.side_effect = _create_file_from_path
+        cmd = self._cmd()
+
+        with mock.patch('azure.cli.command_modules.storage.transfer.time.sleep'):
+            results = storage_file_upload_batch(cmd, client, 'share', source, destination_path='dst',
+                                                content_settings=mock.MagicMock(), max_workers=4)
+        self.assertEqual(sorted(results), ['share/dst/a/1', 'share/dst/a/2', 'share/dst/a/b/c/3', 'share/dst/a/b/c/4',
+                                           'share/dst/a/d/5', 'share/dst/e/6', 'share/dst/root'])
+
+        # each directory is created once, parents before their children, and all of them before the files
+        directories = [name for kind, name in events if kind == 'dir']
+        self.assertEqual(sorted(directories), ['dst', 'dst/a', 'dst/a/b', 'dst/a/b/c', 'dst/a/d', 'dst/e'])
+        self.assertEqual([name.count('/') for name in directories], sorted(name.count('/') for name in directories))
+        self.assertEqual(events[:len(directories)], [('dir', name) for name in directories])
+
+        client.create_directory.side_effect = AzureHttpError('forbidden', 403)
+        with self.assertRaisesRegexp(CLIError, '1 of 1 directories failed to create'):
+            storage_file_upload_batch(cmd, client, 'share', source, destination_path='other',
+                                      content_settings=mock.MagicMock())
+
+    def test_copy_batch_waits_for_copies(self):
+        source_client = mock.MagicMock()
+        source_client.list_blobs.side_effect = lambda container, prefix=None: iter(
+            [_blob('done', 'x' * 5), _blob('slow', 'x' * 10), _blob('flaky', 'x' * 20), _blob('broken', 'x')])
+        source_client.make_blob_url.side_effect = lambda container, blob, sas_token=None: 'https://src/' + blob
+        client = mock.MagicMock()
+        client.make_blob_url.side_effect = lambda container, blob: 'https://dst/{}/{}'.format(container, blob)
+        polls = {'slow': ['pending', 'pending', 'success'], 'flaky': ['failed', 'success'],
+                 'broken': ['failed', 'failed', 'failed']}
+
+        def _copy(status, progress=None):
+            return mock.MagicMock(status=status, progress=progress, status_description='500 InternalError')
+
+        def _copy_blob(container, blob_name, url):
+            return _copy('success', '5/5') if blob_name.endswith('done') else _copy('pending')
+        client.copy_blob.side_effect = _copy_blob
+
+        def _get_blob_properties(container, blob_name):
+            status = polls[blob_name.split('/')[-1]].pop(0)
+            return mock.MagicMock(properties=mock.MagicMock(copy=_copy(status, '10/10' if status == 'success' else
+                                                                       None)))
+        client.get_blob_properties.side_effect = _get_blob_properties
+
+        journal = os.path.join(self.temp_dir, 'journal')
+        with mock.patch('time.sleep') as sleep:
+            with self.assertRaisesRegexp(CLIError, '1 of 4 blobs failed to copy'):
+                storage_blob_copy_batch(mock.MagicMock(), client, source_client, destination_container='backup',
+                                        destination_path='dir', source_container='data', source_sas='sas', wait=True,
+                                        retries=2, journal=journal)
+        # the failed copies are started again, and the polling backs off while no copy completes
+        self.assertEqual(sorted(c[0][1] for c in client.copy_blob.call_args_list),
+                         ['dir/broken', 'dir/broken', 'dir/broken', 'dir/done', 'dir/flaky', 'dir/flaky', 'dir/slow'])
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [1, 2, 1])
+
+        # the completed copies are skipped when the batch is run again
+        polls['broken'] = ['success']
+        client.copy_blob.reset_mock()
+        with mock.patch('time.sleep'):
+            result = storage_blob_copy_batch(mock.MagicMock(), client, source_client, destination_container='backup',
+                                             destination_path='dir', source_container='data', source_sas='sas',
+                                             wait=True, journal=journal)
+        self.assertEqual([c[0][1] for c in client.copy_blob.call_args_list], ['dir/broken'])
+        self.assertEqual((result['copied'], result['skipped'], result['failed'], result['bytes']), (1, 3, 0, 10))
+
+        # without waiting, the URLs of the destination blobs are returned once the copies have started
+        self.assertEqual(storage_blob_copy_batch(mock.MagicMock(), client, source_client,
+                                                 destination_container='backup', source_container='data',
+                                                 source_sas='sas', pattern='d*'),
+                         ['https://dst/backup/done'])
+
+    def test_glob_files_remotely(self):
+        class _Directory(object):  # pylint: disable=too-few-public-methods
+            def __init__(self, name):
+                self.name = name
+
+        class _File(_Directory):  # pylint: disable=too-few-public-methods
+            pass
+
+        tree = {'': ['logs', 'other', 'a.txt'], 'logs': ['2017', '2018', 'b.txt'], 'logs/2017': ['c.txt'],
+                'logs/2018': ['d.txt', 'e.json', 'jan'], 'logs/2018/jan': ['f.txt'], 'other': ['g.txt']}
+        listed = []
+        lock = threading.Lock()
+
+        def _list_directories_and_files(share, directory):
+            with lock:
+                listed.append(directory)
+            if directory == 'logs/2018/jan' and listed.count(directory) == 1:
+                raise AzureHttpError('server busy', 503)
+            return [_Directory(n) if n in ('logs', 'other', '2017', '2018', 'jan') else _File(n)
+                    for n in tree[directory]]
+
+        cmd = mock.MagicMock()
+        cmd.get_models.return_value = (_Directory, _File)
+        client = mock.MagicMock()
+        client.list_directories_and_files.side_effect = _list_directories_and_files
+
+        with mock.patch('azure.cli.command_modules.storage.transfer.time.sleep'):
+            self.assertEqual(sorted(glob_files_remotely(cmd, client, 'share', None, max_workers=3)),
+                             [('', 'a.txt'), ('logs', 'b.txt'), ('logs/2017', 'c.txt'), ('logs/2018', 'd.txt'),
+                              ('logs/2018', 'e.json'), ('logs/2018/jan', 'f.txt'), ('other', 'g.txt')])
+
+            # the directories outside of the prefix of the pattern are not listed
+            del listed[:]
+            self.assertEqual(sorted(glob_files_remotely(cmd, client, 'share', 'logs/2018/*.txt')),
+                             [('logs/2018', 'd.txt'), ('logs/2018/jan', 'f.txt')])
+            self.assertEqual(sorted(listed), ['', 'logs', 'logs/2018', 'logs/2018/jan', 'logs/2018/jan'])
+
+    def test_insert_entity_batch(self):
+        import json
+
+        class _TableBatch(object):
+            def __init__(self):
+                self.operations = []
+
+            def insert_or_replace_entity(self, entity):
+                self.operations.append(entity)
+
+        committed = []
+        attempts = [0]
+
+        def _commit_batch(table_name, batch):
+            attempts[0] += 1
+            if attempts[0] == 1:
+                raise AzureHttpError('server busy', 503)
+            if any(e['RowKey'] == 'bad' for e in batch.operations):
+                raise AzureHttpError('bad request', 400)
+            # time.sleep is patched, a late commit of the first of the two batches with RowKey 248 of partition p0
+            threading.Event().wait(0.05 if batch.operations[0]['RowKey'] == '200' else 0)
+            committed.append([(e['PartitionKey'], e['RowKey']) for e in batch.operations])
+
+        client = mock.MagicMock()
+        client.commit_batch.side_effect = _commit_batch
+        source = os.path.join(self.temp_dir, 'entities.jsonl')
+        with open(source, 'w') as f:
+            for i in range(250):
+                f.write(json.dumps({'PartitionKey': 'p{}'.format(i % 2), 'rowkey': str(i), 'value': i}) + '\n')
+            f.write('\n' + json.dumps({'PartitionKey': 'p0', 'RowKey': '248', 'value': 'again'}) + '\n')
+            f.write(json.dumps({'PartitionKey': 'p2', 'RowKey': 'bad'}) + '\n')
+
+        with mock.patch('azure.cli.command_modules.storage.sdkutil.get_table_data_type', return_value=_TableBatch), \
+                mock.patch('azure.cli.command_modules.storage.transfer.time.sleep'):
+            with self.assertRaisesRegexp(CLIError, '1 of 6 batches failed to insert'):
+                insert_table_entity_batch(mock.MagicMock(), client, 'table', source, if_exists='replace',
+                                          max_workers=2)
+        # batches have up to 100 entities of a partition, and an entity at most once
+        self.assertEqual(sorted(len(batch) for batch in committed), [1, 25, 25, 100, 100])
+        self.assertTrue(all(len(set(p for p, _ in batch)) == 1 for batch in committed))
+        self.assertEqual(sum(len(batch) for batch in committed), 251)
+        # the batches of a partition are committed in order, the entity given twice has its last value
+        self.assertEqual([len(batch) for batch in committed if ('p0', '248') in batch], [25, 1])
+
+        csv_source = os.path.join(self.temp_dir, 'entities.csv')
+        with open(csv_source, 'w') as f:
+            f.write('PartitionKey,RowKey,count,name\np,1,10,a\np,2,,b\n')
+        del committed[:]
+        with mock.patch('azure.cli.command_modules.storage.sdkutil.get_table_data_type', return_value=_TableBatch):
+            result = insert_table_entity_batch(mock.MagicMock(), client, 'table', csv_source, if_exists='replace')
+        self.assertEqual(result, {'inserted': 2, 'batches': 1})
+        entities = client.commit_batch.call_args[0][1].operations
+        self.assertEqual(entities[0]['count'], 10)
+        self.assertNotIn('count', entities[1])
+
+        with open(csv_source, 'w') as f:
+            f.write('PartitionKey,name\np,a\n')
+        with mock.patch('azure.cli.command_modules.storage.sdkutil.get_table_data_type', return_value=_TableBatch):
+            with self.assertRaisesRegexp(CLIError, 'line 2: the entity has no RowKey'):
+                insert_table_entity_batch(mock.MagicMock(), client, 'table', csv_source)
+
+    def test_put_and_drain_messages(self):
+        lock = threading.Lock()
+        queue = []
+        deleted = []
+        rejected = set()
+        calls = {'put': 0, 'get': 0}
+
+        def _put_message(queue_name, content, visibility_timeout=None, time_to_live=None):
+            with lock:
+                calls['put'] += 1
+                if calls['put'] == 3:
+                    raise AzureHttpError('server busy', 503)
+                queue.append(content)
+
+        def _get_messages(queue_name, num_messages=None, visibility_timeout=None):
+            with lock:
+                calls['get'] += 1
+                messages = []
+                for _ in range(min(num_messages, len(queue))):
+                    message = mock.MagicMock()
+                    message.id = message.pop_receipt = queue.pop(0)
+                    messages.append(message)
+                return messages
+
+        def _delete_message(queue_name, message_id, pop_receipt):
+            if message_id in rejected:
+                raise AzureHttpError('pop receipt mismatch', 400)
+            with lock:
+                deleted.append(message_id)
+
+        client = mock.MagicMock()
+        client.put_message.side_effect = _put_message
+        client.get_messages.side_effect = _get_messages
+        client.delete_message.side_effect = _delete_message
+
+        source = os.path.join(self.temp_dir, 'messages.txt')
+        with open(source, 'w') as f:
+            f.write('\n'.join('message {}'.format(i) for i in range(100)) + '\n\n')
+        with mock.patch('azure.cli.command_modules.storage.transfer.time.sleep'):
+            result = put_message_batch(client, 'queue', source, max_workers=4)
+        self.assertEqual(result['sent'], 100)
+        self.assertEqual(sorted(queue), sorted('message {}'.format(i) for i in range(100)))
+
+        # the messages are only deleted once they are written, one per line
+        cmd = self._cmd()
+        cmd.cli_ctx.invocation.data = {'output': 'json'}
+        with self.assertRaisesRegexp(CLIError, 'requires --output jsonl'):
+            drain_messages(cmd, client, 'queue')
+        self.assertEqual(calls['get'], 0)
+        cmd.cli_ctx.invocation.data['output'] = 'jsonl'
+
+        # the number of messages requested is bounded by --max-messages
+        received = [m.id for m in drain_messages(cmd, client, 'queue', batch_size=16, max_messages=40,
+                                                 max_workers=4)]
+        self.assertEqual(len(received), 40)
+        self.assertEqual(sorted(deleted), sorted(received))
+        self.assertEqual(len(queue), 60)
+
+        del deleted[:]
+        queue[:] = sorted('message {}'.format(i) for i in range(100))
+        rejected.add('message 7')
+        received = []
+        with self.assertRaisesRegexp(CLIError, '1 of 100 messages failed to delete'):
+            for message in drain_messages(cmd, client, 'queue', batch_size=50, max_workers=4):
+                received.append(message.id)
+        self.assertEqual(len(received), 100)
+        self.assertEqual(len(deleted), 99)
+        self.assertTrue(all(c[1]['num_messages'] == 32 for c in client.get_messages.call_args_list[-4:]))
+
+    def test_drain_messages_deletes_written_messages(self):
+        import errno
+        from six import StringIO
+        from azure.cli.testsdk import TestCli
+
+        class _Message(object):  # pylint: disable=too-few-public-methods
+            def __init__(self, content):
+                self.id = self.pop_receipt = self.content = content
+
+        class _Output(StringIO):
+            def __init__(self, max_lines=None):
+                StringIO.__init__(self)
+                self.max_lines = max_lines
+
+            def write(self, s):
+                if s and self.max_lines is not None and self.getvalue().count('\n') >= self.max_lines:
+                    raise IOError(errno.EPIPE, 'Broken pipe')
+                return StringIO.write(self, s)
+
+        lock = threading.Lock()
+        queue = []
+        deleted = []
+
+        def _get_messages(queue_name, num_messages=None, visibility_timeout=None):
+            with lock:
+                messages = [_Message(content) for content in queue[:num_messages]]
+                del queue[:num_messages]
+                return messages
+
+        def _delete_message(queue_name, message_id, pop_receipt):
+            with lock:
+                deleted.append((message_id, '"{}"'.format(message_id) in out_file.getvalue()))
+
+        client = mock.MagicMock()
+        client.get_messages.side_effect = _get_messages
+        client.delete_message.side_effect = _delete_message
+        args = 'storage message drain -q queue --account-name account --account-key a2V5 -o jsonl'.split()
+
+        # each message is written to the output before it's deleted
+        queue[:] = ['message {}'.format(i) for i in range(100)]
+        out_file = _Output()
+        with mock.patch('azure.cli.command_modules.storage._client_factory.generic_data_service_factory',
+                        return_value=client):
+            self.assertEqual(TestCli().invoke(args, out_file=out_file), 0)
+        self.assertEqual(len(out_file.getvalue().splitlines()), 100)
+        self.assertEqual(sorted(m for m, _ in deleted), sorted('message {}'.format(i) for i in range(100)))
+        self.assertTrue(all(written for _, written in deleted))
+
+        # the messages which were not written when the reader went away are not deleted
+        del deleted[:]
+        queue[:] = ['message {}'.format(i) for i in range(100)]
+        out_file = _Output(max_lines=3)
+        with mock.patch('azure.cli.command_modules.storage._client_factory.generic_data_service_factory',
+                        return_value=client):
+            TestCli().invoke(args, out_file=out_file)
+        self.assertEqual(len(out_file.getvalue().splitlines()), 3)
+        self.assertTrue(deleted)
+        self.assertTrue(all(written for _, written in deleted))
+
+
+if __name__ == '__main__':
+    unittest.main()
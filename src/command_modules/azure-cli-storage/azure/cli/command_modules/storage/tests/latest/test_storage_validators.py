@@ -3,10 +3,14 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import shutil
+import tempfile
 import unittest
 from argparse import Namespace
 from six import StringIO
 
+import mock
+
 from knack import CLI
 
 from azure.cli.core._config import GLOBAL_CONFIG_DIR, ENV_VAR_PREFIX
@@ -18,6 +22,8 @@ from azure.cli.command_modules.storage._validators import (get_permission_valida
                                                            process_blob_source_uri, get_char_options_validator)
 from azure.cli.testsdk import api_version_constraint
 from azure.cli.command_modules.storage._validators import get_source_file_or_blob_service_client
+from azure.cli.command_modules.storage._account_cache import (StorageAccountCache, query_account_key,
+                                                              invalidate_on_authentication_failure)
 
 
 class MockCLI(CLI):
@@ -284,5 +290,71 @@ class TestGetSourceClientValidator(unittest.TestCase):
         return ns
 
 
+class TestQueryAccountKey(unittest.TestCase):
+
+    def setUp(self):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        self.cli_ctx = mock.MagicMock(data={})
+        self.cli_ctx.config.config_dir = config_dir
+        self.cli_ctx.config.getint.return_value = 3600
+        self.cli_ctx.cloud.profile = 'latest'
+
+        patcher = mock.patch('azure.cli.core._profile.Profile.get_subscription_id', return_value='sub1')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch('azure.cli.command_modules.storage._account_cache.get_mgmt_service_client')
+        self.scf = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        account = mock.MagicMock(id='/subscriptions/sub1/resourceGroups/rg1/providers/Microsoft.Storage/'
+                                    'storageAccounts/account1')
+        account.name = 'account1'
+        self.scf.storage_accounts.list.return_value = [account]
+        self.scf.storage_accounts.list_keys.return_value = mock.MagicMock(key1='key',
+                                                                          keys=[mock.MagicMock(value='key')])
+
+    def test_query_account_key_is_cached(self):
+        self.assertEqual(query_account_key(self.cli_ctx, 'account1'), 'key')
+        self.assertEqual(self.scf.storage_accounts.list.call_count, 1)
+
+        # the key is cached
+        self.assertEqual(query_account_key(self.cli_ctx, 'account1'), 'key')
+        self.assertEqual(self.scf.storage_accounts.list_keys.call_count, 1)
+
+        # once the key expired, it's queried with the cached resource group
+        with mock.patch('time.time', return_value=4e9):
+            self.assertEqual(query_account_key(self.cli_ctx, 'account1'), 'key')
+        self.scf.storage_accounts.list_keys.assert_called_with('rg1', 'account1')
+        self.assertEqual(self.scf.storage_accounts.list.call_count, 1)
+
+        with self.assertRaises(ValueError):
+            query_account_key(self.cli_ctx, 'account2')
+
+        StorageAccountCache(self.cli_ctx).purge('account1')
+        query_account_key(self.cli_ctx, 'account1')
+        self.assertEqual(self.scf.storage_accounts.list.call_count, 3)
+
+    def test_query_account_key_cache_disabled(self):
+        self.cli_ctx.config.getint.return_value = 0
+        query_account_key(self.cli_ctx, 'account1')
+        query_account_key(self.cli_ctx, 'account1')
+        self.assertEqual(self.scf.storage_accounts.list.call_count, 2)
+
+    def test_cached_key_removed_on_authentication_failure(self):
+        from azure.common import AzureHttpError
+        query_account_key(self.cli_ctx, 'account1')
+        handler = invalidate_on_authentication_failure(self.cli_ctx)
+
+        # a command which didn't use the cached key
+        with self.assertRaises(AzureHttpError):
+            handler(AzureHttpError('forbidden', 403))
+        self.assertEqual(StorageAccountCache(self.cli_ctx).get('account1')[1], 'key')
+
+        with self.assertRaises(AzureHttpError):
+            handler(AzureHttpError('forbidden', 403))
+        self.assertEqual(StorageAccountCache(self.cli_ctx).get('account1'), (None, None))
+
+
 if __name__ == '__main__':
     unittest.main()
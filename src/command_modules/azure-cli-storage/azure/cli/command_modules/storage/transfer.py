@@ -0,0 +1,153 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Scheduling of the batch commands which transfer many files or blobs."""
+
+import json
+import os
+import threading
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+MAX_RETRY_DELAY = 30
+
+
+class TransferJournal(object):
+    """
+    Append-only manifest of the completed transfers of a batch, used to resume it when it was interrupted. Every line
+    is a JSON object with the name, size, last modified time and ETag of a transferred file. A line which is not valid
+    JSON (e.g. a partial write of an interrupted process) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if os.path.isfile(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry['name']] = entry
+                    except (ValueError, TypeError, KeyError):
+                        continue
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def get(self, name):
+        return self._entries.get(name)
+
+    def is_completed(self, name, size, mtime):
+        entry = self._entries.get(name)
+        return bool(entry) and entry.get('size') == size and entry.get('mtime') == mtime
+
+    def record(self, name, size, mtime, etag=None):
+        entry = {'name': name, 'size': size, 'mtime': mtime, 'etag': etag}
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            self._file.write(line)
+            self._file.flush()
+            self._entries[name] = entry
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def is_retryable_error(ex):
+    """ Whether a failed transfer may succeed when it's tried again: throttling, server errors and connection
+    failures. Other client errors and local I/O errors are not retried.
+    """
+    from azure.common import AzureException, AzureHttpError
+    if isinstance(ex, AzureHttpError):
+        return ex.status_code in (408, 429) or ex.status_code >= 500
+    return isinstance(ex, AzureException)
+
+
+def call_with_retries(func, item, retries=3, retry_delay=1):
+    """ Call `func` with the item, retrying with an exponential backoff while it fails with a transient error. """
+    attempt = 0
+    while True:
+        try:
+            return func(item)
+        except Exception as ex:  # pylint: disable=broad-except
+            if attempt >= retries or not is_retryable_error(ex):
+                raise
+            attempt += 1
+            delay = min(retry_delay * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+            logger.info('retrying %s in %s seconds (attempt %d of %d): %s', item, delay, attempt, retries, ex)
+            time.sleep(delay)
+
+
+def run_transfers(func, items, max_workers=8, retries=3, retry_delay=1, total=None, progress_callback=None):
+    """
+    Call `func` for each of the items on a pool of `max_workers` threads. A call which fails with a transient error
+    is retried up to `retries` times with an exponential backoff, and the failure of one item doesn't stop the
+    others. Items are consumed lazily from the iterable, so it can be a generator over a large listing.
+
+    :return: The results of the successful calls in the order of the items, and a list of (item, exception) for the
+             failed ones.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    max_workers = max(1, max_workers or 1)
+    pending = {}
+    results = {}
+    failures = []
+    done_count = [0]
+
+    def _complete(future):
+        index, item = pending.pop(future)
+        try:
+            results[index] = future.result()
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug('failed to transfer %s', item, exc_info=True)
+            failures.append((index, item, ex))
+        done_count[0] += 1
+        if progress_callback:
+            # without a total, the progress is relative to the items read so far
+            progress_callback(done_count[0], total or done_count[0] + len(pending))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for index, item in enumerate(items):
+            # bound the number of queued items so that a listing is not read ahead entirely
+            while len(pending) >= max_workers * 2:
+                for future in wait(list(pending), return_when=FIRST_COMPLETED).done:
+                    _complete(future)
+            pending[executor.submit(call_with_retries, func, item, retries, retry_delay)] = (index, item)
+        while pending:
+            for future in wait(list(pending), return_when=FIRST_COMPLETED).done:
+                _complete(future)
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False)
+
+    return [results[i] for i in sorted(results)], [(item, ex) for _, item, ex in sorted(failures, key=lambda f: f[0])]
+
+
+def raise_for_failures(failures, total, action, describe=str, noun='files'):
+    """ Log the failed transfers of a batch and raise an error with their count. """
+    if not failures:
+        return
+    from knack.util import CLIError
+    for item, ex in failures:
+        logger.error('failed to %s %s: %s', action, describe(item), ex)
+    raise CLIError('{} of {} {} failed to {}.'.format(len(failures), total, noun, action))
@@ -11,6 +11,14 @@ def collect_blobs(blob_service, container, pattern=None):
     """
     List the blobs in the given blob container, filter the blob by comparing their path to the given pattern.
     """
+    return [blob.name for blob in iter_blobs(blob_service, container, pattern)]
+
+
+def iter_blobs(blob_service, container, pattern=None):
+    """
+    Like collect_blobs, but yields the blobs with their properties while the container is listed, page by page. Only
+    the blobs starting with the part of the pattern before its first wildcard are listed.
+    """
     if not blob_service:
         raise ValueError('missing parameter blob_service')
 
@@ -18,19 +26,23 @@ def collect_blobs(blob_service, container, pattern=None):
         raise ValueError('missing parameter container')
 
     if not _pattern_has_wildcards(pattern):
-        return [pattern] if blob_service.exists(container, pattern) else []
-
-    results = []
-    for blob in blob_service.list_blobs(container):
+        from azure.common import AzureMissingResourceHttpError
         try:
-            blob_name = blob.name.encode('utf-8') if isinstance(blob.name, unicode) else blob.name
+            blob = blob_service.get_blob_properties(container, pattern)
+        except AzureMissingResourceHttpError:
+            return
+        blob.name = pattern
+        yield blob
+        return
+
+    for blob in blob_service.list_blobs(container, prefix=_pattern_prefix(pattern)):
+        try:
+            blob.name = blob.name.encode('utf-8') if isinstance(blob.name, unicode) else blob.name
         except NameError:
-            blob_name = blob.name
-
-        if not pattern or _match_path(blob_name, pattern):
-            results.append(blob_name)
+            pass
 
-    return results
+        if not pattern or _match_path(blob.name, pattern):
+            yield blob
 
 
 def collect_files(cmd, file_service, share, pattern=None):
@@ -81,20 +93,67 @@ def glob_files_locally(folder_path, pattern):
                 yield (full_path, full_path[len_folder_path:])
 
 
-def glob_files_remotely(cmd, client, share_name, pattern):
-    """glob the files in remote file share based on the given pattern"""
+def glob_files_remotely(cmd, client, share_name, pattern, max_workers=8):
+    """
+    glob the files in remote file share based on the given pattern. The directories are listed in parallel by up to
+    `max_workers` threads and the matching files are yielded as soon as they are found, in no particular order. The
+    directories which can't contain a match given the part of the pattern before its first wildcard are not listed.
+    """
     from collections import deque
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from azure.cli.command_modules.storage.transfer import call_with_retries
     t_dir, t_file = cmd.get_models('file.models#Directory', 'file.models#File')
 
+    prefix = _pattern_prefix(pattern)
+    max_workers = max(1, max_workers or 1)
+
+    def _list(directory):
+        return list(client.list_directories_and_files(share_name, directory))
+
     queue = deque([""])
-    while queue:
-        current_dir = queue.pop()
-        for f in client.list_directories_and_files(share_name, current_dir):
-            if isinstance(f, t_file):
-                if not pattern or _match_path(os.path.join(current_dir, f.name), pattern):
-                    yield current_dir, f.name
-            elif isinstance(f, t_dir):
-                queue.appendleft(os.path.join(current_dir, f.name))
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while queue or pending:
+            while queue and len(pending) < max_workers:
+                directory = queue.popleft()
+                pending[executor.submit(call_with_retries, _list, directory)] = directory
+            for future in wait(list(pending), return_when=FIRST_COMPLETED).done:
+                files, sub_dirs = _split_directory_listing(pending.pop(future), future.result(), t_dir, t_file,
+                                                           pattern, prefix)
+                queue.extend(sub_dirs)
+                for f in files:
+                    yield f
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _split_directory_listing(current_dir, entries, t_dir, t_file, pattern, prefix):
+    """ The (directory, file name) of the files of a directory listing which match the pattern, and the paths of its
+    sub directories which may contain a match. """
+    files = []
+    sub_dirs = []
+    for f in entries:
+        if isinstance(f, t_file):
+            if not pattern or _match_path(os.path.join(current_dir, f.name), pattern):
+                files.append((current_dir, f.name))
+        elif isinstance(f, t_dir):
+            sub_dir = os.path.join(current_dir, f.name)
+            if _may_contain_match(sub_dir, prefix):
+                sub_dirs.append(sub_dir)
+    return files, sub_dirs
+
+
+def _may_contain_match(directory, prefix):
+    """ Whether a directory may contain paths starting with the prefix of a pattern: it is one of the directories of
+    the prefix or it is below them. """
+    if not prefix:
+        return True
+    directory = os.path.normcase(os.path.join(directory, ''))
+    prefix = os.path.normcase(prefix)
+    return prefix.startswith(directory) or directory.startswith(prefix)
 
 
 def create_short_lived_blob_sas(cmd, account_name, account_key, container, blob):
@@ -167,6 +226,14 @@ def _pattern_has_wildcards(p):
     return not p or p.find('*') != -1 or p.find('?') != -1 or p.find('[') != -1
 
 
+def _pattern_prefix(pattern):
+    """ The part of a pattern before its first wildcard, which the matching paths start with. """
+    if not pattern:
+        return None
+    wildcards = [i for i in (pattern.find('*'), pattern.find('?'), pattern.find('[')) if i != -1]
+    return (pattern[:min(wildcards)] if wildcards else pattern) or None
+
+
 def _match_path(path, pattern):
     from fnmatch import fnmatch
     return fnmatch(path, pattern)
@@ -188,6 +255,18 @@ def guess_content_type(file_path, original, settings_class):
         cache_control=original.cache_control)
 
 
+def compute_file_md5(file_path, chunk_size=4 * 1024 * 1024):
+    """ The base64 encoded MD5 of a local file, in the format of the Content-MD5 property of blobs and files. """
+    import base64
+    import hashlib
+
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode('utf-8')
+
+
 def get_storage_client(cli_ctx, service_type, namespace):
     from azure.cli.command_modules.storage._client_factory import get_storage_data_service_client
 
@@ -6,8 +6,6 @@
 from azure.cli.core import AzCommandsLoader
 from azure.cli.core.profiles import ResourceType
 
-import azure.cli.command_modules.vm._help  # pylint: disable=unused-import
-
 
 class ComputeCommandsLoader(AzCommandsLoader):
 
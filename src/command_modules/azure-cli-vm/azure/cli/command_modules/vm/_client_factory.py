@@ -16,7 +16,9 @@ def cf_ni(cli_ctx, _):
     # TODO: Remove hard coded api-version once
     # https://github.com/Azure/azure-rest-api-specs/issues/570
     # is fixed.
-    ni = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_NETWORK).network_interfaces
+    from copy import copy
+    # the client is shared by the process, so don't change the api-version of its operations
+    ni = copy(get_mgmt_service_client(cli_ctx, ResourceType.MGMT_NETWORK).network_interfaces)
     ni.api_version = '2016-03-30'
     return ni
 
@@ -32,7 +32,7 @@ from ._vm_utils import read_content_if_is_file
 from ._vm_diagnostics_templates import get_default_diag_config
 
 from ._actions import (load_images_from_aliases_doc, load_extension_images_thru_services,
-                       load_images_thru_services, _get_latest_image_version)
+                       load_images_thru_services, _get_latest_image_version, _get_thread_count)
 from ._client_factory import _compute_client_factory, cf_public_ip_addresses
 
 logger = get_logger(__name__)
@@ -672,28 +672,66 @@ def get_vm(cmd, resource_group_name, vm_name, expand=None):
 
 
 def get_vm_details(cmd, resource_group_name, vm_name):
-    from msrestazure.tools import parse_resource_id
-    from azure.cli.command_modules.vm._vm_utils import get_target_network_api
     result = get_instance_view(cmd, resource_group_name, vm_name)
-    network_client = get_mgmt_service_client(
-        cmd.cli_ctx, ResourceType.MGMT_NETWORK, api_version=get_target_network_api(cmd.cli_ctx))
+    return _set_vm_details(result, _VMNetworkLookup(cmd.cli_ctx))
+
+
+_VM_DETAILS_PRELOAD_THRESHOLD = 10
+
+
+class _VMNetworkLookup(object):
+    """ Finds the NICs and public IPs referenced by VMs. With `preload`, all NICs and public IPs of the resource group,
+    or of the subscription, are listed once, so looking up the network details of many VMs doesn't need a request per
+    resource. Those in other groups are still found, by a request each.
+    """
+
+    def __init__(self, cli_ctx, preload=False, resource_group_name=None):
+        from azure.cli.command_modules.vm._vm_utils import get_target_network_api
+        self._network_client = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_NETWORK,
+                                                       api_version=get_target_network_api(cli_ctx))
+        self._nics = {}
+        self._public_ips = {}
+        if preload:
+            nics, public_ips = self._network_client.network_interfaces, self._network_client.public_ip_addresses
+            if resource_group_name:
+                nics, public_ips = nics.list(resource_group_name), public_ips.list(resource_group_name)
+            else:
+                nics, public_ips = nics.list_all(), public_ips.list_all()
+            self._nics = {n.id.lower(): n for n in nics}
+            self._public_ips = {p.id.lower(): p for p in public_ips}
+
+    @staticmethod
+    def _get(cache, resource_id, operations):
+        from msrestazure.tools import parse_resource_id
+        try:
+            return cache[resource_id.lower()]
+        except KeyError:
+            # not preloaded, or created after the listing
+            parts = parse_resource_id(resource_id)
+            return operations.get(parts['resource_group'], parts['name'])
+
+    def get_nic(self, nic_id):
+        return self._get(self._nics, nic_id, self._network_client.network_interfaces)
+
+    def get_public_ip(self, public_ip_id):
+        return self._get(self._public_ips, public_ip_id, self._network_client.public_ip_addresses)
+
+
+def _set_vm_details(result, network_lookup):
     public_ips = []
     fqdns = []
     private_ips = []
     mac_addresses = []
     # pylint: disable=line-too-long,no-member
     for nic_ref in result.network_profile.network_interfaces:
-        nic_parts = parse_resource_id(nic_ref.id)
-        nic = network_client.network_interfaces.get(nic_parts['resource_group'], nic_parts['name'])
+        nic = network_lookup.get_nic(nic_ref.id)
         if nic.mac_address:
             mac_addresses.append(nic.mac_address)
         for ip_configuration in nic.ip_configurations:
             if ip_configuration.private_ip_address:
                 private_ips.append(ip_configuration.private_ip_address)
             if ip_configuration.public_ip_address:
-                res = parse_resource_id(ip_configuration.public_ip_address.id)
-                public_ip_info = network_client.public_ip_addresses.get(res['resource_group'],
-                                                                        res['name'])
+                public_ip_info = network_lookup.get_public_ip(ip_configuration.public_ip_address.id)
                 if public_ip_info.ip_address:
                     public_ips.append(public_ip_info.ip_address)
                 if public_ip_info.dns_settings:
@@ -719,11 +757,27 @@ def list_vm(cmd, resource_group_name=None, show_details=False):
     vm_list = ccf.virtual_machines.list(resource_group_name=resource_group_name) \
         if resource_group_name else ccf.virtual_machines.list_all()
     if show_details:
-        return [get_vm_details(cmd, _parse_rg_name(v.id)[0], v.name) for v in vm_list]
+        return _list_vm_details(cmd, list(vm_list), resource_group_name)
 
     return list(vm_list)
 
 
+def _list_vm_details(cmd, vms, resource_group_name=None):
+    from concurrent.futures import ThreadPoolExecutor
+    if not vms:
+        return []
+    # for a few VMs, getting their NICs and public IPs is cheaper than listing all of the group or subscription
+    network_lookup = _VMNetworkLookup(cmd.cli_ctx, preload=len(vms) >= _VM_DETAILS_PRELOAD_THRESHOLD,
+                                      resource_group_name=resource_group_name)
+
+    def _get_details(vm):
+        result = get_instance_view(cmd, _parse_rg_name(vm.id)[0], vm.name)
+        return _set_vm_details(result, network_lookup)
+
+    with ThreadPoolExecutor(max_workers=_get_thread_count()) as executor:
+        return list(executor.map(_get_details, vms))
+
+
 def list_vm_ip_addresses(cmd, resource_group_name=None, vm_name=None):
     # We start by getting NICs as they are the smack in the middle of all data that we
     # want to collect for a VM (as long as we don't need any info on the VM than what
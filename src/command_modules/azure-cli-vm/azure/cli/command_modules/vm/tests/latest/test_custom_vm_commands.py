@@ -16,7 +16,7 @@ from azure.cli.command_modules.vm.custom import (enable_boot_diagnostics, disabl
                                                  _get_extension_instance_name,
                                                  get_boot_log)
 from azure.cli.command_modules.vm.custom import \
-    (attach_unmanaged_data_disk, detach_data_disk, get_vmss_instance_view)
+    (attach_unmanaged_data_disk, detach_data_disk, get_vmss_instance_view, list_vm)
 
 from azure.cli.core import AzCommandsLoader
 from azure.cli.core.commands import AzCliCommand
@@ -238,6 +238,66 @@ class TestVmCustom(unittest.TestCase):
         vm_client.virtual_machine_scale_set_vms.list.assert_called_once_with('rg1', 'vmss1', expand='instanceView',
                                                                              select='instanceView')
 
+    @mock.patch('azure.cli.command_modules.vm.custom._VM_DETAILS_PRELOAD_THRESHOLD', 2)
+    @mock.patch('azure.cli.command_modules.vm.custom.get_mgmt_service_client')
+    @mock.patch('azure.cli.command_modules.vm.custom._compute_client_factory')
+    def test_list_vm_show_details(self, factory_mock, network_factory_mock):
+        def _id(kind, name):
+            return '/subscriptions/sub/resourceGroups/RG1/providers/Microsoft.{}/{}'.format(kind, name)
+
+        def _vm(name, nic_names):
+            vm = mock.MagicMock(id=_id('Compute/virtualMachines', name))
+            vm.name = name
+            vm.network_profile.network_interfaces = [mock.MagicMock(id=_id('Network/networkInterfaces', n))
+                                                     for n in nic_names]
+            vm.instance_view.statuses = [InstanceViewStatus(code='PowerState/running', display_status='VM running')]
+            return vm
+
+        def _nic(name, private_ip, public_ip_name=None):
+            public_ip = mock.MagicMock(id=_id('Network/publicIPAddresses', public_ip_name)) if public_ip_name else None
+            ip_config = mock.MagicMock(private_ip_address=private_ip, public_ip_address=public_ip)
+            return mock.MagicMock(id=_id('Network/networkInterfaces', name).lower(), mac_address=name.upper(),
+                                  ip_configurations=[ip_config])
+
+        vms = {n: _vm(n, nics) for n, nics in [('vm1', ['nic1']), ('vm2', ['nic2', 'nic3']), ('vm3', [])]}
+        compute_client = factory_mock.return_value
+        compute_client.virtual_machines.list_all.return_value = [vms[n] for n in ['vm1', 'vm2', 'vm3']]
+        compute_client.virtual_machines.get.side_effect = lambda rg, name, expand: vms[name]
+        network_client = network_factory_mock.return_value
+        network_client.network_interfaces.list_all.return_value = [_nic('nic1', '10.0.0.4', 'ip1'),
+                                                                   _nic('nic2', '10.0.0.5')]
+        # nic3 was created after the NICs were listed
+        network_client.network_interfaces.get.return_value = _nic('nic3', '10.0.0.6')
+        network_client.public_ip_addresses.list_all.return_value = [
+            mock.MagicMock(id=_id('Network/publicIPAddresses', 'ip1'), ip_address='1.2.3.4', dns_settings=None)]
+
+        # execute
+        result = list_vm(_get_test_cmd(), show_details=True)
+
+        # assert
+        self.assertEqual([vm.name for vm in result], ['vm1', 'vm2', 'vm3'])
+        self.assertEqual([vm.private_ips for vm in result], ['10.0.0.4', '10.0.0.5,10.0.0.6', ''])
+        self.assertEqual([vm.public_ips for vm in result], ['1.2.3.4', '', ''])
+        self.assertEqual(result[1].mac_addresses, 'NIC2,NIC3')
+        self.assertEqual(result[0].power_state, 'VM running')
+        compute_client.virtual_machines.get.assert_any_call('RG1', 'vm2', expand='instanceView')
+        network_client.network_interfaces.get.assert_called_once_with('RG1', 'nic3')
+        self.assertFalse(network_client.public_ip_addresses.get.called)
+
+        # with a resource group, only its NICs and public IPs are listed
+        vms = {n: _vm(n, nics) for n, nics in [('vm1', ['nic1']), ('vm2', ['nic2', 'nic3']), ('vm3', [])]}
+        compute_client.virtual_machines.list.return_value = [vms[n] for n in ['vm1', 'vm2', 'vm3']]
+        network_client.network_interfaces.list.return_value = network_client.network_interfaces.list_all.return_value
+        network_client.public_ip_addresses.list.return_value = network_client.public_ip_addresses.list_all.return_value
+        network_client.network_interfaces.list_all.reset_mock()
+        network_client.public_ip_addresses.list_all.reset_mock()
+        result = list_vm(_get_test_cmd(), resource_group_name='RG1', show_details=True)
+        self.assertEqual([vm.private_ips for vm in result], ['10.0.0.4', '10.0.0.5,10.0.0.6', ''])
+        network_client.network_interfaces.list.assert_called_once_with('RG1')
+        network_client.public_ip_addresses.list.assert_called_once_with('RG1')
+        self.assertFalse(network_client.network_interfaces.list_all.called)
+        self.assertFalse(network_client.public_ip_addresses.list_all.called)
+
     # pylint: disable=line-too-long
     @mock.patch('azure.cli.command_modules.vm.disk_encryption._compute_client_factory', autospec=True)
     @mock.patch('azure.cli.command_modules.vm.disk_encryption._get_keyvault_key_url', autospec=True)
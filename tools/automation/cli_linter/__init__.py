@@ -7,7 +7,6 @@
 import sys
 import os
 import yaml
-from knack.help_files import helps
 from .linter import LinterManager
 
 
@@ -41,10 +40,8 @@ def main(args):
     loaded_help = {data.command: data for data in loaded_help if data.command}
 
     # load yaml help
-    help_file_entries = {}
-    for entry_name, help_yaml in helps.items():
-        help_entry = yaml.load(help_yaml)
-        help_file_entries[entry_name] = help_entry
+    from azure.cli.core._help_index import get_all_help_data
+    help_file_entries = get_all_help_data(az_cli)
 
     if not args.rule_types_to_run:
         args.rule_types_to_run = ['params', 'commands', 'command_groups', 'help_entries']